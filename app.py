@@ -4,29 +4,57 @@ import sqlite3
 import random
 import string
 import json
+import gzip
+import mimetypes
 import secrets
+import signal
+import socket
 import time
-from urllib.parse import urlparse
-from concurrent.futures import ThreadPoolExecutor
-from flask import Flask, request, jsonify, session, redirect, url_for, render_template, send_from_directory, make_response
+import hmac
+import hashlib
+import math
+import gc
+import base64
+from collections import OrderedDict
+from functools import lru_cache
+import threading
+from xml.sax.saxutils import escape as xml_escape
+from urllib.parse import urlparse, urlunparse, parse_qsl, urlencode
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import click
+from flask import Flask, request, jsonify, session, redirect, url_for, render_template, send_from_directory, make_response, g
+from flask.sessions import SessionInterface, SessionMixin
+from flask.json.tag import TaggedJSONSerializer
+from itsdangerous import Signer, BadSignature
+from werkzeug.datastructures import CallbackDict
 from flask_cors import CORS
 try:
     from flask_session import Session
 except ImportError:
     Session = None
+try:
+    import brotli
+except ImportError:
+    brotli = None
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
 from werkzeug.middleware.proxy_fix import ProxyFix
-import requests
-from bs4 import BeautifulSoup
-from werkzeug.security import generate_password_hash, check_password_hash
-from datetime import datetime, timedelta
-from email.mime.multipart import MIMEMultipart
-from email.mime.text import MIMEText
-import smtplib
-
-app = Flask(__name__)
+from werkzeug.security import generate_password_hash, check_password_hash, safe_join
+from datetime import datetime, timedelta, timezone
+import atexit
+# requests, bs4 and smtplib are imported where they are used. Together they
+# take longer to import than Flask itself, and most requests a fresh worker
+# serves (pages, login, tracker API) need none of them.
+
+# Static files are served by serve_static() so they can be fingerprinted and precompressed.
+app = Flask(__name__, static_folder=None)
 executor = ThreadPoolExecutor(max_workers=3)
 app.wsgi_app = ProxyFix(app.wsgi_app, x_for=1, x_proto=1, x_host=1)
 
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+
 IS_PRODUCTION = os.environ.get('APP_ENV', '').lower() in ['production', 'prod'] or \
     os.environ.get('FLASK_ENV', '').lower() == 'production'
 
@@ -40,20 +68,20 @@ if IS_PRODUCTION and not os.environ.get('SECRET_KEY'):
 app.config['SESSION_COOKIE_SAMESITE'] = 'Lax'  # Changed from 'Strict' for better compatibility
 app.config['SESSION_COOKIE_SECURE'] = IS_PRODUCTION
 app.config['SESSION_COOKIE_HTTPONLY'] = True
-app.config['SESSION_TYPE'] = os.environ.get('SESSION_TYPE', 'filesystem')
+app.config['SESSION_TYPE'] = os.environ.get('SESSION_TYPE', 'sqlite')
 app.config['PERMANENT_SESSION_LIFETIME'] = timedelta(days=30)  # 30 days persistent session
 app.config['SESSION_COOKIE_NAME'] = 'price_alerter_session'  # Custom session cookie name
 app.config['SESSION_USE_SIGNER'] = True
 app.config['SESSION_KEY_PREFIX'] = 'price_alerter:'
-app.config['TEMPLATES_AUTO_RELOAD'] = True
+app.config['TEMPLATES_AUTO_RELOAD'] = not IS_PRODUCTION
 app.config['SEND_FILE_MAX_AGE_DEFAULT'] = 0
 CORS(app, supports_credentials=True, origins="*")
 
 # Enable permanent sessions by default
 @app.before_request
 def make_session_permanent():
-    # Only set permanent if not already set
-    if not session.get('permanent'):
+    # Only set permanent if not already set; re-assigning marks the session modified.
+    if not session.permanent:
         session.permanent = True
 
 
@@ -96,9 +124,8 @@ def resolve_database_path():
             return db_path
 
     # For local development - use project directory.
-    project_dir = os.path.dirname(os.path.abspath(__file__))
-    local_path = os.path.join(project_dir, 'database.db')
-    if (not IS_PRODUCTION) and os.access(project_dir, os.W_OK):
+    local_path = os.path.join(APP_DIR, 'database.db')
+    if (not IS_PRODUCTION) and os.access(APP_DIR, os.W_OK):
         print(f"Using project directory database: {local_path}")
         return local_path
 
@@ -108,7 +135,6 @@ def resolve_database_path():
     return '/tmp/database.db'
 
 DATABASE = resolve_database_path()
-print(f"Using SQLite database: {DATABASE}")
 
 if app.config.get('SESSION_TYPE') == 'filesystem':
     def resolve_session_file_dir():
@@ -146,16 +172,157 @@ if app.config.get('SESSION_TYPE') == 'filesystem':
     app.config['SESSION_FILE_DIR'] = resolve_session_file_dir()
     print(f"Using session file directory: {app.config['SESSION_FILE_DIR']}")
 
-# Initialize Flask-Session when available; fallback to Flask signed cookies.
-if Session is not None:
+# ==================== SESSIONS ====================
+
+# Only rewrite an unchanged permanent session when its expiry has drifted this far.
+SESSION_TOUCH_INTERVAL = timedelta(hours=int(os.environ.get('SESSION_TOUCH_INTERVAL_HOURS', '24')))
+# Server-side lifetime for sessions the browser treats as non-permanent.
+SESSION_DEFAULT_TTL = timedelta(days=1)
+
+
+class SQLiteSession(CallbackDict, SessionMixin):
+    """Server-side session tracked by a signed session id cookie."""
+
+    def __init__(self, initial=None, sid=None, new=False, expires_at=None):
+        def on_update(self):
+            self.modified = True
+        CallbackDict.__init__(self, initial, on_update)
+        self.sid = sid
+        self.new = new
+        self.expires_at = expires_at
+        self.modified = False
+
+
+class SQLiteSessionInterface(SessionInterface):
+    """
+    Stores sessions in the app database through the pooled connection.
+    Unchanged sessions are never written, and anonymous sessions are never stored.
+    """
+    serializer = TaggedJSONSerializer()
+    salt = 'price-alerter-session'
+
+    def _signer(self, app):
+        return Signer(app.secret_key, salt=self.salt, key_derivation='hmac')
+
+    def _new_session(self):
+        return SQLiteSession(sid=secrets.token_urlsafe(32), new=True)
+
+    def open_session(self, app, request):
+        cookie_value = request.cookies.get(self.get_cookie_name(app))
+        if not cookie_value:
+            return self._new_session()
+        try:
+            sid = self._signer(app).unsign(cookie_value).decode('utf-8')
+        except (BadSignature, UnicodeDecodeError):
+            return self._new_session()
+
+        try:
+            row = get_db_connection().execute(
+                "SELECT data, expires_at FROM sessions WHERE sid = ?", (sid,)
+            ).fetchone()
+        except sqlite3.Error as e:
+            # Table may not exist before the first request runs init_db().
+            print(f"Session load warning: {e}")
+            row = None
+        if not row or row[1] < time.time():
+            return self._new_session()
+        try:
+            data = self.serializer.loads(row[0])
+        except Exception:
+            return self._new_session()
+        return SQLiteSession(data, sid=sid, expires_at=row[1])
+
+    def save_session(self, app, session, response):
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+        secure = self.get_cookie_secure(app)
+        samesite = self.get_cookie_samesite(app)
+        httponly = self.get_cookie_httponly(app)
+
+        # A session holding nothing but the permanent flag is anonymous traffic.
+        has_data = any(key != '_permanent' for key in session.keys())
+        if not has_data:
+            if not session.new:
+                conn = get_db_connection()
+                conn.execute("DELETE FROM sessions WHERE sid = ?", (session.sid,))
+                conn.commit()
+                response.delete_cookie(name, domain=domain, path=path, secure=secure,
+                                       samesite=samesite, httponly=httponly)
+            return
+
+        cookie_expires = self.get_expiration_time(app, session)
+        expires = cookie_expires or (datetime.now() + SESSION_DEFAULT_TTL)
+        expires_at = expires.timestamp()
+        needs_touch = (
+            session.expires_at is None
+            or expires_at - session.expires_at > SESSION_TOUCH_INTERVAL.total_seconds()
+        )
+        if not session.modified and not needs_touch:
+            return
+
+        conn = get_db_connection()
+        conn.execute("""
+            INSERT INTO sessions (sid, data, expires_at) VALUES (?, ?, ?)
+            ON CONFLICT(sid) DO UPDATE SET data = excluded.data, expires_at = excluded.expires_at
+        """, (session.sid, self.serializer.dumps(dict(session)), expires_at))
+        conn.commit()
+        session.expires_at = expires_at
+
+        signed_sid = self._signer(app).sign(session.sid.encode('utf-8')).decode('utf-8')
+        response.set_cookie(name, signed_sid, expires=cookie_expires, httponly=httponly,
+                            domain=domain, path=path, secure=secure, samesite=samesite)
+        response.vary.add('Cookie')
+
+
+SESSION_PURGE_BATCH_SIZE = 500
+
+
+def purge_expired_sessions(batch_size=SESSION_PURGE_BATCH_SIZE):
+    """Delete expired session rows in bounded batches. Returns the number removed."""
+    conn = get_db_connection()
+    removed = 0
+    while True:
+        cursor = conn.execute("""
+            DELETE FROM sessions WHERE sid IN (
+                SELECT sid FROM sessions WHERE expires_at < ? LIMIT ?
+            )
+        """, (time.time(), batch_size))
+        conn.commit()
+        removed += cursor.rowcount
+        if cursor.rowcount < batch_size:
+            return removed
+
+
+# Initialize the session backend: SQLite by default, Flask-Session for other
+# SESSION_TYPE values when available, otherwise Flask signed cookies.
+if app.config.get('SESSION_TYPE') == 'sqlite':
+    app.session_interface = SQLiteSessionInterface()
+    print("Using SQLite session store")
+elif Session is not None:
     Session(app)
 else:
     app.config.pop('SESSION_TYPE', None)
     print("WARNING: flask_session not installed; using default Flask session backend.")
 
+# Integration configs are JSON files next to app.py, overridable by environment
+# variables. Each is read once per process; under gunicorn --preload that is
+# once in the master, and workers inherit the parsed values.
+def load_json_config(filename, defaults):
+    config = defaults.copy()
+    path = os.path.join(APP_DIR, filename)
+    if os.path.exists(path):
+        try:
+            with open(path, 'r') as f:
+                file_config = json.load(f)
+                config.update(file_config)
+        except Exception as e:
+            print(f"Error loading {filename}: {e}")
+    return config
+
 # Email Configuration
 def load_email_config():
-    config = {
+    config = load_json_config('email_config.json', {
         'enabled': False,
         'smtp_server': 'smtp.gmail.com',
         'smtp_port': 587,
@@ -163,15 +330,7 @@ def load_email_config():
         'smtp_password': '',
         'from_name': 'AI Price Alert',
         'provider': 'gmail'
-    }
-    config_file = 'email_config.json'
-    if os.path.exists(config_file):
-        try:
-            with open(config_file, 'r') as f:
-                file_config = json.load(f)
-                config.update(file_config)
-        except Exception as e:
-            print(f"Error loading email config: {e}")
+    })
     if os.environ.get('SMTP_ENABLED'):
         config['enabled'] = os.environ.get('SMTP_ENABLED').lower() == 'true'
     if os.environ.get('SMTP_SERVER'):
@@ -188,18 +347,6 @@ def load_email_config():
 
 EMAIL_CONFIG = load_email_config()
 
-# Load other configs
-def load_json_config(filename, defaults):
-    config = defaults.copy()
-    if os.path.exists(filename):
-        try:
-            with open(filename, 'r') as f:
-                file_config = json.load(f)
-                config.update(file_config)
-        except Exception as e:
-            print(f"Error loading {filename}: {e}")
-    return config
-
 TWILIO_CONFIG = load_json_config('twilio_config.json', {
     'enabled': False, 'account_sid': '', 'auth_token': '', 'phone_number': ''
 })
@@ -216,6 +363,10 @@ WHATSAPP_CONFIG = load_json_config('whatsapp_config.json', {
 # ==================== EMAIL FUNCTIONS ====================
 
 def send_mail(to_email, subject, html_body, text_body=None):
+    import smtplib
+    from email.mime.multipart import MIMEMultipart
+    from email.mime.text import MIMEText
+
     if not EMAIL_CONFIG['enabled']:
         print(f"\n{'='*60}")
         print("📧 EMAIL SENT - DEMO MODE")
@@ -263,6 +414,8 @@ def generate_otp():
 
 def send_email_otp(email, otp, purpose="verification"):
     if EMAIL_CONFIG['enabled']:
+        import smtplib
+        from email.mime.text import MIMEText
         try:
             msg = MIMEText(f'Your AI Price Alert {purpose} code is: {otp}\n\nThis code expires in 10 minutes.')
             msg['Subject'] = f'AI Price Alert - {purpose.title()} Code'
@@ -337,6 +490,11 @@ def send_price_target_reached_email(to_email, product_name, product_url, current
 
 # ==================== DATABASE ====================
 
+# Stored in PRAGMA user_version once init_db() has run. Bump it whenever
+# init_db() changes, so existing databases pick up the new tables/columns.
+SCHEMA_VERSION = 2
+
+
 def init_db():
     """Initialize database - uses the already resolved DATABASE path"""
     try:
@@ -418,6 +576,7 @@ def init_db():
             currency_symbol TEXT,
             target_reached_notified INTEGER DEFAULT 0,
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP,
             FOREIGN KEY (user_id) REFERENCES users(id)
         )
     ''')
@@ -427,175 +586,1289 @@ def init_db():
     tracker_columns = [row[1] for row in cursor.fetchall()]
     if 'target_reached_notified' not in tracker_columns:
         cursor.execute("ALTER TABLE trackers ADD COLUMN target_reached_notified INTEGER DEFAULT 0")
-    
+    if 'updated_at' not in tracker_columns:
+        cursor.execute("ALTER TABLE trackers ADD COLUMN updated_at TIMESTAMP")
+    cursor.execute("UPDATE trackers SET updated_at = created_at WHERE updated_at IS NULL")
+
+    # Keyset pagination and delta sync over a user's trackers.
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_trackers_user_created ON trackers(user_id, created_at, id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_trackers_user_updated ON trackers(user_id, updated_at, id)")
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS tracker_deletions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            tracker_id INTEGER NOT NULL,
+            deleted_at TIMESTAMP NOT NULL
+        )
+    ''')
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_tracker_deletions_user ON tracker_deletions(user_id, deleted_at)")
+
+    cursor.execute("PRAGMA table_info(users)")
+    user_columns = [row[1] for row in cursor.fetchall()]
+    if 'remember_version' not in user_columns:
+        cursor.execute("ALTER TABLE users ADD COLUMN remember_version INTEGER DEFAULT 1")
+    if 'tracker_version' not in user_columns:
+        cursor.execute("ALTER TABLE users ADD COLUMN tracker_version INTEGER DEFAULT 0")
+    if 'home_currency' not in user_columns:
+        cursor.execute("ALTER TABLE users ADD COLUMN home_currency TEXT")
+    # Legacy random remember tokens are still looked up until they age out.
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_users_remember_token ON users(remember_token)")
+
+    # Support the batched expiry sweeps in purge_expired_auth_rows().
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_pending_signups_created_at ON pending_signups(created_at)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_password_resets_expiry ON password_resets(reset_token_expiry)")
+
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS sessions (
+            sid TEXT PRIMARY KEY,
+            data TEXT NOT NULL,
+            expires_at REAL NOT NULL
+        )
+    ''')
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_sessions_expires_at ON sessions(expires_at)")
+
+    # Cross-worker single-flight table for coalescing identical scrapes.
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS scrape_flights (
+            flight_key TEXT PRIMARY KEY,
+            owner TEXT NOT NULL,
+            expires_at REAL NOT NULL,
+            status_code INTEGER,
+            payload TEXT,
+            completed_at REAL
+        )
+    ''')
+
+    # Every successful scrape, with the tier that produced it and how far to trust it.
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS price_observations (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            product_key TEXT NOT NULL,
+            price REAL NOT NULL,
+            currency TEXT,
+            source TEXT,
+            confidence REAL NOT NULL,
+            observed_at REAL NOT NULL
+        )
+    ''')
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_price_observations_product ON price_observations(product_key, observed_at)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_price_observations_observed ON price_observations(observed_at)")
+
+    # Decayed success rate and page size per site and fetch strategy.
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS fetch_strategy_stats (
+            site TEXT NOT NULL,
+            strategy TEXT NOT NULL,
+            attempts REAL NOT NULL,
+            successes REAL NOT NULL,
+            avg_bytes REAL,
+            updated_at REAL NOT NULL,
+            PRIMARY KEY (site, strategy)
+        )
+    ''')
+
+    # Fetched product pages for offline replay: one row per distinct page per
+    # product, pointing at a compressed body stored once per content hash.
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS page_archive_blobs (
+            content_hash TEXT PRIMARY KEY,
+            codec TEXT NOT NULL,
+            raw_bytes INTEGER NOT NULL,
+            stored_bytes INTEGER NOT NULL,
+            created_at REAL NOT NULL,
+            last_seen_at REAL NOT NULL
+        )
+    ''')
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_page_archive_blobs_seen ON page_archive_blobs(last_seen_at)")
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS page_archive (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            product_key TEXT NOT NULL,
+            url TEXT NOT NULL,
+            site TEXT,
+            strategy TEXT,
+            status INTEGER,
+            content_hash TEXT NOT NULL,
+            price REAL,
+            price_source TEXT,
+            first_fetched_at REAL NOT NULL,
+            fetched_at REAL NOT NULL
+        )
+    ''')
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_page_archive_product ON page_archive(product_key, fetched_at)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_page_archive_hash ON page_archive(content_hash)")
+
+    # Notifications written in the same transaction as the change that caused
+    # them and sent afterwards, so a crash between the two cannot lose one.
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS notification_outbox (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            kind TEXT NOT NULL,
+            payload TEXT NOT NULL,
+            created_at REAL NOT NULL,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            last_error TEXT,
+            claimed_by TEXT,
+            claimed_until REAL,
+            sent_at REAL
+        )
+    ''')
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_notification_outbox_pending ON notification_outbox(sent_at, id)")
+
+    # Title, image, canonical URL, site and currency per canonical product.
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS product_metadata (
+            product_key TEXT PRIMARY KEY,
+            title TEXT,
+            image_url TEXT,
+            canonical_url TEXT,
+            site TEXT,
+            currency TEXT,
+            amp_url TEXT,
+            first_seen_at REAL NOT NULL,
+            updated_at REAL NOT NULL,
+            checked_at REAL NOT NULL
+        )
+    ''')
+    cursor.execute("PRAGMA table_info(product_metadata)")
+    if 'amp_url' not in [row[1] for row in cursor.fetchall()]:
+        cursor.execute("ALTER TABLE product_metadata ADD COLUMN amp_url TEXT")
+
+    # Server-side refresh queue: one row per canonical product, ordered by next_refresh_at.
+    if 'product_key' not in tracker_columns:
+        cursor.execute("ALTER TABLE trackers ADD COLUMN product_key TEXT")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_trackers_product ON trackers(product_key)")
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS product_refresh_schedule (
+            product_key TEXT PRIMARY KEY,
+            next_refresh_at REAL NOT NULL,
+            last_refreshed_at REAL,
+            refresh_interval REAL,
+            consecutive_failures INTEGER DEFAULT 0,
+            lease_owner TEXT,
+            lease_expires_at REAL
+        )
+    ''')
+    cursor.execute("PRAGMA table_info(product_refresh_schedule)")
+    schedule_columns = [row[1] for row in cursor.fetchall()]
+    if 'lease_owner' not in schedule_columns:
+        cursor.execute("ALTER TABLE product_refresh_schedule ADD COLUMN lease_owner TEXT")
+        cursor.execute("ALTER TABLE product_refresh_schedule ADD COLUMN lease_expires_at REAL")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_refresh_schedule_due ON product_refresh_schedule(next_refresh_at)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_refresh_schedule_lease ON product_refresh_schedule(lease_owner)")
+    cursor.execute("SELECT id, url FROM trackers WHERE product_key IS NULL")
+    backfill = [(coalesce_key(url), tracker_id) for tracker_id, url in cursor.fetchall() if url]
+    if backfill:
+        cursor.executemany("UPDATE trackers SET product_key = ? WHERE id = ?", backfill)
+        # Spread the first server-side refresh of existing products over an hour.
+        now = time.time()
+        cursor.executemany(
+            "INSERT OR IGNORE INTO product_refresh_schedule (product_key, next_refresh_at) VALUES (?, ?)",
+            [(key, now + random.uniform(0, 3600)) for key in {key for key, _ in backfill} if is_refreshable_url(key)]
+        )
+
+    cursor.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
     conn.commit()
     conn.close()
 
-# ==================== ROUTES ====================
 
-@app.route('/')
-def root():
-    """Home page with SEO content"""
-    return render_template('home.html')
+def ensure_schema():
+    """Run init_db() unless the database is already at SCHEMA_VERSION. Returns True when it ran."""
+    try:
+        conn = sqlite3.connect(DATABASE)
+        try:
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+        finally:
+            conn.close()
+    except sqlite3.Error:
+        version = None
+    if version == SCHEMA_VERSION:
+        return False
+    init_db()
+    return True
 
-@app.route('/home')
-def home():
-    """Home page alias"""
-    return render_template('home.html')
 
-@app.route('/amp')
-@app.route('/amp/home')
-def home_amp():
-    """AMP home page"""
-    return render_template('home_amp.html')
+_db_local = threading.local()
 
-@app.route('/about')
-def about():
-    """About page with SEO content"""
-    return render_template('about.html')
 
-@app.route('/contact')
-def contact():
-    """Contact page with SEO content"""
-    return render_template('contact.html')
+def get_db_connection():
+    """
+    Return the pooled SQLite connection for the current thread.
+    Connections are opened once per thread/process and reused across requests.
+    """
+    pid = os.getpid()
+    conn = getattr(_db_local, 'conn', None)
+    if conn is None or getattr(_db_local, 'pid', None) != pid:
+        conn = sqlite3.connect(DATABASE, timeout=30, factory=TimedConnection)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+        except sqlite3.OperationalError as e:
+            print(f"Could not enable WAL mode: {e}")
+        _db_local.conn = conn
+        _db_local.pid = pid
+    return conn
+
+
+@app.teardown_request
+def rollback_pooled_connection(exc=None):
+    """Never leave a pooled connection inside an aborted transaction."""
+    conn = getattr(_db_local, 'conn', None)
+    if conn is not None and getattr(_db_local, 'pid', None) == os.getpid() and conn.in_transaction:
+        conn.rollback()
+
+
+# ==================== METRICS ====================
+
+# Each worker keeps its own counters/histograms in memory and periodically
+# writes a snapshot to METRICS_DIR; /metrics sums every worker's snapshot, so
+# the numbers are correct under gunicorn's multiple processes.
+METRICS_DIR = os.environ.get('METRICS_DIR') or os.path.join(os.path.dirname(os.path.abspath(DATABASE)), 'metrics')
+METRICS_FLUSH_INTERVAL = float(os.environ.get('METRICS_FLUSH_INTERVAL', '5'))
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+# Snapshots of workers that exited are dropped once they are this old.
+METRICS_STALE_SECONDS = 3600
+# Guard against unbounded label values (e.g. arbitrary retailer hostnames).
+METRICS_MAX_SERIES_PER_METRIC = 500
+
+DEFAULT_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+DB_LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+
+METRIC_DEFINITIONS = {
+    'http_requests_total': ('counter', 'HTTP requests by route, method and status.'),
+    'http_request_duration_seconds': ('histogram', 'HTTP request latency by route and method.'),
+    'scrape_results_total': ('counter', 'Price lookups by site and result status.'),
+    'scrape_duration_seconds': ('histogram', 'End-to-end price lookup time by site.'),
+    'scrape_fetch_attempts_total': ('counter', 'Retailer page fetches by domain.'),
+    'scrape_fetch_duration_seconds': ('histogram', 'Time per fetch attempt by site, HTTP status and fetch strategy.'),
+    'scrape_captcha_total': ('counter', 'Fetches that hit a captcha or rate-limit page, by domain.'),
+    'scrape_parse_duration_seconds': ('histogram', 'BeautifulSoup parse time by site.'),
+    'scrape_price_source_total': ('counter', 'Which selector or extraction tier produced the price.'),
+    'db_query_duration_seconds': ('histogram', 'SQLite statement time on pooled connections by operation.'),
+    'page_archive_writes_total': ('counter', 'Archived product pages by result (stored, duplicate, error).'),
+    'scrape_body_truncated_total': ('counter', 'Product pages cut off at SCRAPE_MAX_BODY_MB, by domain.'),
+    'worker_recycles_total': ('counter', 'Workers that asked to be replaced, by reason.'),
+}
+HISTOGRAM_BUCKETS = {'db_query_duration_seconds': DB_LATENCY_BUCKETS}
 
-@app.route('/privacy')
-def privacy():
-    """Privacy policy page with SEO content"""
-    return render_template('privacy.html')
 
-@app.route('/terms')
-def terms():
-    """Terms of service page with SEO content"""
-    return render_template('terms.html')
+class MetricsRegistry:
+    """In-process Prometheus-style counters and histograms."""
 
-@app.route('/blog')
-def blog():
-    """Blog listing page"""
-    return render_template('blog.html')
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._histograms = {}
+        self._series_counts = {}
+        self._last_flush = 0.0
 
-@app.route('/blog/how-to-track-product-prices-online')
-def blog_track_prices():
-    """Blog post 1"""
-    return render_template('blog_track_prices.html')
+    def _admit(self, name, key, store):
+        if key in store:
+            return True
+        count = self._series_counts.get(name, 0)
+        if count >= METRICS_MAX_SERIES_PER_METRIC:
+            return False
+        self._series_counts[name] = count + 1
+        return True
 
-@app.route('/blog/best-price-alert-tools-india')
-def blog_best_tools():
-    """Blog post 2"""
-    return render_template('blog_best_tools.html')
+    def inc(self, name, value=1, **labels):
+        key = (name, tuple(sorted((k, str(v)) for k, v in labels.items())))
+        with self._lock:
+            if self._admit(name, key, self._counters):
+                self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name, seconds, **labels):
+        key = (name, tuple(sorted((k, str(v)) for k, v in labels.items())))
+        buckets = HISTOGRAM_BUCKETS.get(name, DEFAULT_LATENCY_BUCKETS)
+        with self._lock:
+            if not self._admit(name, key, self._histograms):
+                return
+            entry = self._histograms.get(key)
+            if entry is None:
+                entry = self._histograms[key] = [[0] * len(buckets), 0.0, 0]
+            for i, bound in enumerate(buckets):
+                if seconds <= bound:
+                    entry[0][i] += 1
+                    break
+            entry[1] += seconds
+            entry[2] += 1
+
+    def timer(self, name, **labels):
+        return _MetricTimer(self, name, labels)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'counters': [[name, list(labels), value] for (name, labels), value in self._counters.items()],
+                'histograms': [
+                    [name, list(labels), list(entry[0]), entry[1], entry[2]]
+                    for (name, labels), entry in self._histograms.items()
+                ],
+            }
 
-@app.route('/blog/save-money-price-trackers')
-def blog_save_money():
-    """Blog post 3"""
-    return render_template('blog_save_money.html')
+    def flush(self, force=False):
+        """Write this worker's snapshot to METRICS_DIR (atomically), at most every flush interval."""
+        now = time.time()
+        if not force and now - self._last_flush < METRICS_FLUSH_INTERVAL:
+            return
+        self._last_flush = now
+        try:
+            os.makedirs(METRICS_DIR, exist_ok=True)
+            path = os.path.join(METRICS_DIR, f"worker-{os.getpid()}.json")
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(self.snapshot(), f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Metrics flush warning: {e}")
+
+
+class _MetricTimer:
+    def __init__(self, registry, name, labels):
+        self.registry = registry
+        self.name = name
+        self.labels = labels
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.registry.observe(self.name, time.perf_counter() - self.started, **self.labels)
+        return False
 
-@app.route('/blog/amazon-price-history')
-def blog_amazon_history():
-    """Blog post 4"""
-    return render_template('blog_amazon_history.html')
 
-@app.route('/signup', methods=['GET', 'POST'])
-def signup():
-    """Signup page - direct account creation"""
-    if 'user_id' in session:
-        return redirect(url_for('dashboard'))
-    
-    if request.method == 'POST':
-        data = request.get_json(silent=True)
-        if not data:
-            return jsonify({"error": "Invalid request body"}), 400
-        username = (data.get('username') or '').strip()
-        email = normalize_email(data.get('email'))
-        password = data.get('password')
-        phone = (data.get('phone') or '').strip() or None
+metrics = MetricsRegistry()
+atexit.register(lambda: metrics.flush(force=True))
 
-        if not all([username, email, password]):
-            return jsonify({"error": "Missing data"}), 400
 
-        try:
-            conn = sqlite3.connect(DATABASE)
-            cursor = conn.cursor()
-            cursor.execute("SELECT id FROM users WHERE lower(email) = ?", (email,))
-            if cursor.fetchone():
-                conn.close()
-                return jsonify({"error": "Email already exists"}), 409
+class TimedConnection(sqlite3.Connection):
+    """sqlite3 connection that records statement latency into db_query_duration_seconds."""
 
-            # Generate remember token for lifetime login
-            remember_token = secrets.token_urlsafe(32)
-            
-            cursor.execute("""
-                INSERT INTO users (username, email, password, phone, email_verified, remember_token)
-                VALUES (?, ?, ?, ?, ?, ?)
-            """, (username, email, generate_password_hash(password), phone, 1, remember_token))
-            user_id = cursor.lastrowid
-            conn.commit()
-            conn.close()
+    def execute(self, sql, *args):
+        started = time.perf_counter()
+        try:
+            return super().execute(sql, *args)
+        finally:
+            operation = sql.lstrip().split(None, 1)[0].upper() if sql.strip() else 'UNKNOWN'
+            metrics.observe('db_query_duration_seconds', time.perf_counter() - started, operation=operation)
 
-            # DO NOT auto-login - user must sign in manually after signup
-            # Create JSON response - redirect to login page after signup
-            response_data = jsonify({
-                "success": "Account created successfully!",
-                "redirect": "/login"
-            })
+    def executemany(self, sql, *args):
+        started = time.perf_counter()
+        try:
+            return super().executemany(sql, *args)
+        finally:
+            metrics.observe('db_query_duration_seconds', time.perf_counter() - started, operation='EXECUTEMANY')
 
-            print(f"New user signed up: {email}")
-            return response_data, 201
-        except Exception as e:
-            print(f"Signup error: {e}")
-            return jsonify({"error": "Signup failed. Please try again."}), 500
+    def commit(self):
+        started = time.perf_counter()
+        try:
+            return super().commit()
+        finally:
+            metrics.observe('db_query_duration_seconds', time.perf_counter() - started, operation='COMMIT')
 
-    return render_template('signup.html')
 
-@app.route('/api/signup-complete', methods=['POST'])
-def signup_complete():
-    """Complete signup after OTP verification"""
-    data = request.get_json()
-    signup_token = data.get('signupToken')
-    email_otp = data.get('emailOTP', '')
-    
-    if not signup_token:
-        return jsonify({"error": "Signup token is required"}), 400
-    
-    conn = sqlite3.connect(DATABASE)
-    cursor = conn.cursor()
-    cursor.execute("SELECT * FROM pending_signups WHERE signup_token = ?", (signup_token,))
-    pending = cursor.fetchone()
-    
-    if not pending:
-        conn.close()
-        return jsonify({"error": "Invalid or expired signup session. Please start over."}), 400
-    
-    signup_id, stored_token, username, email, password, phone, stored_email_otp, stored_email_otp_expiry, stored_phone_otp, stored_phone_otp_expiry, created_at = pending
-    
-    expiry = datetime.fromisoformat(created_at) + timedelta(minutes=30)
-    if datetime.now() > expiry:
-        cursor.execute("DELETE FROM pending_signups WHERE id = ?", (signup_id,))
-        conn.commit()
-        conn.close()
-        return jsonify({"error": "Signup session expired. Please start over."}), 400
-    
-    # Verify email OTP
-    email_verified = False
-    if email_otp:
-        if stored_email_otp and stored_email_otp == email_otp:
-            if stored_email_otp_expiry:
-                otp_expiry = datetime.fromisoformat(stored_email_otp_expiry)
-                if datetime.now() > otp_expiry:
-                    conn.close()
-                    return jsonify({"error": "Email OTP has expired"}), 400
-            email_verified = True
-        else:
-            conn.close()
-            return jsonify({"error": "Invalid email OTP"}), 400
-    
-    if not email_verified:
-        conn.close()
-        return jsonify({"error": "Email verification is required", "requiresEmailVerification": True}), 400
-    
-    # Create the account
+def collect_worker_metrics():
+    """Merge every live (or recently exited) worker's snapshot into one set of series."""
+    metrics.flush(force=True)
+    counters = {}
+    histograms = {}
+    now = time.time()
     try:
-        cursor.execute("""
-            INSERT INTO users (username, email, password, phone, email_verified)
+        filenames = os.listdir(METRICS_DIR)
+    except OSError:
+        filenames = []
+    for filename in filenames:
+        if not (filename.startswith('worker-') and filename.endswith('.json')):
+            continue
+        path = os.path.join(METRICS_DIR, filename)
+        try:
+            if now - os.path.getmtime(path) > METRICS_STALE_SECONDS:
+                os.remove(path)
+                continue
+            with open(path, 'r') as f:
+                snapshot = json.load(f)
+        except (OSError, ValueError):
+            continue
+        for name, labels, value in snapshot.get('counters', []):
+            key = (name, tuple(tuple(pair) for pair in labels))
+            counters[key] = counters.get(key, 0) + value
+        for name, labels, bucket_counts, total, count in snapshot.get('histograms', []):
+            key = (name, tuple(tuple(pair) for pair in labels))
+            entry = histograms.setdefault(key, [[0] * len(bucket_counts), 0.0, 0])
+            entry[0] = [a + b for a, b in zip(entry[0], bucket_counts)]
+            entry[1] += total
+            entry[2] += count
+    return counters, histograms
+
+
+def _format_labels(labels, extra=None):
+    pairs = list(labels) + ([extra] if extra else [])
+    if not pairs:
+        return ''
+    escaped = [
+        f'{k}="{str(v).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34)).replace(chr(10), " ")}"'
+        for k, v in pairs
+    ]
+    return '{' + ','.join(escaped) + '}'
+
+
+def render_prometheus_metrics():
+    counters, histograms = collect_worker_metrics()
+    lines = []
+    for name, (metric_type, help_text) in METRIC_DEFINITIONS.items():
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {metric_type}")
+        if metric_type == 'counter':
+            for (series_name, labels), value in sorted(counters.items()):
+                if series_name == name:
+                    lines.append(f"{name}{_format_labels(labels)} {value}")
+            continue
+        buckets = HISTOGRAM_BUCKETS.get(name, DEFAULT_LATENCY_BUCKETS)
+        for (series_name, labels), (bucket_counts, total, count) in sorted(histograms.items()):
+            if series_name != name:
+                continue
+            cumulative = 0
+            for bound, bucket_count in zip(buckets, bucket_counts):
+                cumulative += bucket_count
+                lines.append(f"{name}_bucket{_format_labels(labels, ('le', repr(float(bound))))} {cumulative}")
+            lines.append(f"{name}_bucket{_format_labels(labels, ('le', '+Inf'))} {count}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {total}")
+            lines.append(f"{name}_count{_format_labels(labels)} {count}")
+    return "\n".join(lines) + "\n"
+
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+
+@app.after_request
+def record_request_metrics(response):
+    started = g.pop('request_started', None)
+    if started is not None:
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        metrics.observe('http_request_duration_seconds', time.perf_counter() - started,
+                        route=route, method=request.method)
+        metrics.inc('http_requests_total', route=route, method=request.method, status=response.status_code)
+        metrics.flush()
+    return response
+
+
+# ==================== BACKGROUND MAINTENANCE ====================
+
+SESSION_PURGE_INTERVAL = int(os.environ.get('SESSION_PURGE_INTERVAL_SECONDS', '3600'))
+
+_maintenance_last_run = {}
+_maintenance_running = set()
+_maintenance_lock = threading.Lock()
+
+
+def _run_maintenance_task(name, func):
+    try:
+        result = func()
+        if result:
+            print(f"[maintenance] {name}: {result}")
+    except Exception as e:
+        print(f"[maintenance] {name} failed: {e}")
+    finally:
+        with _maintenance_lock:
+            _maintenance_running.discard(name)
+
+
+def run_periodically(name, interval_seconds, func, pool=None):
+    """
+    Submit func to the background executor (or pool) at most once per interval
+    in this worker, and never while the previous run of the same task is still going.
+    """
+    now = time.time()
+    with _maintenance_lock:
+        if name in _maintenance_running or now - _maintenance_last_run.get(name, 0) < interval_seconds:
+            return False
+        _maintenance_last_run[name] = now
+        _maintenance_running.add(name)
+    (pool or executor).submit(_run_maintenance_task, name, func)
+    return True
+
+
+AUTH_PURGE_INTERVAL = int(os.environ.get('AUTH_PURGE_INTERVAL_SECONDS', '900'))
+AUTH_PURGE_BATCH_SIZE = int(os.environ.get('AUTH_PURGE_BATCH_SIZE', '500'))
+# VACUUM rewrites the whole file, so only do it rarely and when enough pages are free.
+DB_VACUUM_INTERVAL = int(os.environ.get('DB_VACUUM_INTERVAL_SECONDS', str(24 * 3600)))
+DB_VACUUM_FREE_RATIO = 0.25
+PENDING_SIGNUP_TTL_MINUTES = 30
+
+_last_vacuum_at = 0
+
+
+def _delete_in_batches(conn, where_sql, params, table, batch_size):
+    removed = 0
+    while True:
+        cursor = conn.execute(
+            f"DELETE FROM {table} WHERE id IN (SELECT id FROM {table} WHERE {where_sql} LIMIT ?)",
+            (*params, batch_size)
+        )
+        conn.commit()
+        removed += cursor.rowcount
+        if cursor.rowcount < batch_size:
+            return removed
+
+
+def compact_database(conn):
+    """Run PRAGMA optimize, and VACUUM when the free-page ratio makes it worthwhile."""
+    global _last_vacuum_at
+    conn.execute("PRAGMA optimize")
+    page_count = conn.execute("PRAGMA page_count").fetchone()[0]
+    freelist_count = conn.execute("PRAGMA freelist_count").fetchone()[0]
+    now = time.time()
+    if (
+        page_count
+        and freelist_count / page_count >= DB_VACUUM_FREE_RATIO
+        and now - _last_vacuum_at >= DB_VACUUM_INTERVAL
+    ):
+        _last_vacuum_at = now
+        conn.execute("VACUUM")
+        return True
+    return False
+
+
+def purge_expired_auth_rows(batch_size=AUTH_PURGE_BATCH_SIZE):
+    """
+    Delete expired pending signups, OTPs, password resets, old tracker
+    tombstones, old price observations, delivered or abandoned notifications
+    and stale scrape locks in bounded batches. Returns a dict of counts per table.
+    """
+    conn = get_db_connection()
+    now_iso = datetime.now().isoformat()
+    counts = {
+        # created_at is CURRENT_TIMESTAMP (UTC), so compare in SQLite time.
+        'pending_signups': _delete_in_batches(
+            conn, "created_at < datetime('now', ?)", (f"-{PENDING_SIGNUP_TTL_MINUTES} minutes",),
+            'pending_signups', batch_size
+        ),
+        # OTP rows are useless once none of their codes can still be used.
+        'otp_verification': _delete_in_batches(
+            conn,
+            "(email_otp_expiry IS NULL OR email_otp_expiry < ?) AND (phone_otp_expiry IS NULL OR phone_otp_expiry < ?)",
+            (now_iso, now_iso), 'otp_verification', batch_size
+        ),
+        'password_resets': _delete_in_batches(
+            conn,
+            "reset_token_expiry < ? OR (reset_token_expiry IS NULL AND created_at < datetime('now', '-1 day'))",
+            (now_iso,), 'password_resets', batch_size
+        ),
+    }
+    counts['tracker_deletions'] = _delete_in_batches(
+        conn, "deleted_at < datetime('now', ?)", (f"-{TRACKER_TOMBSTONE_RETENTION_DAYS} days",),
+        'tracker_deletions', batch_size
+    )
+    counts['price_observations'] = _delete_in_batches(
+        conn, "observed_at < ?", (time.time() - PRICE_OBSERVATION_RETENTION_DAYS * 86400,),
+        'price_observations', batch_size
+    )
+    counts['notification_outbox'] = _delete_in_batches(
+        conn, "created_at < ? AND (sent_at IS NOT NULL OR attempts >= ?)",
+        (time.time() - NOTIFICATION_RETENTION_DAYS * 86400, NOTIFICATION_MAX_ATTEMPTS),
+        'notification_outbox', batch_size
+    )
+    cursor = conn.execute(
+        "DELETE FROM scrape_flights WHERE expires_at < ? AND (completed_at IS NULL OR completed_at < ?)",
+        (time.time(), time.time() - SINGLE_FLIGHT_RESULT_TTL)
+    )
+    conn.commit()
+    counts['scrape_flights'] = cursor.rowcount
+    counts['vacuumed'] = compact_database(conn)
+    if not any(counts.values()):
+        return None
+    return counts
+
+
+@app.after_request
+def schedule_maintenance(response):
+    if app.config.get('SESSION_TYPE') == 'sqlite':
+        run_periodically('purge_expired_sessions', SESSION_PURGE_INTERVAL, purge_expired_sessions)
+    run_periodically('purge_expired_auth_rows', AUTH_PURGE_INTERVAL, purge_expired_auth_rows)
+    if PAGE_ARCHIVE_MODE:
+        run_periodically('evict_page_archive', PAGE_ARCHIVE_EVICT_INTERVAL, evict_page_archive)
+    if REFRESH_SCHEDULER_ENABLED:
+        run_periodically('refresh_due_products', REFRESH_SCHEDULER_INTERVAL, refresh_due_products, refresh_executor)
+    run_periodically('send_queued_notifications', NOTIFICATION_SEND_INTERVAL, send_queued_notifications)
+    return response
+
+
+# ==================== MEMORY BUDGET ====================
+
+# A few very large retailer pages can grow a worker's heap for good, so
+# bodies are read up to a cap, only a couple of pages are parsed at once per
+# worker, and a worker past WORKER_MAX_RSS_MB asks gunicorn to replace it
+# after finishing its in-flight requests (0 disables the watchdog).
+SCRAPE_MAX_BODY_BYTES = int(float(os.environ.get('SCRAPE_MAX_BODY_MB', '4')) * 1024 * 1024)
+SCRAPE_PARSE_CONCURRENCY = int(os.environ.get('SCRAPE_PARSE_CONCURRENCY', '2'))
+WORKER_MAX_RSS_MB = float(os.environ.get('WORKER_MAX_RSS_MB', '0'))
+WORKER_RSS_CHECK_INTERVAL = 10
+
+parse_slots = threading.BoundedSemaphore(max(1, SCRAPE_PARSE_CONCURRENCY))
+_rss_checked_at = 0.0
+_recycle_requested = False
+
+
+def read_capped_body(response, limit=SCRAPE_MAX_BODY_BYTES):
+    """Read a streamed response up to limit bytes. Returns (content, truncated)."""
+    chunks = []
+    size = 0
+    for chunk in response.iter_content(chunk_size=64 * 1024):
+        chunks.append(chunk)
+        size += len(chunk)
+        if size >= limit:
+            return b''.join(chunks)[:limit], True
+    return b''.join(chunks), False
+
+
+def current_rss_bytes():
+    """Resident set size of this process, or None where /proc is unavailable."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def over_memory_budget(force=False):
+    """True when RSS is above WORKER_MAX_RSS_MB even after a full collection. Checked at most every few seconds."""
+    global _rss_checked_at
+    if WORKER_MAX_RSS_MB <= 0:
+        return False
+    now = time.time()
+    if not force and now - _rss_checked_at < WORKER_RSS_CHECK_INTERVAL:
+        return False
+    _rss_checked_at = now
+    limit = WORKER_MAX_RSS_MB * 1024 * 1024
+    rss = current_rss_bytes()
+    if rss is None or rss <= limit:
+        return False
+    # Parse trees are reference cycles; give the collector a chance first.
+    gc.collect()
+    rss = current_rss_bytes()
+    return rss is not None and rss > limit
+
+
+@app.after_request
+def recycle_worker_over_memory_budget(response):
+    global _recycle_requested
+    if _recycle_requested or not over_memory_budget():
+        return response
+    _recycle_requested = True
+    rss_mb = (current_rss_bytes() or 0) / (1024 * 1024)
+    if request.environ.get('SERVER_SOFTWARE', '').startswith('gunicorn'):
+        # SIGTERM makes a gunicorn worker stop accepting requests, finish the
+        # ones it has and exit; the arbiter starts a fresh worker in its place.
+        print(f"Worker {os.getpid()} RSS {rss_mb:.0f} MB exceeds {WORKER_MAX_RSS_MB:.0f} MB; recycling")
+        metrics.inc('worker_recycles_total', reason='rss')
+        metrics.flush(force=True)
+        os.kill(os.getpid(), signal.SIGTERM)
+    else:
+        print(f"Process {os.getpid()} RSS {rss_mb:.0f} MB exceeds {WORKER_MAX_RSS_MB:.0f} MB; "
+              "restart it or run under gunicorn to recycle automatically")
+    return response
+
+
+# ==================== REMEMBER TOKENS ====================
+
+REMEMBER_TOKEN_MAX_AGE = 60 * 60 * 24 * 365
+REMEMBER_VERSION_CACHE_SIZE = 10000
+
+# user_id -> newest remember_version this worker has seen. Versions only grow,
+# so a token carrying an older version is revoked and is rejected without a
+# query; this cache never vouches for a token on its own.
+_remember_versions = OrderedDict()
+_remember_versions_lock = threading.Lock()
+
+
+def _remember_signature(payload):
+    digest = hmac.new(
+        app.secret_key.encode('utf-8'), f"remember:{payload}".encode('utf-8'), hashlib.sha256
+    ).digest()
+    return base64.urlsafe_b64encode(digest).rstrip(b'=').decode('ascii')
+
+
+def make_remember_token(user_id, version):
+    """Build a signed remember token: v1.<user_id>.<version>.<expires>.<signature>"""
+    expires = int(time.time()) + REMEMBER_TOKEN_MAX_AGE
+    payload = f"{int(user_id)}.{int(version)}.{expires}"
+    return f"v1.{payload}.{_remember_signature(payload)}"
+
+
+def parse_remember_token(token):
+    """Return (user_id, version) for a valid, unexpired token, else None. No database access."""
+    if not token or not token.startswith('v1.'):
+        return None
+    parts = token.split('.')
+    if len(parts) != 5:
+        return None
+    _, user_id, version, expires, signature = parts
+    payload = f"{user_id}.{version}.{expires}"
+    if not hmac.compare_digest(signature, _remember_signature(payload)):
+        return None
+    try:
+        user_id, version, expires = int(user_id), int(version), int(expires)
+    except ValueError:
+        return None
+    if expires < time.time():
+        return None
+    return user_id, version
+
+
+def cache_remember_version(user_id, version):
+    with _remember_versions_lock:
+        if version >= _remember_versions.get(user_id, 0):
+            _remember_versions[user_id] = version
+        _remember_versions.move_to_end(user_id)
+        while len(_remember_versions) > REMEMBER_VERSION_CACHE_SIZE:
+            _remember_versions.popitem(last=False)
+
+
+def _lookup_remember_user(user_id, version):
+    """
+    Return (username, email) when version is still current for user_id.
+    Tokens older than a version already seen are rejected from the cache;
+    anything else is confirmed by primary key, because another worker may
+    have revoked it since.
+    """
+    with _remember_versions_lock:
+        newest = _remember_versions.get(user_id)
+    if newest is not None and version < newest:
+        return None
+    row = get_db_connection().execute(
+        "SELECT COALESCE(remember_version, 1), username, email FROM users WHERE id = ?", (user_id,)
+    ).fetchone()
+    if not row:
+        return None
+    cache_remember_version(user_id, row[0])
+    if row[0] != version:
+        return None
+    return row[1], row[2]
+
+
+def revoke_remember_tokens(cursor, user_id):
+    """Invalidate every remember token issued to user_id (caller commits)."""
+    cursor.execute("""
+        UPDATE users
+        SET remember_version = COALESCE(remember_version, 1) + 1, remember_token = NULL
+        WHERE id = ?
+    """, (user_id,))
+    with _remember_versions_lock:
+        _remember_versions.pop(user_id, None)
+
+
+def resolve_remember_token(token):
+    """Return (user_id, username, email) for a valid remember token, else None."""
+    parsed = parse_remember_token(token)
+    if parsed:
+        user_id, version = parsed
+        user = _lookup_remember_user(user_id, version)
+        if user:
+            return user_id, user[0], user[1]
+        return None
+
+    # Legacy random tokens: indexed lookup until users sign in again.
+    if token and '.' not in token:
+        row = get_db_connection().execute(
+            "SELECT id, username, email FROM users WHERE remember_token = ?", (token,)
+        ).fetchone()
+        if row:
+            return row
+    return None
+
+
+def set_remember_cookie(response, token):
+    response.set_cookie(
+        'remember_token',
+        token,
+        max_age=REMEMBER_TOKEN_MAX_AGE,
+        httponly=True,
+        samesite='Lax',
+        secure=app.config.get('SESSION_COOKIE_SECURE', False)
+    )
+
+
+# ==================== PASSWORD HASHING ====================
+
+# Werkzeug method string, e.g. "scrypt:32768:8:1" or "pbkdf2:sha256:600000".
+PASSWORD_HASH_METHOD = os.environ.get('PASSWORD_HASH_METHOD', 'scrypt:32768:8:1')
+PASSWORD_SALT_LENGTH = int(os.environ.get('PASSWORD_SALT_LENGTH', '16'))
+# Verifications run on a bounded pool so a login burst cannot occupy every request thread.
+PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', '2'))
+PASSWORD_HASH_QUEUE_LIMIT = int(os.environ.get('PASSWORD_HASH_QUEUE_LIMIT', '16'))
+PASSWORD_HASH_WAIT_SECONDS = 5
+LOGIN_WRITE_FLUSH_INTERVAL = float(os.environ.get('LOGIN_WRITE_FLUSH_INTERVAL', '2'))
+
+password_executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix='password-hash')
+_password_slots = threading.BoundedSemaphore(PASSWORD_HASH_QUEUE_LIMIT)
+
+
+class PasswordPoolBusy(Exception):
+    """Raised when the password hashing pool has no free slot."""
+
+
+def hash_password(password):
+    return generate_password_hash(password, method=PASSWORD_HASH_METHOD, salt_length=PASSWORD_SALT_LENGTH)
+
+
+@lru_cache(maxsize=1)
+def _configured_hash_shape():
+    """
+    (method prefix, salt length) of a hash made with the current settings.
+    Werkzeug fills in defaults ("scrypt" is stored as "scrypt:32768:8:1"), so
+    compare against what it actually writes rather than the raw setting.
+    """
+    method, salt, _ = hash_password('').split('$', 2)
+    return method, len(salt)
+
+
+def password_needs_rehash(stored_hash):
+    """True when stored_hash was produced with different parameters or salt length than configured."""
+    parts = (stored_hash or '').split('$', 2)
+    return len(parts) != 3 or (parts[0], len(parts[1])) != _configured_hash_shape()
+
+
+def _submit_password_task(func, *args, wait=PASSWORD_HASH_WAIT_SECONDS):
+    if not _password_slots.acquire(timeout=wait):
+        raise PasswordPoolBusy()
+    try:
+        future = password_executor.submit(func, *args)
+    except Exception:
+        _password_slots.release()
+        raise
+    future.add_done_callback(lambda _: _password_slots.release())
+    return future
+
+
+def verify_password(stored_hash, password):
+    """
+    Check password against stored_hash on the bounded pool.
+    Returns (ok, legacy_plaintext); legacy_plaintext marks pre-hashing accounts.
+    """
+    if check_password_hash_bounded(stored_hash, password):
+        return True, False
+    # Backward compatibility: legacy accounts stored the plaintext password.
+    if stored_hash and hmac.compare_digest(str(stored_hash).encode('utf-8'), password.encode('utf-8')):
+        return True, True
+    return False, False
+
+
+def check_password_hash_bounded(stored_hash, password):
+    if not stored_hash or '$' not in stored_hash:
+        return False
+    future = _submit_password_task(check_password_hash, stored_hash, password)
+    return future.result()
+
+
+class DeferredLoginWriter:
+    """
+    Collects last_login updates and password rehashes and writes them in one
+    transaction a short while later, off the login request path.
+    """
+
+    def __init__(self, interval):
+        self.interval = interval
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._timer = None
+
+    def queue(self, user_id, new_hash=None, old_hash=None):
+        login_at = datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+        with self._lock:
+            entry = self._pending.setdefault(user_id, {})
+            entry['last_login'] = login_at
+            if new_hash:
+                entry['new_hash'] = new_hash
+                entry['old_hash'] = old_hash
+            if self._timer is None:
+                self._timer = threading.Timer(self.interval, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._timer = None
+        if not pending:
+            return 0
+        try:
+            conn = sqlite3.connect(DATABASE, timeout=30)
+            with conn:
+                conn.executemany(
+                    "UPDATE users SET last_login = ? WHERE id = ?",
+                    [(entry['last_login'], user_id) for user_id, entry in pending.items()]
+                )
+                # Only replace the hash the user logged in with; a concurrent reset wins.
+                conn.executemany(
+                    "UPDATE users SET password = ? WHERE id = ? AND password = ?",
+                    [(entry['new_hash'], user_id, entry['old_hash'])
+                     for user_id, entry in pending.items() if entry.get('new_hash')]
+                )
+            conn.close()
+        except sqlite3.Error as e:
+            print(f"Deferred login write failed for {len(pending)} users: {e}")
+            return 0
+        return len(pending)
+
+
+login_writer = DeferredLoginWriter(LOGIN_WRITE_FLUSH_INTERVAL)
+atexit.register(login_writer.flush)
+
+
+def _rehash_and_queue(user_id, old_hash, password):
+    login_writer.queue(user_id, new_hash=hash_password(password), old_hash=old_hash)
+
+
+def schedule_password_rehash(user_id, old_hash, password):
+    """Rehash in the background and fold the new hash into the next batched login write."""
+    try:
+        _submit_password_task(_rehash_and_queue, user_id, old_hash, password, wait=0)
+    except PasswordPoolBusy:
+        # Still record the login; the rehash happens on a later sign-in.
+        login_writer.queue(user_id)
+
+
+# ==================== RESPONSE COMPRESSION ====================
+
+COMPRESSION_MIN_SIZE = int(os.environ.get('COMPRESSION_MIN_SIZE', '1024'))
+COMPRESSIBLE_MIMETYPES = {
+    'text/html', 'text/plain', 'text/css', 'text/xml', 'application/json',
+    'application/javascript', 'text/javascript', 'application/xml', 'image/svg+xml'
+}
+# Dynamic responses favour speed; cached variants are compressed once, so use the best ratio.
+DYNAMIC_COMPRESSION_LEVELS = {'br': 5, 'gzip': 6}
+CACHED_COMPRESSION_LEVELS = {'br': 11, 'gzip': 9}
+ENCODED_ETAG_SUFFIXES = ('', '-gzip', '-br')
+
+
+def negotiate_encoding():
+    """Pick the best content-coding the client accepts: brotli (if installed), then gzip."""
+    if brotli is not None and request.accept_encodings['br'] > 0:
+        return 'br'
+    if request.accept_encodings['gzip'] > 0:
+        return 'gzip'
+    return None
+
+
+def compress_body(body, encoding, levels=DYNAMIC_COMPRESSION_LEVELS):
+    if encoding == 'br':
+        return brotli.compress(body, quality=levels['br'])
+    return gzip.compress(body, compresslevel=levels['gzip'])
+
+
+def etag_matches(etag):
+    """True when If-None-Match names etag or one of its per-encoding variants."""
+    if_none_match = request.if_none_match
+    return any(if_none_match.contains_weak(etag + suffix) for suffix in ENCODED_ETAG_SUFFIXES)
+
+
+class CompressedVariants:
+    """Mixin for cached bodies: each content-coding is compressed once and kept in memory."""
+
+    def variant(self, encoding):
+        if not encoding:
+            return self.body
+        variants = self.__dict__.setdefault('_variants', {})
+        if encoding not in variants:
+            variants[encoding] = compress_body(self.body, encoding, CACHED_COMPRESSION_LEVELS)
+        return variants[encoding]
+
+
+@app.after_request
+def compress_response(response):
+    """Compress dynamic HTML/JSON/text responses the handler has not already encoded."""
+    if (
+        response.status_code != 200
+        or response.direct_passthrough
+        or response.is_streamed
+        or 'Content-Encoding' in response.headers
+        or response.mimetype not in COMPRESSIBLE_MIMETYPES
+    ):
+        return response
+    response.vary.add('Accept-Encoding')
+    encoding = negotiate_encoding()
+    if not encoding:
+        return response
+    body = response.get_data()
+    if len(body) < COMPRESSION_MIN_SIZE:
+        return response
+    response.set_data(compress_body(body, encoding))
+    response.headers['Content-Encoding'] = encoding
+    etag, weak = response.get_etag()
+    if etag:
+        response.set_etag(f"{etag}-{encoding}", weak=weak)
+    return response
+
+
+# ==================== RENDERED PAGE CACHE ====================
+
+# Public templates render identically for every visitor, so in production each
+# one is rendered once per process and served from memory with a strong ETag.
+PAGE_CACHE_ENABLED = os.environ.get('PAGE_CACHE_ENABLED', 'true' if IS_PRODUCTION else 'false').lower() == 'true'
+
+
+class RenderedPage(CompressedVariants):
+    """Rendered HTML with its strong ETag; compressed variants are built on first use."""
+
+    def __init__(self, body):
+        self.body = body
+        self.etag = hashlib.sha256(body).hexdigest()[:32]
+
+
+_rendered_pages = {}
+_rendered_pages_lock = threading.Lock()
+
+
+def get_rendered_page(template_name):
+    page = _rendered_pages.get(template_name) if PAGE_CACHE_ENABLED else None
+    if page is None:
+        page = RenderedPage(render_template(template_name).encode('utf-8'))
+        if PAGE_CACHE_ENABLED:
+            with _rendered_pages_lock:
+                page = _rendered_pages.setdefault(template_name, page)
+    return page
+
+
+def render_public_page(template_name):
+    """Serve a static public template from the page cache, answering 304 for a matching If-None-Match."""
+    page = get_rendered_page(template_name)
+    encoding = negotiate_encoding()
+    if etag_matches(page.etag):
+        response = app.response_class(status=304, mimetype='text/html')
+    else:
+        response = app.response_class(page.variant(encoding), mimetype='text/html')
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+    response.set_etag(f"{page.etag}-{encoding}" if encoding else page.etag)
+    response.vary.add('Accept-Encoding')
+    return response
+
+# ==================== PUBLIC PAGE REGISTRY ====================
+
+# endpoint -> sitemap metadata for indexable public pages. URLs come from the
+# endpoint's rules in app.url_map, so the sitemap follows the routes.
+PUBLIC_PAGE_REGISTRY = {}
+
+
+def public_page(template_name, changefreq, priority, sitemap_paths=None):
+    """Register a view as an indexable public page (apply below @app.route)."""
+    def decorator(view):
+        PUBLIC_PAGE_REGISTRY[view.__name__] = {
+            'template': template_name,
+            'changefreq': changefreq,
+            'priority': priority,
+            'sitemap_paths': sitemap_paths,
+        }
+        return view
+    return decorator
+
+
+@lru_cache(maxsize=1)
+def public_page_paths():
+    """Every URL path served by a registered public page (routes are fixed after import)."""
+    return frozenset({
+        rule.rule for rule in app.url_map.iter_rules()
+        if rule.endpoint in PUBLIC_PAGE_REGISTRY
+    })
+
+
+def sitemap_entries():
+    """Return (path, lastmod, changefreq, priority) for each registered page, in route order."""
+    entries = []
+    templates_dir = os.path.join(APP_DIR, 'templates')
+    for rule in app.url_map.iter_rules():
+        meta = PUBLIC_PAGE_REGISTRY.get(rule.endpoint)
+        if not meta or (meta['sitemap_paths'] and rule.rule not in meta['sitemap_paths']):
+            continue
+        try:
+            mtime = os.path.getmtime(os.path.join(templates_dir, meta['template']))
+        except OSError:
+            mtime = time.time()
+        lastmod = datetime.fromtimestamp(mtime, timezone.utc).strftime('%Y-%m-%d')
+        entries.append((rule.rule, lastmod, meta['changefreq'], meta['priority']))
+    return entries
+
+
+# ==================== ROUTES ====================
+
+@app.route('/')
+@public_page('home.html', changefreq='daily', priority='1.0')
+def root():
+    """Home page with SEO content"""
+    return render_public_page('home.html')
+
+@app.route('/home')
+@public_page('home.html', changefreq='weekly', priority='0.9')
+def home():
+    """Home page alias"""
+    return render_public_page('home.html')
+
+@app.route('/amp')
+@app.route('/amp/home')
+@public_page('home_amp.html', changefreq='weekly', priority='0.7', sitemap_paths=['/amp/home'])
+def home_amp():
+    """AMP home page"""
+    return render_public_page('home_amp.html')
+
+@app.route('/about')
+@public_page('about.html', changefreq='monthly', priority='0.6')
+def about():
+    """About page with SEO content"""
+    return render_public_page('about.html')
+
+@app.route('/contact')
+@public_page('contact.html', changefreq='monthly', priority='0.6')
+def contact():
+    """Contact page with SEO content"""
+    return render_public_page('contact.html')
+
+@app.route('/privacy')
+@public_page('privacy.html', changefreq='yearly', priority='0.4')
+def privacy():
+    """Privacy policy page with SEO content"""
+    return render_public_page('privacy.html')
+
+@app.route('/terms')
+@public_page('terms.html', changefreq='yearly', priority='0.4')
+def terms():
+    """Terms of service page with SEO content"""
+    return render_public_page('terms.html')
+
+@app.route('/blog')
+@public_page('blog.html', changefreq='weekly', priority='0.8')
+def blog():
+    """Blog listing page"""
+    return render_public_page('blog.html')
+
+@app.route('/blog/how-to-track-product-prices-online')
+@public_page('blog_track_prices.html', changefreq='monthly', priority='0.7')
+def blog_track_prices():
+    """Blog post 1"""
+    return render_public_page('blog_track_prices.html')
+
+@app.route('/blog/best-price-alert-tools-india')
+@public_page('blog_best_tools.html', changefreq='monthly', priority='0.7')
+def blog_best_tools():
+    """Blog post 2"""
+    return render_public_page('blog_best_tools.html')
+
+@app.route('/blog/save-money-price-trackers')
+@public_page('blog_save_money.html', changefreq='monthly', priority='0.7')
+def blog_save_money():
+    """Blog post 3"""
+    return render_public_page('blog_save_money.html')
+
+@app.route('/blog/amazon-price-history')
+@public_page('blog_amazon_history.html', changefreq='monthly', priority='0.7')
+def blog_amazon_history():
+    """Blog post 4"""
+    return render_public_page('blog_amazon_history.html')
+
+@app.route('/signup', methods=['GET', 'POST'])
+def signup():
+    """Signup page - direct account creation"""
+    if 'user_id' in session:
+        return redirect(url_for('dashboard'))
+    
+    if request.method == 'POST':
+        data = request.get_json(silent=True)
+        if not data:
+            return jsonify({"error": "Invalid request body"}), 400
+        username = (data.get('username') or '').strip()
+        email = normalize_email(data.get('email'))
+        password = data.get('password')
+        phone = (data.get('phone') or '').strip() or None
+
+        if not all([username, email, password]):
+            return jsonify({"error": "Missing data"}), 400
+
+        try:
+            conn = sqlite3.connect(DATABASE)
+            cursor = conn.cursor()
+            cursor.execute("SELECT id FROM users WHERE lower(email) = ?", (email,))
+            if cursor.fetchone():
+                conn.close()
+                return jsonify({"error": "Email already exists"}), 409
+
+            # Generate remember token for lifetime login
+            remember_token = secrets.token_urlsafe(32)
+            
+            cursor.execute("""
+                INSERT INTO users (username, email, password, phone, email_verified, remember_token)
+                VALUES (?, ?, ?, ?, ?, ?)
+            """, (username, email, hash_password(password), phone, 1, remember_token))
+            user_id = cursor.lastrowid
+            conn.commit()
+            conn.close()
+
+            # DO NOT auto-login - user must sign in manually after signup
+            # Create JSON response - redirect to login page after signup
+            response_data = jsonify({
+                "success": "Account created successfully!",
+                "redirect": "/login"
+            })
+
+            print(f"New user signed up: {email}")
+            return response_data, 201
+        except Exception as e:
+            print(f"Signup error: {e}")
+            return jsonify({"error": "Signup failed. Please try again."}), 500
+
+    return render_public_page('signup.html')
+
+@app.route('/api/signup-complete', methods=['POST'])
+def signup_complete():
+    """Complete signup after OTP verification"""
+    data = request.get_json()
+    signup_token = data.get('signupToken')
+    email_otp = data.get('emailOTP', '')
+    
+    if not signup_token:
+        return jsonify({"error": "Signup token is required"}), 400
+    
+    conn = sqlite3.connect(DATABASE)
+    cursor = conn.cursor()
+    cursor.execute("SELECT * FROM pending_signups WHERE signup_token = ?", (signup_token,))
+    pending = cursor.fetchone()
+    
+    if not pending:
+        conn.close()
+        return jsonify({"error": "Invalid or expired signup session. Please start over."}), 400
+    
+    signup_id, stored_token, username, email, password, phone, stored_email_otp, stored_email_otp_expiry, stored_phone_otp, stored_phone_otp_expiry, created_at = pending
+    
+    expiry = datetime.fromisoformat(created_at) + timedelta(minutes=30)
+    if datetime.now() > expiry:
+        cursor.execute("DELETE FROM pending_signups WHERE id = ?", (signup_id,))
+        conn.commit()
+        conn.close()
+        return jsonify({"error": "Signup session expired. Please start over."}), 400
+    
+    # Verify email OTP
+    email_verified = False
+    if email_otp:
+        if stored_email_otp and stored_email_otp == email_otp:
+            if stored_email_otp_expiry:
+                otp_expiry = datetime.fromisoformat(stored_email_otp_expiry)
+                if datetime.now() > otp_expiry:
+                    conn.close()
+                    return jsonify({"error": "Email OTP has expired"}), 400
+            email_verified = True
+        else:
+            conn.close()
+            return jsonify({"error": "Invalid email OTP"}), 400
+    
+    if not email_verified:
+        conn.close()
+        return jsonify({"error": "Email verification is required", "requiresEmailVerification": True}), 400
+    
+    # Create the account
+    try:
+        cursor.execute("""
+            INSERT INTO users (username, email, password, phone, email_verified)
             VALUES (?, ?, ?, ?, ?)
         """, (username, email, password, phone, 1))
         user_id = cursor.lastrowid
@@ -628,11 +1901,7 @@ def login():
     # First try to restore session from remember token
     if remember_token and 'user_id' not in session:
         try:
-            conn = sqlite3.connect(DATABASE)
-            cursor = conn.cursor()
-            cursor.execute("SELECT id, username, email FROM users WHERE remember_token = ?", (remember_token,))
-            user = cursor.fetchone()
-            conn.close()
+            user = resolve_remember_token(remember_token)
             if user:
                 # Restore session
                 session['user_id'] = user[0]
@@ -654,93 +1923,61 @@ def login():
         password = data.get('password')
         remember = data.get('remember', True)
 
-        if not email or not password:
-            return jsonify({"error": "Missing data"}), 400
-        
-        try:
-            conn = sqlite3.connect(DATABASE)
-            cursor = conn.cursor()
-            cursor.execute("SELECT * FROM users WHERE lower(email) = ?", (email,))
-            user = cursor.fetchone()
-
-            if user and check_password_hash(user[3], password):
-                # Update last login timestamp
-                cursor.execute("UPDATE users SET last_login = CURRENT_TIMESTAMP WHERE id = ?", (user[0],))
-                
-                # Generate remember token for persistent login (always, unless explicitly unchecked)
-                token = secrets.token_urlsafe(32)
-                cursor.execute("UPDATE users SET remember_token = ? WHERE id = ?", (token, user[0]))
-                
-                conn.commit()
-                conn.close()
-                
-                # Set session
-                session['user_id'] = user[0]
-                session['username'] = user[1]
-                session['email'] = user[2]
-                session.permanent = True
-                
-                # Create JSON response properly
-                response_data = jsonify({
-                    "success": "Logged in successfully",
-                    "redirect": "/dashboard"
-                })
-                
-                # Set remember cookie (lasts 1 year)
-                if remember:
-                    response_data.set_cookie(
-                        'remember_token',
-                        token,
-                        max_age=60 * 60 * 24 * 365,
-                        httponly=True,
-                        samesite='Lax',
-                        secure=app.config.get('SESSION_COOKIE_SECURE', False)
-                    )
-                else:
-                    response_data.delete_cookie('remember_token')
-                
-                print(f"User logged in: {email}, remember_token set: {token[:20]}...")
-                return response_data, 200
-            elif user and user[3] == password:
-                # Backward compatibility: migrate legacy plaintext passwords to hashed format.
-                hashed_password = generate_password_hash(password)
-                cursor.execute("UPDATE users SET password = ?, last_login = CURRENT_TIMESTAMP WHERE id = ?", (hashed_password, user[0]))
-                token = secrets.token_urlsafe(32)
-                cursor.execute("UPDATE users SET remember_token = ? WHERE id = ?", (token, user[0]))
-                conn.commit()
-                conn.close()
+        if not email or not password:
+            return jsonify({"error": "Missing data"}), 400
+        
+        try:
+            user = get_db_connection().execute("""
+                SELECT id, username, email, password, COALESCE(remember_version, 1)
+                FROM users WHERE lower(email) = ?
+            """, (email,)).fetchone()
+            if not user:
+                return jsonify({"error": "Invalid credentials"}), 401
+
+            try:
+                password_ok, legacy_plaintext = verify_password(user[3], password)
+            except PasswordPoolBusy:
+                return jsonify({"error": "Too many sign-in attempts right now. Please retry in a moment."}), 503, {'Retry-After': '2'}
+            if not password_ok:
+                return jsonify({"error": "Invalid credentials"}), 401
+
+            # last_login and any rehash are written later in one batched transaction.
+            if legacy_plaintext or password_needs_rehash(user[3]):
+                schedule_password_rehash(user[0], user[3], password)
+            else:
+                login_writer.queue(user[0])
+
+            # Signed remember token for persistent login (always, unless explicitly unchecked)
+            token = make_remember_token(user[0], user[4])
+            cache_remember_version(user[0], user[4])
 
-                session['user_id'] = user[0]
-                session['username'] = user[1]
-                session['email'] = user[2]
-                session.permanent = True
+            # Set session
+            session['user_id'] = user[0]
+            session['username'] = user[1]
+            session['email'] = user[2]
+            session.permanent = True
 
-                response_data = jsonify({
-                    "success": "Logged in successfully",
-                    "redirect": "/dashboard"
-                })
-
-                if remember:
-                    response_data.set_cookie(
-                        'remember_token',
-                        token,
-                        max_age=60 * 60 * 24 * 365,
-                        httponly=True,
-                        samesite='Lax',
-                        secure=app.config.get('SESSION_COOKIE_SECURE', False)
-                    )
-                else:
-                    response_data.delete_cookie('remember_token')
+            # Create JSON response properly
+            response_data = jsonify({
+                "success": "Logged in successfully",
+                "redirect": "/dashboard"
+            })
 
-                print(f"User logged in (legacy password migrated): {email}")
-                return response_data, 200
+            # Set remember cookie (lasts 1 year)
+            if remember:
+                set_remember_cookie(response_data, token)
             else:
-                conn.close()
-                return jsonify({"error": "Invalid credentials"}), 401
+                response_data.delete_cookie('remember_token')
+
+            if legacy_plaintext:
+                print(f"User logged in (legacy password migration queued): {email}")
+            else:
+                print(f"User logged in: {email}")
+            return response_data, 200
         except Exception as e:
             return jsonify({"error": f"Login failed: {str(e)}"}), 500
     
-    return render_template('login.html')
+    return render_public_page('login.html')
 
 @app.route('/dashboard')
 def dashboard():
@@ -758,10 +1995,11 @@ def logout():
         try:
             conn = sqlite3.connect(DATABASE)
             cursor = conn.cursor()
+            if not user_id:
+                remembered = resolve_remember_token(remember_token)
+                user_id = remembered[0] if remembered else None
             if user_id:
-                cursor.execute("UPDATE users SET remember_token = NULL WHERE id = ?", (user_id,))
-            elif remember_token:
-                cursor.execute("UPDATE users SET remember_token = NULL WHERE remember_token = ?", (remember_token,))
+                revoke_remember_tokens(cursor, user_id)
             conn.commit()
             conn.close()
         except Exception as e:
@@ -802,7 +2040,7 @@ def forgot_password():
         
         return jsonify({"success": True, "message": "If an account exists, a reset link has been sent"}), 200
     
-    return render_template('forgot-password.html')
+    return render_public_page('forgot-password.html')
 
 @app.route('/reset-password', methods=['GET', 'POST'])
 def reset_password():
@@ -832,11 +2070,12 @@ def reset_password():
         if not new_password or len(new_password) < 6:
             return jsonify({"error": "Password must be at least 6 characters"}), 400
         
-        hashed = generate_password_hash(new_password)
+        hashed = hash_password(new_password)
         conn = sqlite3.connect(DATABASE)
         cursor = conn.cursor()
         cursor.execute("UPDATE users SET password = ? WHERE id = ?", (hashed, user_id))
         cursor.execute("DELETE FROM password_resets WHERE user_id = ?", (user_id,))
+        revoke_remember_tokens(cursor, user_id)
         conn.commit()
         conn.close()
         return jsonify({"success": True, "message": "Password reset successful"}), 200
@@ -886,6 +2125,19 @@ def health_check():
     return jsonify(health)
 
 
+@app.route('/metrics')
+def metrics_endpoint():
+    """Prometheus text exposition of request, scrape and database metrics across all workers."""
+    if METRICS_TOKEN and not hmac.compare_digest(
+        request.headers.get('Authorization', ''), f"Bearer {METRICS_TOKEN}"
+    ):
+        return "Unauthorized", 401
+    response = make_response(render_prometheus_metrics())
+    response.headers['Content-Type'] = 'text/plain; version=0.0.4; charset=utf-8'
+    response.headers['Cache-Control'] = 'no-store'
+    return response
+
+
 @app.route('/api/self-heal/report', methods=['POST'])
 def self_heal_report():
     """
@@ -907,19 +2159,33 @@ def self_heal_report():
     print(f"[self-heal] type={event_type} page={page} user_id={user_id} message={message} meta={safe_meta}")
     return jsonify({"ok": True}), 200
 
-@app.route('/api/user', methods=['GET'])
+@app.route('/api/user', methods=['GET', 'PUT'])
 def get_user():
     if 'user_id' not in session:
         return jsonify({"error": "Not logged in"}), 401
+
+    if request.method == 'PUT':
+        data = request.get_json(silent=True) or {}
+        home_currency = normalize_currency_code(data.get('homeCurrency'))
+        if not home_currency or home_currency not in get_fx_rates().rates:
+            return jsonify({"error": "Unsupported home currency"}), 400
+        conn = get_db_connection()
+        conn.execute("UPDATE users SET home_currency = ? WHERE id = ?", (home_currency, session['user_id']))
+        bump_tracker_version(conn, session['user_id'])
+        conn.commit()
+        return jsonify({"message": "User updated", "homeCurrency": home_currency})
     
     conn = sqlite3.connect(DATABASE)
     cursor = conn.cursor()
-    cursor.execute("SELECT id, username, email, phone FROM users WHERE id = ?", (session['user_id'],))
+    cursor.execute("SELECT id, username, email, phone, home_currency FROM users WHERE id = ?", (session['user_id'],))
     user = cursor.fetchone()
     conn.close()
     
     if user:
-        return jsonify({"id": user[0], "username": user[1], "email": user[2], "phone": user[3]})
+        return jsonify({
+            "id": user[0], "username": user[1], "email": user[2], "phone": user[3],
+            "homeCurrency": user[4] or DEFAULT_HOME_CURRENCY
+        })
     return jsonify({"error": "User not found"}), 404
 
 @app.route('/api/trackers', methods=['GET', 'POST', 'PUT', 'DELETE'])
@@ -931,17 +2197,20 @@ def trackers():
     cursor = conn.cursor()
     
     if request.method == 'GET':
-        cursor.execute("SELECT id, url, product_name, current_price, target_price, currency, currency_symbol, created_at FROM trackers WHERE user_id = ? ORDER BY created_at DESC", (session['user_id'],))
-        trackers_list = cursor.fetchall()
         conn.close()
-        result = []
-        for t in trackers_list:
-            result.append({
-                "id": t[0], "url": t[1], "productName": t[2] or "Product",
-                "currentPrice": t[3], "targetPrice": t[4],
-                "currency": t[5], "currencySymbol": t[6], "createdAt": t[7]
-            })
-        return jsonify(result)
+        # The ETag names the user's tracker-set version, so an unchanged set is a 304
+        # without running the listing query or serializing anything.
+        etag = tracker_list_etag(session['user_id'])
+        if etag_matches(etag):
+            response = app.response_class(status=304, mimetype='application/json')
+            response.set_etag(etag)
+            response.headers['Cache-Control'] = TRACKER_LIST_CACHE_CONTROL
+            return response
+        response = list_trackers_response()
+        if response.status_code == 200:
+            response.set_etag(etag)
+            response.headers['Cache-Control'] = TRACKER_LIST_CACHE_CONTROL
+        return response
     
     if request.method == 'POST':
         data = request.get_json(silent=True) or {}
@@ -949,13 +2218,16 @@ def trackers():
             conn.close()
             return jsonify({"error": "URL is required"}), 400
 
-        cursor.execute("""
-            INSERT INTO trackers (user_id, url, product_name, current_price, target_price, currency, currency_symbol)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
+        product_key = track_product(cursor, data.get('url'))
+        cursor.execute(f"""
+            INSERT INTO trackers (user_id, url, product_name, current_price, target_price, currency, currency_symbol,
+                                  product_key, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, {SQL_NOW_MS})
         """, (session['user_id'], data.get('url'), data.get('productName'), 
               data.get('currentPrice'), data.get('targetPrice'), 
-              data.get('currency', 'USD'), data.get('currencySymbol', '$')))
+              data.get('currency', 'USD'), data.get('currencySymbol', '$'), product_key))
         tracker_id = cursor.lastrowid
+        bump_tracker_version(cursor, session['user_id'])
         conn.commit()
         cursor.execute("SELECT created_at FROM trackers WHERE id = ?", (tracker_id,))
         created_at = cursor.fetchone()[0]
@@ -1017,14 +2289,15 @@ def trackers():
         reset_notified = (not is_below_or_equal)
         next_notified_value = 1 if should_notify_now else (0 if reset_notified else int(existing_notified or 0))
 
-        cursor.execute("""
+        cursor.execute(f"""
             UPDATE trackers
             SET current_price = ?,
                 target_price = ?,
                 product_name = ?,
                 currency = ?,
                 currency_symbol = ?,
-                target_reached_notified = ?
+                target_reached_notified = ?,
+                updated_at = {SQL_NOW_MS}
             WHERE id = ? AND user_id = ?
         """, (
             final_current,
@@ -1037,12 +2310,19 @@ def trackers():
             session['user_id']
         ))
         updated_rows = cursor.rowcount
+        if updated_rows:
+            bump_tracker_version(cursor, session['user_id'])
         conn.commit()
         conn.close()
         if updated_rows == 0:
             return jsonify({"error": "Tracker not found"}), 404
 
-        if should_notify_now and user_email:
+        if should_notify_now and user_email and needs_price_verification(existing_url, final_current):
+            executor.submit(
+                verify_then_notify_target_reached, tracker_id, session['user_id'], user_email,
+                final_name, existing_url, final_target, final_symbol
+            )
+        elif should_notify_now and user_email:
             try:
                 send_price_target_reached_email(
                     to_email=user_email,
@@ -1061,10 +2341,200 @@ def trackers():
         data = request.json
         tracker_id = data.get('id')
         cursor.execute("DELETE FROM trackers WHERE id = ? AND user_id = ?", (tracker_id, session['user_id']))
+        if cursor.rowcount:
+            cursor.execute(f"""
+                INSERT INTO tracker_deletions (user_id, tracker_id, deleted_at) VALUES (?, ?, {SQL_NOW_MS})
+            """, (session['user_id'], tracker_id))
+            bump_tracker_version(cursor, session['user_id'])
         conn.commit()
         conn.close()
         return jsonify({"message": "Tracker deleted"})
 
+# ==================== TRACKER LISTING ====================
+
+TRACKER_PAGE_DEFAULT = 100
+TRACKER_PAGE_MAX = 500
+# Deletion tombstones are kept this long; older sync tokens must do a full resync.
+TRACKER_TOMBSTONE_RETENTION_DAYS = 30
+# Millisecond-precision UTC timestamp, comparable as text with CURRENT_TIMESTAMP values.
+SQL_NOW_MS = "strftime('%Y-%m-%d %H:%M:%f', 'now')"
+TRACKER_COLUMNS = (
+    "id, url, product_name, current_price, target_price, currency, currency_symbol, created_at, updated_at"
+)
+
+
+# Browsers must revalidate, which sends If-None-Match with the version ETag.
+TRACKER_LIST_CACHE_CONTROL = 'private, no-cache'
+
+
+def bump_tracker_version(cursor, user_id):
+    """Advance the user's tracker-set version; call in the same transaction as the change."""
+    cursor.execute(
+        "UPDATE users SET tracker_version = COALESCE(tracker_version, 0) + 1 WHERE id = ?", (user_id,)
+    )
+
+
+def get_tracker_version(user_id):
+    row = get_db_connection().execute(
+        "SELECT COALESCE(tracker_version, 0) FROM users WHERE id = ?", (user_id,)
+    ).fetchone()
+    return row[0] if row else 0
+
+
+def tracker_list_etag(user_id):
+    """ETag for this listing request: the user's version plus the query that shaped the response."""
+    query = request.query_string.decode('utf-8', 'replace')
+    query_hash = hashlib.sha256(query.encode('utf-8')).hexdigest()[:8] if query else 'all'
+    etag = f"trackers-{user_id}-{get_tracker_version(user_id)}-{query_hash}"
+    if 'currency' in request.args:
+        # Converted amounts also change when the rate table is refreshed.
+        etag += f"-fx{get_fx_rates().version}"
+    return etag
+
+
+def list_trackers_response():
+    """Build the GET /api/trackers body: the legacy array, a page, or a delta."""
+    if 'currency' in request.args:
+        if any(key in request.args for key in ('limit', 'cursor', 'since')):
+            response = jsonify({"error": "currency cannot be combined with limit, cursor or since"})
+            response.status_code = 400
+            return response
+        return normalized_trackers_response(session['user_id'], request.args['currency'], request.args.get('sort'))
+    if not any(key in request.args for key in ('limit', 'cursor', 'since')):
+        # Legacy shape: the full list as a bare array.
+        rows = get_db_connection().execute(
+            f"SELECT {TRACKER_COLUMNS} FROM trackers WHERE user_id = ? ORDER BY created_at DESC, id DESC",
+            (session['user_id'],)
+        ).fetchall()
+        return jsonify([serialize_tracker(row) for row in rows])
+    try:
+        limit = min(max(int(request.args.get('limit', TRACKER_PAGE_DEFAULT)), 1), TRACKER_PAGE_MAX)
+        if 'since' in request.args:
+            return jsonify(list_tracker_changes(session['user_id'], request.args['since'], limit))
+        return jsonify(list_tracker_page(session['user_id'], request.args.get('cursor'), limit))
+    except (ValueError, UnicodeDecodeError):
+        response = jsonify({"error": "Invalid limit, cursor or since token"})
+        response.status_code = 400
+        return response
+
+
+def serialize_tracker(row):
+    return {
+        "id": row[0], "url": row[1], "productName": row[2] or "Product",
+        "currentPrice": row[3], "targetPrice": row[4],
+        "currency": row[5], "currencySymbol": row[6], "createdAt": row[7],
+        "updatedAt": row[8]
+    }
+
+
+def encode_cursor(timestamp, row_id):
+    """Opaque keyset position: base64 of '<timestamp>|<id>'."""
+    return base64.urlsafe_b64encode(f"{timestamp}|{row_id}".encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(token):
+    timestamp, row_id = base64.urlsafe_b64decode(token.encode('ascii')).decode('utf-8').rsplit('|', 1)
+    return timestamp, int(row_id)
+
+
+def encode_sync_token(timestamp, row_id):
+    """
+    Opaque delta position: base64 of '<timestamp>|<id>|<issued_at>'. Only the
+    issue time decides whether tombstones still cover the token, so an idle
+    account's position can be older than the tombstone horizon.
+    """
+    issued_at = datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+    return base64.urlsafe_b64encode(f"{timestamp}|{row_id}|{issued_at}".encode('utf-8')).decode('ascii')
+
+
+def decode_sync_token(token):
+    """Returns (timestamp, id, issued_at); tokens without an issue time were issued at their position."""
+    parts = base64.urlsafe_b64decode(token.encode('ascii')).decode('utf-8').split('|')
+    if len(parts) == 2:
+        return parts[0], int(parts[1]), parts[0]
+    timestamp, row_id, issued_at = parts
+    return timestamp, int(row_id), issued_at
+
+
+def current_sync_token(conn, user_id):
+    row = conn.execute(
+        "SELECT updated_at, id FROM trackers WHERE user_id = ? ORDER BY updated_at DESC, id DESC LIMIT 1",
+        (user_id,)
+    ).fetchone()
+    latest_delete = conn.execute(
+        "SELECT MAX(deleted_at) FROM tracker_deletions WHERE user_id = ?", (user_id,)
+    ).fetchone()[0]
+    if latest_delete and (not row or latest_delete > row[0]):
+        return encode_sync_token(latest_delete, 0)
+    return encode_sync_token(row[0], row[1]) if row else encode_sync_token('', 0)
+
+
+def list_tracker_page(user_id, cursor_token, limit):
+    """
+    One page of trackers, newest first, keyset-paginated on (created_at, id).
+    The first page also returns a syncToken for later ?since= delta requests.
+    """
+    conn = get_db_connection()
+    result = {}
+    if cursor_token:
+        created_at, row_id = decode_cursor(cursor_token)
+        rows = conn.execute(f"""
+            SELECT {TRACKER_COLUMNS} FROM trackers
+            WHERE user_id = ? AND (created_at < ? OR (created_at = ? AND id < ?))
+            ORDER BY created_at DESC, id DESC LIMIT ?
+        """, (user_id, created_at, created_at, row_id, limit + 1)).fetchall()
+    else:
+        # Taken before reading so changes made while paging are picked up by the next delta.
+        result['syncToken'] = current_sync_token(conn, user_id)
+        rows = conn.execute(f"""
+            SELECT {TRACKER_COLUMNS} FROM trackers
+            WHERE user_id = ?
+            ORDER BY created_at DESC, id DESC LIMIT ?
+        """, (user_id, limit + 1)).fetchall()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    result['trackers'] = [serialize_tracker(row) for row in rows]
+    result['nextCursor'] = encode_cursor(rows[-1][7], rows[-1][0]) if has_more else None
+    return result
+
+
+def list_tracker_changes(user_id, since_token, limit):
+    """Trackers created or updated after since_token, plus ids deleted since then."""
+    conn = get_db_connection()
+    since_at, since_id, issued_at = decode_sync_token(since_token)
+    horizon = (datetime.now(timezone.utc) - timedelta(days=TRACKER_TOMBSTONE_RETENTION_DAYS)).strftime('%Y-%m-%d %H:%M:%S')
+    # Deletions up to the token's position were already reflected when it was
+    # issued; only later ones must still have tombstones.
+    if issued_at and issued_at < horizon:
+        return {"fullResync": True, "trackers": [], "deleted": [], "syncToken": None, "hasMore": False}
+
+    rows = conn.execute(f"""
+        SELECT {TRACKER_COLUMNS} FROM trackers
+        WHERE user_id = ? AND (updated_at > ? OR (updated_at = ? AND id > ?))
+        ORDER BY updated_at, id LIMIT ?
+    """, (user_id, since_at, since_at, since_id, limit + 1)).fetchall()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    deleted_until = rows[-1][8] if has_more else None
+    deletions = conn.execute("""
+        SELECT tracker_id, deleted_at FROM tracker_deletions
+        WHERE user_id = ? AND deleted_at > ? AND (? IS NULL OR deleted_at <= ?)
+        ORDER BY deleted_at
+    """, (user_id, since_at, deleted_until, deleted_until)).fetchall()
+
+    next_at, next_id = (rows[-1][8], rows[-1][0]) if rows else (since_at, since_id)
+    if deletions and deletions[-1][1] > next_at:
+        next_at, next_id = deletions[-1][1], 0
+    return {
+        "fullResync": False,
+        "trackers": [serialize_tracker(row) for row in rows],
+        "deleted": [row[0] for row in deletions],
+        "syncToken": encode_sync_token(next_at, next_id),
+        "hasMore": has_more
+    }
+
+
 # ==================== PASSWORD RESET API ROUTES ====================
 
 @app.route('/api/forgot-password', methods=['POST'])
@@ -1131,9 +2601,10 @@ def api_reset_password():
         return jsonify({"error": "Reset link has expired"}), 400
     
     user_id = reset_record[0]
-    hashed = generate_password_hash(password)
+    hashed = hash_password(password)
     cursor.execute("UPDATE users SET password = ? WHERE id = ?", (hashed, user_id))
     cursor.execute("DELETE FROM password_resets WHERE user_id = ?", (user_id,))
+    revoke_remember_tokens(cursor, user_id)
     conn.commit()
     conn.close()
     
@@ -1187,8 +2658,9 @@ def api_direct_reset_password():
         return jsonify({"error": "User not found"}), 404
     
     user_id = user[0]
-    hashed = generate_password_hash(password)
+    hashed = hash_password(password)
     cursor.execute("UPDATE users SET password = ? WHERE id = ?", (hashed, user_id))
+    revoke_remember_tokens(cursor, user_id)
     conn.commit()
     conn.close()
     
@@ -1348,33 +2820,6 @@ def normalize_product_url(url, site):
     return url
 
 
-def get_fetch_candidates(url, site):
-    """
-    Return candidate URLs to fetch in order.
-    Try canonicalized product URLs first where possible.
-    """
-    candidates = []
-    normalized = normalize_product_url(url, site)
-    candidates.append(normalized)
-    if normalized != url:
-        candidates.append(url)
-
-    if site == 'amazon':
-        asin = extract_amazon_asin(url)
-        if asin:
-            candidates.append(f"https://www.amazon.in/gp/aw/d/{asin}")
-            candidates.append(f"https://www.amazon.in/dp/{asin}?th=1&psc=1")
-
-    # Preserve order but remove duplicates.
-    deduped = []
-    seen = set()
-    for candidate in candidates:
-        if candidate and candidate not in seen:
-            deduped.append(candidate)
-            seen.add(candidate)
-    return deduped
-
-
 CURRENCY_SYMBOLS = {
     "USD": "$",
     "INR": "₹",
@@ -1476,6 +2921,11 @@ def get_site_info(url):
 
 def scrape_price(soup, site, currency_symbol):
     """Generic price scraper - improved to handle more cases"""
+    return scrape_price_with_source(soup, site, currency_symbol)[0]
+
+
+def scrape_price_with_source(soup, site, currency_symbol):
+    """Like scrape_price(), but returns (price, source) where source names the selector that hit."""
 
     # Universal selectors used by many ecommerce sites globally.
     universal_selectors = [
@@ -1498,7 +2948,7 @@ def scrape_price(soup, site, currency_symbol):
         value = elem.get('content') if elem.name == 'meta' else elem.get('data-price') or elem.get('data-sale-price') or elem.get_text()
         price = parse_price(value)
         if price and 1 <= price <= 10000000:
-            return price
+            return price, f"universal:{selector}"
     
     # Try multiple selectors for Amazon
     if site == 'amazon':
@@ -1507,7 +2957,7 @@ def scrape_price(soup, site, currency_symbol):
         if price_elem:
             price = parse_price(price_elem.get_text())
             if price:
-                return price
+                return price, 'amazon:a-price a-offscreen'
 
         # Try new Amazon price structure
         price_elem = soup.find("span", {"class": "a-price"})
@@ -1520,28 +2970,28 @@ def scrape_price(soup, site, currency_symbol):
                     whole_text = f"{whole_text}.{fraction.get_text().strip()}"
                 price = parse_price(whole_text)
                 if price:
-                    return price
+                    return price, 'amazon:a-price whole+fraction'
         
         # Try alternative Amazon selectors
         price_elem = soup.select_one('.a-price-whole')
         if price_elem:
             price = parse_price(price_elem.get_text())
             if price:
-                return price
+                return price, 'amazon:.a-price-whole'
         
         # Try product price ID
         price_elem = soup.find("span", {"id": "priceblock_ourprice"})
         if price_elem:
             price = parse_price(price_elem.get_text())
             if price:
-                return price
+                return price, 'amazon:#priceblock_ourprice'
         
         # Try deal price
         price_elem = soup.find("span", {"class": "a-price-whole"})
         if price_elem:
             price = parse_price(price_elem.get_text())
             if price:
-                return price
+                return price, 'amazon:span.a-price-whole'
         
         # Try to find any element with price text
         price_elem = soup.find(string=re.compile(r'₹\s*[\d,]+'))
@@ -1550,7 +3000,7 @@ def scrape_price(soup, site, currency_symbol):
             for match in nums:
                 price = parse_price(match.replace(',', ''))
                 if price and 50 < price < 100000:
-                    return price
+                    return price, 'amazon:rupee text'
     
     # Flipkart - improved selectors for current website structure
     if site == 'flipkart':
@@ -1559,21 +3009,21 @@ def scrape_price(soup, site, currency_symbol):
         if price_elem:
             price = parse_price(price_elem.get_text())
             if price and price > 10:  # Filter out invalid prices
-                return price
+                return price, 'flipkart:._30jeq3'
         
         # Try alternative Flipkart selectors
         price_elem = soup.find("div", {"class": "Nx9bqj"})
         if price_elem:
             price = parse_price(price_elem.get_text())
             if price and price > 10:
-                return price
+                return price, 'flipkart:.Nx9bqj'
         
         # Try data attributes
         price_elem = soup.find("div", {"data-id": "price"})
         if price_elem:
             price = parse_price(price_elem.get_text())
             if price and price > 10:
-                return price
+                return price, 'flipkart:data-id=price'
         
         # Try finding by style or other attributes
         price_elem = soup.find(string=re.compile(r'₹[\d,]+'))
@@ -1582,7 +3032,7 @@ def scrape_price(soup, site, currency_symbol):
             for match in nums:
                 price = parse_price(match.replace(',', ''))
                 if price and 100 < price < 100000:  # More specific range for Flipkart
-                    return price
+                    return price, 'flipkart:rupee text'
         
         # Last resort: search all text for valid price
         all_text = soup.get_text()
@@ -1593,7 +3043,7 @@ def scrape_price(soup, site, currency_symbol):
             if price_val and 100 < price_val < 100000:  # Valid clothing price range
                 valid_prices.append(price_val)
         if valid_prices:
-            return max(valid_prices)  # Return highest price (usually current price)
+            return max(valid_prices), 'flipkart:page text max'  # Return highest price (usually current price)
     
     # Try multiple selectors for Myntra
     if site == 'myntra':
@@ -1601,7 +3051,7 @@ def scrape_price(soup, site, currency_symbol):
         if price_elem:
             price = parse_price(price_elem.get_text())
             if price:
-                return price
+                return price, 'myntra:.pdp-price'
     
     # Try multiple selectors for Ajio
     if site == 'ajio':
@@ -1609,7 +3059,7 @@ def scrape_price(soup, site, currency_symbol):
         if price_elem:
             price = parse_price(price_elem.get_text())
             if price:
-                return price
+                return price, 'ajio:.prod-price'
     
     # Try multiple selectors for Meesho
     if site == 'meesho':
@@ -1617,7 +3067,7 @@ def scrape_price(soup, site, currency_symbol):
         if price_elem:
             price = parse_price(price_elem.get_text())
             if price:
-                return price
+                return price, 'meesho:.Sc-product-price'
     
     # Try multiple selectors for Snapdeal
     if site == 'snapdeal':
@@ -1625,7 +3075,7 @@ def scrape_price(soup, site, currency_symbol):
         if price_elem:
             price = parse_price(price_elem.get_text())
             if price:
-                return price
+                return price, 'snapdeal:.product-price'
     
     # Fallback: search for currency symbol anywhere in the page
     price_elem = soup.find(string=re.compile(r'₹\s*[\d,]+'))
@@ -1634,7 +3084,7 @@ def scrape_price(soup, site, currency_symbol):
         for match in nums:
             price = parse_price(match.replace(',', ''))
             if price and 50 < price < 100000:
-                return price
+                return price, 'fallback:rupee text'
     
     # Try for global symbols
     for symbol_pattern, min_val, max_val in [
@@ -1649,9 +3099,1351 @@ def scrape_price(soup, site, currency_symbol):
             for match in nums:
                 price = parse_price(match.replace(',', ''))
                 if price and min_val < price < max_val:
-                    return price
+                    return price, f"fallback:{symbol_pattern.lstrip(chr(92))[0]} text"
     
-    return None
+    return None, None
+
+# Base confidence per extraction tier. Structured markup and retailer-specific
+# selectors are trusted; generic class selectors and free-text scans often
+# pick up related-product or strike-through prices.
+PRICE_SOURCE_CONFIDENCE = {
+    'structured': 0.85,
+    'site': 0.9,
+    'universal': 0.55,
+    'text': 0.4,
+    'json_ld': 0.8,
+    'regex_candidates': 0.3,
+}
+
+
+def price_source_tier(source):
+    if source in ('json_ld', 'regex_candidates'):
+        return source
+    if source.startswith('universal:meta') or source.startswith('universal:[itemprop'):
+        return 'structured'
+    if source.startswith('universal:'):
+        return 'universal'
+    if source.endswith(' text') or source.endswith(' text max'):
+        return 'text'
+    return 'site'
+
+
+def score_price_confidence(price, source, json_ld_prices=None, candidate_count=0):
+    """
+    Confidence in [0, 1] for an extracted price: the tier's base score, raised
+    when JSON-LD on the same page agrees and lowered when it disagrees or the
+    tier had several conflicting values to choose from.
+    """
+    tier = price_source_tier(source)
+    confidence = PRICE_SOURCE_CONFIDENCE[tier]
+    distinct_ld = {round(p, 2) for p in (json_ld_prices or [])}
+    if tier == 'json_ld':
+        if len(distinct_ld) > 1:
+            confidence -= 0.15
+    elif distinct_ld:
+        confidence += 0.1 if round(price, 2) in distinct_ld else -0.2
+    if tier == 'regex_candidates' and candidate_count > 3:
+        confidence -= 0.1
+    return round(min(0.98, max(0.05, confidence)), 2)
+
+
+def parse_product_page(content, html_text, site, currency, currency_symbol, detect_currency=True):
+    """
+    Parse a fetched product page and run the extraction tiers in order:
+    site/universal selectors, JSON-LD, then regex candidates over the raw HTML.
+    Returns (soup, price, source, confidence, currency, currency_symbol); price
+    is None when nothing matched. Pass detect_currency=False when the product's
+    currency is already known.
+    """
+    from bs4 import BeautifulSoup
+
+    with metrics.timer('scrape_parse_duration_seconds', site=site):
+        soup = BeautifulSoup(content, "html.parser")
+    price, source = scrape_price_with_source(soup, site, currency_symbol)
+    # JSON-LD is the next tier and also the cross-check for selector hits.
+    json_ld_prices = extract_json_ld_prices(soup)
+    candidate_count = 0
+
+    if price is None and json_ld_prices:
+        price = min(json_ld_prices)
+        source = 'json_ld'
+
+    if price is None:
+        candidates = extract_price_candidates(html_text)
+        if candidates:
+            price = min(candidates)
+            source = 'regex_candidates'
+            candidate_count = len(set(candidates))
+
+    confidence = None
+    if price is not None:
+        confidence = score_price_confidence(price, source, json_ld_prices, candidate_count)
+        if detect_currency:
+            currency, currency_symbol = detect_currency_from_content(soup, html_text, fallback=currency)
+    return soup, price, source, confidence, currency, currency_symbol
+
+
+def extract_product_metadata(soup, site, currency, page_url):
+    """Title, image, canonical URL, site, currency and AMP URL of a product page."""
+    image_url = None
+    for attrs in ({"property": "og:image"}, {"name": "twitter:image"}):
+        tag = soup.find("meta", attrs=attrs)
+        if tag and tag.get("content"):
+            image_url = tag.get("content").strip()
+            break
+    if image_url is None:
+        landing_image = soup.find("img", id="landingImage")
+        if landing_image:
+            image_url = landing_image.get("data-old-hires") or landing_image.get("src")
+
+    canonical_url = None
+    canonical = soup.find("link", rel="canonical")
+    if canonical and canonical.get("href"):
+        canonical_url = canonical.get("href").strip()
+    else:
+        og_url = soup.find("meta", attrs={"property": "og:url"})
+        if og_url and og_url.get("content"):
+            canonical_url = og_url.get("content").strip()
+
+    amp = soup.find("link", rel="amphtml")
+    amp_url = amp.get("href").strip() if amp and amp.get("href") else None
+    if amp_url and amp_url.startswith('/'):
+        parsed = urlparse(page_url)
+        amp_url = f"{parsed.scheme}://{parsed.netloc}{amp_url}"
+
+    return {
+        'title': extract_product_name(soup),
+        'imageUrl': image_url,
+        'canonicalUrl': canonical_url or page_url,
+        'site': site,
+        'currency': currency,
+        'ampUrl': amp_url,
+    }
+
+
+def extract_product_name(soup):
+    """Product name from og:title, else the <title> minus the retailer suffix."""
+    product_name = "Product"
+    if soup.title and soup.title.get_text():
+        title = soup.title.get_text().strip()
+        product_name = re.sub(r'\s*[-|]\s*(Amazon|Flipkart|Myntra|Ajio|Meesho|Snapdeal)\s*$', '', title, flags=re.IGNORECASE).strip()
+    og_title = soup.find("meta", attrs={"property": "og:title"})
+    if og_title and og_title.get("content"):
+        product_name = og_title.get("content").strip()
+    return product_name
+
+
+def fetch_price_data(url):
+    """
+    Fetch a product page and extract its price.
+    Returns a (payload, status_code) tuple so results can be shared between callers.
+    """
+    site = get_site_info(url)[0]
+    started = time.perf_counter()
+    payload, status = scrape_product_page(url)
+    metrics.observe('scrape_duration_seconds', time.perf_counter() - started, site=site)
+    metrics.inc('scrape_results_total', site=site, status=status)
+    if status == 200:
+        record_price_observation(coalesce_key(url), payload)
+    return payload, status
+
+
+def scrape_product_page(url):
+    import requests
+
+    try:
+        site, currency, currency_symbol = get_site_info(url)
+        product_key = coalesce_key(url)
+        # Known products only need their price extracted; metadata is re-read occasionally.
+        metadata = get_product_metadata(product_key)
+        extract_metadata = metadata is None or time.time() - metadata['checkedAt'] > PRODUCT_METADATA_RECHECK_INTERVAL
+        if metadata is not None and metadata['currency']:
+            currency = metadata['currency']
+            currency_symbol = currency_symbol_for(currency)
+        session_client = requests.Session()
+        if site == 'amazon':
+            session_client.cookies.set("i18n-prefs", "INR")
+            session_client.cookies.set("lc-main", "en_IN")
+
+        strategy_site = fetch_strategy_site(url, site)
+        got_page = False
+        page_url = None
+        soup = None
+        price = None
+        source = None
+        confidence = None
+        saw_captcha = False
+
+        # Try multiple candidates + slight header variations before failing.
+        header_variants = [
+            {},
+            {"User-Agent": "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36"},
+        ]
+        for strategy, candidate_url, strategy_headers in plan_fetch_strategies(url, site, strategy_site, metadata):
+            # Strategies that pin their own headers get one attempt; plain fetches also retry with a second UA.
+            for variant in ([strategy_headers] if strategy_headers else header_variants):
+                headers = get_request_headers(candidate_url, site)
+                headers.update(variant)
+                domain = (urlparse(candidate_url).hostname or '').lower()
+                metrics.inc('scrape_fetch_attempts_total', domain=domain)
+                fetch_started = time.perf_counter()
+                with session_client.get(
+                    candidate_url, headers=headers, timeout=20, allow_redirects=True, stream=True
+                ) as current_response:
+                    status_code = current_response.status_code
+                    current_url = current_response.url
+                    content, truncated = read_capped_body(current_response)
+                    current_html = content.decode(current_response.encoding or 'utf-8', errors='replace')
+                metrics.observe('scrape_fetch_duration_seconds', time.perf_counter() - fetch_started,
+                                site=site, status=status_code, strategy=strategy)
+                if truncated:
+                    metrics.inc('scrape_body_truncated_total', domain=domain)
+                body_bytes = len(content)
+                if is_captcha_like_response(status_code, current_html):
+                    metrics.inc('scrape_captcha_total', domain=domain)
+                    record_strategy_result(strategy_site, strategy, False, body_bytes)
+                    saw_captcha = True
+                    time.sleep(0.6)
+                    continue
+                if status_code != 200:
+                    record_strategy_result(strategy_site, strategy, False, body_bytes)
+                    continue
+
+                with parse_slots:
+                    (
+                        current_soup, current_price, price_source, current_confidence,
+                        detected_currency, detected_symbol
+                    ) = parse_product_page(
+                        content, current_html, site, currency, currency_symbol,
+                        # Re-detected whenever metadata is refreshed, so a retailer changing currency is picked up.
+                        detect_currency=extract_metadata or not metadata['currency']
+                    )
+                record_strategy_result(strategy_site, strategy, current_price is not None, body_bytes)
+                archive_page(
+                    product_key, candidate_url, site, strategy, status_code, content, current_price, price_source
+                )
+                got_page = True
+
+                if current_price is not None:
+                    metrics.inc('scrape_price_source_total', site=site, source=price_source)
+                    currency = detected_currency
+                    currency_symbol = detected_symbol
+                    page_url = current_url
+                    soup = current_soup
+                    price = current_price
+                    source = price_source
+                    confidence = current_confidence
+                    break
+                # The tree is a web of parent/child cycles; break it so the page is freed now.
+                current_soup.decompose()
+            if price is not None:
+                break
+
+        if not got_page:
+            # No useful response received.
+            status = 429 if saw_captcha else 502
+            if saw_captcha:
+                normalized = normalize_product_url(url, site)
+                return {
+                    "error": "Website temporarily blocked automated access (captcha). Please retry in a minute with a direct product URL.",
+                    "suggestedUrl": normalized
+                }, status
+            return {"error": "Could not fetch product page. Please verify the URL and try again."}, status
+        
+        if price is None:
+            return {"error": "Could not find price on this page. Use a product page URL with visible price."}, 404
+
+        if extract_metadata:
+            metadata = save_product_metadata(
+                product_key, extract_product_metadata(soup, site, currency, page_url or url)
+            )
+        # Only the extracted fields leave this function.
+        soup.decompose()
+
+        return {
+            "price": price, "currency": currency, 
+            "currency_symbol": currency_symbol, "productName": metadata['title'],
+            "imageUrl": metadata['imageUrl'], "canonicalUrl": metadata['canonicalUrl'],
+            "priceSource": source, "confidence": confidence
+        }, 200
+    except requests.exceptions.Timeout:
+        return {"error": "Request timed out. Please try again."}, 504
+    except requests.exceptions.ConnectionError:
+        return {"error": "Could not connect to the website. Please check the URL."}, 502
+    except Exception as e:
+        return {"error": f"Error: {str(e)}"}, 500
+
+
+# ==================== FETCH STRATEGIES ====================
+
+# Ways to fetch a product page, lightest first. Each entry builds the URL to
+# request (None when the strategy does not apply) and any headers it needs.
+MOBILE_USER_AGENT = (
+    "Mozilla/5.0 (Linux; Android 14; Pixel 8) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/122.0.0.0 Mobile Safari/537.36"
+)
+
+
+def _amazon_asin_url(template):
+    def build(url, metadata):
+        asin = extract_amazon_asin(url)
+        return template.format(asin=asin) if asin else None
+    return build
+
+
+FETCH_STRATEGIES = {
+    # Amazon's mobile detail page is a fraction of the desktop page.
+    'amazon_mobile': (_amazon_asin_url("https://www.amazon.in/gp/aw/d/{asin}"), None),
+    'amazon_dp': (_amazon_asin_url("https://www.amazon.in/dp/{asin}"), None),
+    'amazon_psc': (_amazon_asin_url("https://www.amazon.in/dp/{asin}?th=1&psc=1"), None),
+    # AMP URL advertised by the product page (<link rel="amphtml">), kept in product metadata.
+    'amp': (lambda url, metadata: (metadata or {}).get('ampUrl'), None),
+    # Many retailers send a lighter page to phones.
+    'mobile': (lambda url, metadata: url, {"User-Agent": MOBILE_USER_AGENT}),
+    'direct': (lambda url, metadata: url, None),
+}
+SITE_FETCH_STRATEGIES = {
+    'amazon': ('amazon_mobile', 'amazon_dp', 'direct', 'amazon_psc'),
+}
+DEFAULT_FETCH_STRATEGIES = ('amp', 'mobile', 'direct')
+
+# A strategy is ranked by its average page size once it has this many
+# (decayed) attempts and succeeds at least this often; until then it keeps
+# its configured position, and unreliable strategies go last. Counts decay per
+# attempt and also halve every STRATEGY_STATS_HALF_LIFE, so a strategy demoted
+# by a burst of captchas falls back to its configured position once that is old.
+STRATEGY_MIN_SAMPLES = 3
+STRATEGY_MIN_SUCCESS_RATE = 0.5
+STRATEGY_STATS_DECAY = 0.95
+STRATEGY_STATS_HALF_LIFE = float(os.environ.get('STRATEGY_STATS_HALF_LIFE_HOURS', '12')) * 3600
+# Share of fetches that lead with a strategy not yet ranked by size, so untried
+# and demoted strategies keep collecting samples.
+STRATEGY_EXPLORE_RATE = float(os.environ.get('STRATEGY_EXPLORE_RATE', '0.05'))
+STRATEGY_STATS_TTL = 60
+
+_strategy_stats_cache = {}
+
+
+def fetch_strategy_site(url, site):
+    """Stats key: the retailer name, or the hostname for sites without their own scraper."""
+    if site != 'unknown':
+        return site
+    return (urlparse(url).hostname or 'unknown').lower()
+
+
+def strategy_age_factor(updated_at, now):
+    """Weight left on stats last updated at updated_at."""
+    if not updated_at:
+        return 1.0
+    return 0.5 ** (max(now - updated_at, 0) / STRATEGY_STATS_HALF_LIFE)
+
+
+def load_strategy_stats(strategy_site):
+    now = time.time()
+    cached = _strategy_stats_cache.get(strategy_site)
+    if cached and now - cached[0] < STRATEGY_STATS_TTL:
+        return cached[1]
+    stats = {}
+    for strategy, attempts, successes, avg_bytes, updated_at in get_db_connection().execute(
+        "SELECT strategy, attempts, successes, avg_bytes, updated_at FROM fetch_strategy_stats WHERE site = ?",
+        (strategy_site,)
+    ):
+        factor = strategy_age_factor(updated_at, now)
+        stats[strategy] = (attempts * factor, successes * factor, avg_bytes)
+    _strategy_stats_cache[strategy_site] = (now, stats)
+    return stats
+
+
+def ordered_fetch_strategies(site, strategy_site):
+    names = SITE_FETCH_STRATEGIES.get(site, DEFAULT_FETCH_STRATEGIES)
+    stats = load_strategy_stats(strategy_site)
+
+    def rank(item):
+        index, name = item
+        attempts, successes, avg_bytes = stats.get(name, (0, 0, None))
+        if attempts < STRATEGY_MIN_SAMPLES:
+            return (1, index, 0)
+        if successes / attempts >= STRATEGY_MIN_SUCCESS_RATE and avg_bytes:
+            return (0, avg_bytes, index)
+        return (2, index, 0)
+
+    ranks = {name: rank((index, name)) for index, name in enumerate(names)}
+    ordered = sorted(names, key=ranks.get)
+    unranked = [name for name in ordered if ranks[name][0] != 0]
+    if unranked and len(unranked) < len(ordered) and random.random() < STRATEGY_EXPLORE_RATE:
+        probe = random.choice(unranked)
+        ordered.remove(probe)
+        ordered.insert(0, probe)
+    return ordered
+
+
+def plan_fetch_strategies(url, site, strategy_site, metadata=None):
+    """(strategy, url, headers) to try in order, skipping inapplicable strategies and duplicates."""
+    normalized = normalize_product_url(url, site)
+    plan = []
+    seen = set()
+    for name in ordered_fetch_strategies(site, strategy_site):
+        build_url, headers = FETCH_STRATEGIES[name]
+        candidate_url = build_url(normalized if name == 'direct' else url, metadata)
+        if not candidate_url:
+            continue
+        key = (candidate_url, tuple(sorted((headers or {}).items())))
+        if key in seen:
+            continue
+        seen.add(key)
+        plan.append((name, candidate_url, headers))
+    # The URL as the user gave it is always the last resort.
+    if all(candidate_url != url for _, candidate_url, _ in plan):
+        plan.append(('direct', url, None))
+    return plan
+
+
+def record_strategy_result(strategy_site, strategy, success, body_bytes):
+    """Fold one attempt into the decayed success/size stats for this site and strategy."""
+    try:
+        now = time.time()
+        conn = get_db_connection()
+        previous = conn.execute(
+            "SELECT updated_at FROM fetch_strategy_stats WHERE site = ? AND strategy = ?", (strategy_site, strategy)
+        ).fetchone()
+        decay = STRATEGY_STATS_DECAY * (strategy_age_factor(previous[0], now) if previous else 1.0)
+        conn.execute("""
+            INSERT INTO fetch_strategy_stats (site, strategy, attempts, successes, avg_bytes, updated_at)
+            VALUES (?, ?, 1, ?, ?, ?)
+            ON CONFLICT(site, strategy) DO UPDATE SET
+                attempts = attempts * ? + 1,
+                successes = successes * ? + excluded.successes,
+                avg_bytes = CASE WHEN excluded.avg_bytes IS NULL THEN avg_bytes
+                                 WHEN avg_bytes IS NULL THEN excluded.avg_bytes
+                                 ELSE avg_bytes * 0.8 + excluded.avg_bytes * 0.2 END,
+                updated_at = excluded.updated_at
+        """, (
+            strategy_site, strategy, 1 if success else 0, body_bytes if success else None, now, decay, decay
+        ))
+        conn.commit()
+    except sqlite3.Error as e:
+        print(f"Could not record fetch strategy result for {strategy_site}/{strategy}: {e}")
+
+
+# ==================== PAGE ARCHIVE ====================
+
+# Optional archive of fetched product pages so extraction failures can be
+# debugged and parser changes replayed offline (bench/replay_archive.py).
+# PAGE_ARCHIVE=failures keeps pages where no price was found, =all keeps every
+# parsed page. Bodies are compressed (zstd when installed, else gzip), stored
+# once per content hash, and the least recently seen are evicted past the size cap.
+PAGE_ARCHIVE_MODE = os.environ.get('PAGE_ARCHIVE', '').strip().lower()
+if PAGE_ARCHIVE_MODE in ('0', 'false', 'no', 'off'):
+    PAGE_ARCHIVE_MODE = ''
+PAGE_ARCHIVE_DIR = os.environ.get('PAGE_ARCHIVE_DIR') or os.path.join(os.path.dirname(os.path.abspath(DATABASE)), 'page_archive')
+PAGE_ARCHIVE_MAX_BYTES = int(float(os.environ.get('PAGE_ARCHIVE_MAX_MB', '256')) * 1024 * 1024)
+PAGE_ARCHIVE_EVICT_INTERVAL = int(os.environ.get('PAGE_ARCHIVE_EVICT_INTERVAL_SECONDS', '600'))
+PAGE_ARCHIVE_EVICT_BATCH = 200
+
+
+def page_archive_path(content_hash, codec):
+    return os.path.join(PAGE_ARCHIVE_DIR, content_hash[:2], f"{content_hash}.html.{codec}")
+
+
+def compress_page(content):
+    if zstandard is not None:
+        return 'zst', zstandard.ZstdCompressor(level=10).compress(content)
+    return 'gz', gzip.compress(content, compresslevel=6)
+
+
+def load_archived_page(content_hash, codec):
+    """Raw bytes of an archived page."""
+    with open(page_archive_path(content_hash, codec), 'rb') as f:
+        data = f.read()
+    if codec == 'zst':
+        if zstandard is None:
+            raise RuntimeError("zstandard is required to read zstd-compressed archive entries")
+        return zstandard.ZstdDecompressor().decompress(data)
+    return gzip.decompress(data)
+
+
+def archive_page(product_key, url, site, strategy, status, content, price, price_source):
+    """Archive one parsed product page. Never raises; archiving must not break a scrape."""
+    if not PAGE_ARCHIVE_MODE or not content:
+        return
+    if PAGE_ARCHIVE_MODE == 'failures' and price is not None:
+        return
+    now = time.time()
+    content_hash = hashlib.sha256(content).hexdigest()
+    try:
+        conn = get_db_connection()
+        blob = conn.execute(
+            "SELECT codec FROM page_archive_blobs WHERE content_hash = ?", (content_hash,)
+        ).fetchone()
+        if blob and os.path.exists(page_archive_path(content_hash, blob[0])):
+            conn.execute("UPDATE page_archive_blobs SET last_seen_at = ? WHERE content_hash = ?", (now, content_hash))
+            metrics.inc('page_archive_writes_total', result='duplicate')
+        else:
+            codec, data = compress_page(content)
+            path = page_archive_path(content_hash, codec)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+            conn.execute("""
+                INSERT INTO page_archive_blobs (content_hash, codec, raw_bytes, stored_bytes, created_at, last_seen_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT(content_hash) DO UPDATE SET
+                    codec = excluded.codec, stored_bytes = excluded.stored_bytes, last_seen_at = excluded.last_seen_at
+            """, (content_hash, codec, len(content), len(data), now, now))
+            metrics.inc('page_archive_writes_total', result='stored')
+
+        # An unchanged page re-fetched for the same product only moves its timestamp.
+        latest = conn.execute(
+            "SELECT id, content_hash FROM page_archive WHERE product_key = ? ORDER BY fetched_at DESC LIMIT 1",
+            (product_key,)
+        ).fetchone()
+        if latest and latest[1] == content_hash:
+            conn.execute("""
+                UPDATE page_archive SET url = ?, strategy = ?, status = ?, price = ?, price_source = ?, fetched_at = ?
+                WHERE id = ?
+            """, (url, strategy, status, price, price_source, now, latest[0]))
+        else:
+            conn.execute("""
+                INSERT INTO page_archive
+                    (product_key, url, site, strategy, status, content_hash, price, price_source, first_fetched_at, fetched_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, (product_key, url, site, strategy, status, content_hash, price, price_source, now, now))
+        conn.commit()
+    except (sqlite3.Error, OSError) as e:
+        metrics.inc('page_archive_writes_total', result='error')
+        print(f"Could not archive page for {product_key}: {e}")
+
+
+def evict_page_archive(max_bytes=None):
+    """Drop the least recently seen pages until the archive fits in max_bytes. Returns pages removed."""
+    max_bytes = PAGE_ARCHIVE_MAX_BYTES if max_bytes is None else max_bytes
+    conn = get_db_connection()
+    removed = 0
+    total = conn.execute("SELECT COALESCE(SUM(stored_bytes), 0) FROM page_archive_blobs").fetchone()[0]
+    while total > max_bytes:
+        victims = conn.execute(
+            "SELECT content_hash, codec, stored_bytes FROM page_archive_blobs ORDER BY last_seen_at LIMIT ?",
+            (PAGE_ARCHIVE_EVICT_BATCH,)
+        ).fetchall()
+        if not victims:
+            break
+        batch = []
+        for content_hash, codec, stored_bytes in victims:
+            batch.append(content_hash)
+            total -= stored_bytes
+            if total <= max_bytes:
+                break
+        placeholders = ', '.join('?' * len(batch))
+        conn.execute(f"DELETE FROM page_archive WHERE content_hash IN ({placeholders})", batch)
+        conn.execute(f"DELETE FROM page_archive_blobs WHERE content_hash IN ({placeholders})", batch)
+        conn.commit()
+        # Files go after the rows, so a reader never finds a row without its body.
+        codecs = {content_hash: codec for content_hash, codec, _ in victims}
+        for content_hash in batch:
+            try:
+                os.remove(page_archive_path(content_hash, codecs[content_hash]))
+            except OSError:
+                pass
+        removed += len(batch)
+    return removed or None
+
+
+# ==================== SCRAPE COALESCING ====================
+
+# How long a finished fetch is shared with late arrivals, and how long a
+# worker may hold the cross-process lock before others assume it died.
+SINGLE_FLIGHT_RESULT_TTL = float(os.environ.get('SINGLE_FLIGHT_RESULT_TTL', '5'))
+SINGLE_FLIGHT_LOCK_TTL = float(os.environ.get('SINGLE_FLIGHT_LOCK_TTL', '90'))
+SINGLE_FLIGHT_POLL_INTERVAL = 0.25
+
+TRACKING_QUERY_PARAMS = {'ref', 'ref_', 'tag', 'gclid', 'fbclid', 'affid', 'affExtParam1', 'affExtParam2'}
+
+
+class InFlightFetch:
+    """A fetch in progress inside this worker; followers wait on the event."""
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+
+
+_inflight_fetches = {}
+_inflight_lock = threading.Lock()
+
+
+def coalesce_key(url):
+    """Normalize a product URL so equivalent requests share one fetch."""
+    site, _, _ = get_site_info(url)
+    normalized = normalize_product_url(url, site)
+    parsed = urlparse(normalized)
+    query = [
+        (k, v) for k, v in parse_qsl(parsed.query, keep_blank_values=True)
+        if not k.lower().startswith('utm_') and k not in TRACKING_QUERY_PARAMS
+    ]
+    return urlunparse((
+        parsed.scheme.lower(),
+        parsed.netloc.lower(),
+        parsed.path.rstrip('/') or '/',
+        '',
+        urlencode(sorted(query)),
+        ''
+    ))
+
+
+def _try_acquire_flight(key, owner):
+    """Claim the cross-worker lock for key. Returns True when this worker should fetch."""
+    now = time.time()
+    conn = get_db_connection()
+    cursor = conn.execute("""
+        INSERT INTO scrape_flights (flight_key, owner, expires_at, status_code, payload, completed_at)
+        VALUES (?, ?, ?, NULL, NULL, NULL)
+        ON CONFLICT(flight_key) DO UPDATE SET
+            owner = excluded.owner,
+            expires_at = excluded.expires_at,
+            status_code = NULL,
+            payload = NULL,
+            completed_at = NULL
+        WHERE (scrape_flights.completed_at IS NULL AND scrape_flights.expires_at < ?)
+           OR (scrape_flights.completed_at IS NOT NULL AND scrape_flights.completed_at < ?)
+    """, (key, owner, now + SINGLE_FLIGHT_LOCK_TTL, now, now - SINGLE_FLIGHT_RESULT_TTL))
+    conn.commit()
+    return cursor.rowcount == 1
+
+
+def _read_flight(key):
+    """Return (result, in_flight) for key as seen by other workers."""
+    now = time.time()
+    row = get_db_connection().execute(
+        "SELECT status_code, payload, completed_at, expires_at FROM scrape_flights WHERE flight_key = ?",
+        (key,)
+    ).fetchone()
+    if not row:
+        return None, False
+    status_code, payload, completed_at, expires_at = row
+    if completed_at is not None:
+        if completed_at >= now - SINGLE_FLIGHT_RESULT_TTL and payload:
+            return (json.loads(payload), status_code), False
+        return None, False
+    return None, expires_at >= now
+
+
+def _complete_flight(key, owner, result):
+    payload, status_code = result
+    conn = get_db_connection()
+    conn.execute("""
+        UPDATE scrape_flights
+        SET status_code = ?, payload = ?, completed_at = ?
+        WHERE flight_key = ? AND owner = ?
+    """, (status_code, json.dumps(payload), time.time(), key, owner))
+    conn.commit()
+
+
+def _fetch_across_workers(key, url):
+    """Fetch url unless another gunicorn worker already is; in that case wait for its result."""
+    owner = f"{os.getpid()}:{threading.get_ident()}"
+    deadline = time.time() + SINGLE_FLIGHT_LOCK_TTL
+    try:
+        while time.time() < deadline:
+            if _try_acquire_flight(key, owner):
+                result = fetch_price_data(url)
+                try:
+                    _complete_flight(key, owner, result)
+                except sqlite3.Error as e:
+                    print(f"Single-flight result store warning: {e}")
+                return result
+            result, in_flight = _read_flight(key)
+            if result is not None:
+                return result
+            if not in_flight:
+                continue
+            time.sleep(SINGLE_FLIGHT_POLL_INTERVAL)
+    except sqlite3.Error as e:
+        # The lock table is an optimization; never fail a scrape because of it.
+        print(f"Single-flight lock warning: {e}")
+    return fetch_price_data(url)
+
+
+def fetch_price_single_flight(url):
+    """
+    Coalesce concurrent fetches of the same product.
+    Threads in this worker wait on the leader's event; workers share results via scrape_flights.
+    """
+    key = coalesce_key(url)
+    with _inflight_lock:
+        flight = _inflight_fetches.get(key)
+        is_leader = flight is None
+        if is_leader:
+            flight = InFlightFetch()
+            _inflight_fetches[key] = flight
+
+    if not is_leader:
+        flight.event.wait(timeout=SINGLE_FLIGHT_LOCK_TTL)
+        if flight.result is not None:
+            return flight.result
+        return fetch_price_data(url)
+
+    try:
+        flight.result = _fetch_across_workers(key, url)
+        return flight.result
+    finally:
+        with _inflight_lock:
+            _inflight_fetches.pop(key, None)
+        flight.event.set()
+
+
+# ==================== PRODUCT METADATA ====================
+
+# Metadata is re-extracted this often; the row is only rewritten when a field changed.
+PRODUCT_METADATA_RECHECK_INTERVAL = float(os.environ.get('PRODUCT_METADATA_RECHECK_SECONDS', str(7 * 86400)))
+PRODUCT_METADATA_FIELDS = (('title', 'title'), ('imageUrl', 'image_url'), ('canonicalUrl', 'canonical_url'),
+                           ('site', 'site'), ('currency', 'currency'), ('ampUrl', 'amp_url'))
+
+
+def get_product_metadata(product_key):
+    columns = ', '.join(column for _, column in PRODUCT_METADATA_FIELDS)
+    row = get_db_connection().execute(
+        f"SELECT {columns}, updated_at, checked_at FROM product_metadata WHERE product_key = ?", (product_key,)
+    ).fetchone()
+    if not row:
+        return None
+    metadata = {key: row[i] for i, (key, _) in enumerate(PRODUCT_METADATA_FIELDS)}
+    metadata['updatedAt'] = row[-2]
+    metadata['checkedAt'] = row[-1]
+    return metadata
+
+
+def save_product_metadata(product_key, metadata):
+    """Insert or refresh a product's metadata, writing the fields only when they changed."""
+    now = time.time()
+    values = [metadata.get(key) for key, _ in PRODUCT_METADATA_FIELDS]
+    columns = [column for _, column in PRODUCT_METADATA_FIELDS]
+    conn = get_db_connection()
+    try:
+        conn.execute(f"""
+            INSERT INTO product_metadata (product_key, {', '.join(columns)}, first_seen_at, updated_at, checked_at)
+            VALUES ({', '.join('?' * (len(columns) + 4))})
+            ON CONFLICT(product_key) DO UPDATE SET
+                {', '.join(f'{column} = excluded.{column}' for column in columns)},
+                updated_at = CASE WHEN {' OR '.join(f'{column} IS NOT excluded.{column}' for column in columns)}
+                                  THEN excluded.updated_at ELSE updated_at END,
+                checked_at = excluded.checked_at
+        """, (product_key, *values, now, now, now))
+        conn.commit()
+    except sqlite3.Error as e:
+        print(f"Could not save product metadata for {product_key}: {e}")
+    return {**metadata, 'updatedAt': now, 'checkedAt': now}
+
+
+# ==================== PRICE OBSERVATIONS ====================
+
+# Below this confidence a price is re-fetched before it can trigger an alert.
+PRICE_VERIFY_CONFIDENCE = float(os.environ.get('PRICE_VERIFY_CONFIDENCE', '0.6'))
+PRICE_OBSERVATION_RETENTION_DAYS = 90
+
+
+def record_price_observation(product_key, payload):
+    """Store one successful scrape with its source and confidence."""
+    try:
+        conn = get_db_connection()
+        conn.execute("""
+            INSERT INTO price_observations (product_key, price, currency, source, confidence, observed_at)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, (
+            product_key, payload['price'], payload.get('currency'), payload.get('priceSource'),
+            payload.get('confidence') or 0.0, time.time()
+        ))
+        conn.commit()
+    except sqlite3.Error as e:
+        print(f"Could not record price observation for {product_key}: {e}")
+
+
+def latest_price_observation(product_key):
+    row = get_db_connection().execute("""
+        SELECT price, currency, source, confidence, observed_at
+        FROM price_observations WHERE product_key = ?
+        ORDER BY observed_at DESC LIMIT 1
+    """, (product_key,)).fetchone()
+    if not row:
+        return None
+    return {'price': row[0], 'currency': row[1], 'source': row[2], 'confidence': row[3], 'observedAt': row[4]}
+
+
+def needs_price_verification(url, price):
+    """True when the most recent scrape produced this price with low confidence."""
+    observation = latest_price_observation(coalesce_key(url))
+    return bool(
+        observation
+        and abs(observation['price'] - float(price)) < 0.01
+        and observation['confidence'] < PRICE_VERIFY_CONFIDENCE
+    )
+
+
+def verify_then_notify_target_reached(tracker_id, user_id, user_email, product_name, url, target_price, currency_symbol):
+    """
+    Re-fetch a low-confidence price that crossed the target. Email only if the
+    fresh read confirms it; otherwise store the fresh price and clear the
+    notified flag so a confirmed drop still alerts later.
+    """
+    payload, status = fetch_price_data(url)
+    verified_price = payload.get('price') if status == 200 else None
+    if verified_price is not None and verified_price <= target_price:
+        try:
+            send_price_target_reached_email(
+                to_email=user_email,
+                product_name=product_name,
+                product_url=url,
+                current_price=verified_price,
+                target_price=target_price,
+                currency_symbol=currency_symbol or '$'
+            )
+        except Exception as e:
+            print(f"Price alert email send failed for tracker {tracker_id}: {e}")
+        return
+
+    conn = get_db_connection()
+    if verified_price is not None:
+        cursor = conn.execute(f"""
+            UPDATE trackers SET current_price = ?, target_reached_notified = 0, updated_at = {SQL_NOW_MS}
+            WHERE id = ? AND user_id = ?
+        """, (verified_price, tracker_id, user_id))
+    else:
+        cursor = conn.execute(f"""
+            UPDATE trackers SET target_reached_notified = 0, updated_at = {SQL_NOW_MS}
+            WHERE id = ? AND user_id = ?
+        """, (tracker_id, user_id))
+    if cursor.rowcount:
+        bump_tracker_version(cursor, user_id)
+    conn.commit()
+    print(f"Price alert for tracker {tracker_id} held back: re-verification returned {verified_price} (status {status})")
+
+
+# ==================== NOTIFICATION OUTBOX ====================
+
+NOTIFICATION_MAX_ATTEMPTS = 5
+NOTIFICATION_CLAIM_TTL = 300
+NOTIFICATION_RETENTION_DAYS = 30
+# Web workers and scrape workers retry unsent notifications this often.
+NOTIFICATION_SEND_INTERVAL = int(os.environ.get('NOTIFICATION_SEND_INTERVAL_SECONDS', '120'))
+
+
+def enqueue_notification(conn, kind, payload):
+    """Queue a notification on conn's open transaction; it is sent by send_queued_notifications()."""
+    conn.execute(
+        "INSERT INTO notification_outbox (kind, payload, created_at) VALUES (?, ?, ?)",
+        (kind, json.dumps(payload), time.time())
+    )
+
+
+def send_queued_notifications(limit=100, owner=None):
+    """
+    Claim up to limit queued notifications and send them. Every call claims
+    under its own token, so concurrent callers in one process never send the
+    same row. Claims expire, so rows claimed by a process that died are
+    retried. Returns {'sent', 'failed'} counts, or None when nothing was queued.
+    """
+    claim = refresh_batch_owner(owner)
+    conn = get_db_connection()
+    now = time.time()
+    conn.execute("""
+        UPDATE notification_outbox SET claimed_by = ?, claimed_until = ?
+        WHERE id IN (
+            SELECT id FROM notification_outbox
+            WHERE sent_at IS NULL AND attempts < ? AND (claimed_until IS NULL OR claimed_until <= ?)
+            ORDER BY id LIMIT ?
+        )
+    """, (claim, now + NOTIFICATION_CLAIM_TTL, NOTIFICATION_MAX_ATTEMPTS, now, limit))
+    conn.commit()
+    rows = conn.execute(
+        "SELECT id, kind, payload FROM notification_outbox WHERE claimed_by = ? AND sent_at IS NULL ORDER BY id",
+        (claim,)
+    ).fetchall()
+    if not rows:
+        return None
+    counts = {'sent': 0, 'failed': 0}
+    for notification_id, kind, payload in rows:
+        error = None
+        try:
+            if not NOTIFICATION_SENDERS[kind](**json.loads(payload)):
+                error = 'not sent'
+        except Exception as e:
+            error = str(e)
+        if error is None:
+            conn.execute("""
+                UPDATE notification_outbox SET sent_at = ?, claimed_by = NULL, claimed_until = NULL WHERE id = ?
+            """, (time.time(), notification_id))
+            counts['sent'] += 1
+        else:
+            print(f"Notification {notification_id} ({kind}) failed: {error}")
+            conn.execute("""
+                UPDATE notification_outbox SET attempts = attempts + 1, last_error = ?, claimed_by = NULL, claimed_until = NULL
+                WHERE id = ?
+            """, (error, notification_id))
+            counts['failed'] += 1
+        conn.commit()
+    return counts
+
+
+NOTIFICATION_SENDERS = {
+    'price_target_reached': send_price_target_reached_email,
+}
+
+
+# ==================== REFRESH SCHEDULING ====================
+
+# Each canonical product has its own next_refresh_at. The interval starts at
+# REFRESH_BASE_INTERVAL and shrinks for volatile products, products close to a
+# watcher's target and products many trackers watch.
+REFRESH_SCHEDULER_ENABLED = os.environ.get('REFRESH_SCHEDULER_ENABLED', '1').lower() not in ('0', 'false', 'no')
+REFRESH_SCHEDULER_INTERVAL = int(os.environ.get('REFRESH_SCHEDULER_INTERVAL_SECONDS', '60'))
+REFRESH_BATCH_SIZE = int(os.environ.get('REFRESH_BATCH_SIZE', '10'))
+REFRESH_BASE_INTERVAL = float(os.environ.get('REFRESH_BASE_INTERVAL_SECONDS', str(6 * 3600)))
+REFRESH_MIN_INTERVAL = float(os.environ.get('REFRESH_MIN_INTERVAL_SECONDS', '900'))
+REFRESH_MAX_INTERVAL = float(os.environ.get('REFRESH_MAX_INTERVAL_SECONDS', str(24 * 3600)))
+REFRESH_VOLATILITY_WINDOW = 7 * 86400
+# A worker owns the products it claims until the lease expires; it heartbeats
+# while it works, so a crashed worker's products return to the queue after
+# REFRESH_LEASE_TTL.
+REFRESH_LEASE_TTL = float(os.environ.get('REFRESH_LEASE_TTL_SECONDS', '120'))
+REFRESH_LEASE_HEARTBEAT = REFRESH_LEASE_TTL / 4
+# Scheduled batches get their own thread so a slow batch cannot hold up OTP and alert emails on executor.
+refresh_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='price-refresh')
+
+
+def refresh_worker_id():
+    """Lease owner name for this process: host, pid and a per-process nonce."""
+    global _refresh_worker_id
+    if _refresh_worker_id is None or not _refresh_worker_id.startswith(f"{socket.gethostname()}:{os.getpid()}:"):
+        _refresh_worker_id = f"{socket.gethostname()}:{os.getpid()}:{secrets.token_hex(4)}"
+    return _refresh_worker_id
+
+
+_refresh_worker_id = None
+
+
+def refresh_batch_owner(worker=None):
+    """
+    Lease owner for one batch. Leases are read back by owner, so two batches
+    in the same process must never share one.
+    """
+    return f"{worker or refresh_worker_id()}:{secrets.token_hex(4)}"
+
+
+def is_refreshable_url(url):
+    return url.startswith('http://') or url.startswith('https://')
+
+
+def track_product(cursor, url):
+    """Return the product key for a tracker URL and make sure the product is on the refresh queue."""
+    product_key = coalesce_key(url)
+    if is_refreshable_url(product_key):
+        # The creating client has just fetched the price, so the first refresh can wait.
+        cursor.execute(
+            "INSERT OR IGNORE INTO product_refresh_schedule (product_key, next_refresh_at) VALUES (?, ?)",
+            (product_key, time.time() + REFRESH_MIN_INTERVAL)
+        )
+    return product_key
+
+
+def count_recent_price_changes(conn, product_key, since):
+    prices = [row[0] for row in conn.execute(
+        "SELECT price FROM price_observations WHERE product_key = ? AND observed_at >= ? ORDER BY observed_at",
+        (product_key, since)
+    )]
+    return sum(1 for prev, cur in zip(prices, prices[1:]) if abs(cur - prev) > max(0.01, prev * 0.005))
+
+
+def compute_refresh_interval(conn, product_key, now):
+    """Seconds until the next refresh, or None when no tracker watches the product any more."""
+    watchers, closest_gap = conn.execute("""
+        SELECT COUNT(*),
+               MIN(CASE WHEN target_price > 0 AND current_price > target_price
+                        THEN (current_price - target_price) / target_price END)
+        FROM trackers WHERE product_key = ?
+    """, (product_key,)).fetchone()
+    if not watchers:
+        return None
+
+    interval = REFRESH_BASE_INTERVAL
+    interval /= 1 + count_recent_price_changes(conn, product_key, now - REFRESH_VOLATILITY_WINDOW)
+    if closest_gap is not None:
+        if closest_gap <= 0.05:
+            interval *= 0.25
+        elif closest_gap <= 0.15:
+            interval *= 0.5
+        elif closest_gap > 0.5:
+            interval *= 2
+    interval /= math.sqrt(watchers)
+    return min(REFRESH_MAX_INTERVAL, max(REFRESH_MIN_INTERVAL, interval))
+
+
+def schedule_next_refresh(conn, product_key, owner, failed=False, commit=True):
+    """Set the product's next refresh time and release the caller's lease on it."""
+    now = time.time()
+    if failed:
+        failures = conn.execute(
+            "SELECT COALESCE(consecutive_failures, 0) + 1 FROM product_refresh_schedule WHERE product_key = ?",
+            (product_key,)
+        ).fetchone()
+        failures = failures[0] if failures else 1
+        interval = min(REFRESH_MAX_INTERVAL, REFRESH_MIN_INTERVAL * 2 ** min(failures, 10))
+        conn.execute("""
+            UPDATE product_refresh_schedule
+            SET next_refresh_at = ?, refresh_interval = ?, consecutive_failures = ?,
+                lease_owner = NULL, lease_expires_at = NULL
+            WHERE product_key = ? AND lease_owner = ?
+        """, (now + interval, interval, failures, product_key, owner))
+        if commit:
+            conn.commit()
+        return interval
+
+    interval = compute_refresh_interval(conn, product_key, now)
+    if interval is None:
+        conn.execute("DELETE FROM product_refresh_schedule WHERE product_key = ? AND lease_owner = ?", (product_key, owner))
+    else:
+        # Jitter keeps products added together from staying in lockstep.
+        interval *= random.uniform(0.9, 1.1)
+        conn.execute("""
+            UPDATE product_refresh_schedule
+            SET next_refresh_at = ?, last_refreshed_at = ?, refresh_interval = ?, consecutive_failures = 0,
+                lease_owner = NULL, lease_expires_at = NULL
+            WHERE product_key = ? AND lease_owner = ?
+        """, (now + interval, now, interval, product_key, owner))
+    if commit:
+        conn.commit()
+    return interval
+
+
+def apply_refreshed_price(conn, product_key, price, currency, commit=True):
+    """
+    Write a server-side refresh to every tracker of the product, using the same
+    target-crossing rules as a client update. Returns the alerts to send.
+    """
+    rows = conn.execute("""
+        SELECT t.id, t.user_id, t.current_price, t.target_price, COALESCE(t.target_reached_notified, 0),
+               t.currency, t.product_name, t.url, t.currency_symbol, u.email
+        FROM trackers t JOIN users u ON u.id = t.user_id
+        WHERE t.product_key = ?
+    """, (product_key,)).fetchall()
+    alerts = []
+    touched_users = set()
+    for tracker_id, user_id, current, target, notified, tracker_currency, name, url, symbol, email in rows:
+        # Never overwrite a tracker's price with one quoted in another currency.
+        tracker_code = normalize_currency_code(tracker_currency, symbol)
+        if tracker_code and currency and tracker_code != currency:
+            continue
+        was_below_or_equal = float(current) <= float(target)
+        is_below_or_equal = price <= float(target)
+        should_notify_now = (not was_below_or_equal) and is_below_or_equal and int(notified) == 0
+        next_notified = 1 if should_notify_now else (0 if not is_below_or_equal else int(notified))
+        if abs(float(current) - price) < 0.005 and next_notified == int(notified):
+            continue
+        conn.execute(f"""
+            UPDATE trackers SET current_price = ?, target_reached_notified = ?, updated_at = {SQL_NOW_MS}
+            WHERE id = ?
+        """, (price, next_notified, tracker_id))
+        touched_users.add(user_id)
+        if should_notify_now and email:
+            alerts.append({
+                'to_email': email, 'product_name': name, 'product_url': url,
+                'current_price': price, 'target_price': float(target), 'currency_symbol': symbol or '$'
+            })
+    for user_id in touched_users:
+        bump_tracker_version(conn, user_id)
+    if commit:
+        conn.commit()
+    return alerts
+
+
+def holds_refresh_lease(conn, product_key, owner):
+    return conn.execute(
+        "SELECT 1 FROM product_refresh_schedule WHERE product_key = ? AND lease_owner = ? AND lease_expires_at > ?",
+        (product_key, owner, time.time())
+    ).fetchone() is not None
+
+
+def fetch_refresh_result(product_key):
+    """
+    Fetch a product for a scheduled refresh, re-fetching first when a
+    low-confidence read would change the price. Returns (outcome, payload):
+    'ok' with the payload, 'failed', or 'held' when two reads disagree.
+    """
+    previous = latest_price_observation(product_key)
+    payload, status = fetch_price_data(product_key)
+    if status != 200:
+        return 'failed', None
+
+    changed = previous is None or abs(previous['price'] - payload['price']) >= 0.01
+    if changed and (payload.get('confidence') or 0) < PRICE_VERIFY_CONFIDENCE:
+        check, check_status = fetch_price_data(product_key)
+        if check_status != 200 or abs(check['price'] - payload['price']) >= 0.01:
+            return 'held', None
+    return 'ok', payload
+
+
+def hold_refresh(conn, product_key, owner, commit=True):
+    """Two reads disagreed: act on neither, release the lease and look again soon."""
+    conn.execute("""
+        UPDATE product_refresh_schedule SET next_refresh_at = ?, lease_owner = NULL, lease_expires_at = NULL
+        WHERE product_key = ? AND lease_owner = ?
+    """, (time.time() + REFRESH_MIN_INTERVAL, product_key, owner))
+    if commit:
+        conn.commit()
+
+
+def refresh_product(product_key, owner):
+    """
+    Fetch one leased product and apply its price. Returns 'refreshed', 'held',
+    'failed' or 'lost' (the lease expired mid-fetch and another worker owns
+    the product now).
+    """
+    outcome, payload = fetch_refresh_result(product_key)
+    counts = write_refresh_results(get_db_connection(), owner, [(product_key, outcome, payload)])
+    if counts['alerts']:
+        send_queued_notifications(owner=owner)
+    return next(key for key in counts if key != 'alerts')
+
+
+def claim_due_products(conn, limit, owner):
+    """
+    Lease up to limit due products, most overdue first. The single UPDATE is
+    atomic, so concurrent workers never claim the same product.
+    """
+    now = time.time()
+    conn.execute("""
+        UPDATE product_refresh_schedule SET lease_owner = ?, lease_expires_at = ?
+        WHERE product_key IN (
+            SELECT product_key FROM product_refresh_schedule
+            WHERE next_refresh_at <= ? AND (lease_expires_at IS NULL OR lease_expires_at <= ?)
+            ORDER BY next_refresh_at LIMIT ?
+        )
+    """, (owner, now + REFRESH_LEASE_TTL, now, now, limit))
+    conn.commit()
+    return [row[0] for row in conn.execute(
+        "SELECT product_key FROM product_refresh_schedule WHERE lease_owner = ? ORDER BY next_refresh_at",
+        (owner,)
+    )]
+
+
+class LeaseHeartbeat:
+    """Background thread that keeps extending a worker's leases until stopped."""
+
+    def __init__(self, owner):
+        self.owner = owner
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self._run, name='refresh-lease-heartbeat', daemon=True)
+
+    def _run(self):
+        while not self.stopped.wait(REFRESH_LEASE_HEARTBEAT):
+            try:
+                conn = get_db_connection()
+                conn.execute(
+                    "UPDATE product_refresh_schedule SET lease_expires_at = ? WHERE lease_owner = ?",
+                    (time.time() + REFRESH_LEASE_TTL, self.owner)
+                )
+                conn.commit()
+            except sqlite3.Error as e:
+                print(f"Lease heartbeat failed for {self.owner}: {e}")
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stopped.set()
+        self.thread.join()
+        return False
+
+
+def refresh_due_products(limit=REFRESH_BATCH_SIZE, owner=None):
+    """
+    Claim a batch of due products under a lease, refresh them and release
+    each one. owner names the worker; each batch leases under its own suffix.
+    """
+    owner = refresh_batch_owner(owner)
+    conn = get_db_connection()
+    claimed = claim_due_products(conn, limit, owner)
+    if not claimed:
+        return None
+    counts = {}
+    with LeaseHeartbeat(owner):
+        for product_key in claimed:
+            try:
+                outcome = refresh_product(product_key, owner)
+            except Exception as e:
+                print(f"Refresh failed for {product_key}: {e}")
+                schedule_next_refresh(conn, product_key, owner, failed=True)
+                outcome = 'failed'
+            counts[outcome] = counts.get(outcome, 0) + 1
+    return counts
+
+
+def release_refresh_leases(conn, owner, product_keys):
+    """Give claimed products back to the queue without changing when they are due."""
+    conn.executemany(
+        "UPDATE product_refresh_schedule SET lease_owner = NULL, lease_expires_at = NULL WHERE product_key = ? AND lease_owner = ?",
+        [(product_key, owner) for product_key in product_keys]
+    )
+    conn.commit()
+
+
+def write_refresh_results(conn, owner, results):
+    """
+    Apply a batch of fetched refreshes in one transaction: tracker prices,
+    next refresh times and queued alerts. Returns counts per outcome plus 'alerts'.
+    """
+    counts = {'alerts': 0}
+    try:
+        for product_key, outcome, payload in results:
+            if outcome == 'ok':
+                if holds_refresh_lease(conn, product_key, owner):
+                    alerts = apply_refreshed_price(
+                        conn, product_key, payload['price'], payload.get('currency'), commit=False
+                    )
+                    for alert in alerts:
+                        enqueue_notification(conn, 'price_target_reached', alert)
+                    counts['alerts'] += len(alerts)
+                    schedule_next_refresh(conn, product_key, owner, commit=False)
+                    outcome = 'refreshed'
+                else:
+                    outcome = 'lost'
+            elif outcome == 'held':
+                hold_refresh(conn, product_key, owner, commit=False)
+            else:
+                schedule_next_refresh(conn, product_key, owner, failed=True, commit=False)
+            counts[outcome] = counts.get(outcome, 0) + 1
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return counts
+
+
+def _percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * pct / 100))]
+
+
+def run_batch_refresh(limit, concurrency, per_domain, write_batch, time_budget=0.0, send=True):
+    """
+    Refresh due products once, for cron: claim them under leases, fetch them
+    concurrently with at most per_domain fetches per retailer host, write the
+    results write_batch products per transaction, then send queued alerts.
+    Returns a summary dict with counts and timings.
+    """
+    started = time.perf_counter()
+    owner = refresh_batch_owner()
+    conn = get_db_connection()
+    claimed = claim_due_products(conn, limit, owner)
+    claim_seconds = time.perf_counter() - started
+    deadline = time.time() + time_budget if time_budget > 0 else None
+
+    # Interleave hosts so the pool's threads are not all queued on one retailer's slots.
+    by_domain = OrderedDict()
+    for product_key in claimed:
+        by_domain.setdefault((urlparse(product_key).hostname or '').lower(), []).append(product_key)
+    domain_slots = {domain: threading.BoundedSemaphore(max(1, per_domain)) for domain in by_domain}
+    order = []
+    for round_index in range(max((len(keys) for keys in by_domain.values()), default=0)):
+        order.extend((keys[round_index], domain) for domain, keys in by_domain.items() if round_index < len(keys))
+
+    def fetch(product_key, domain):
+        if deadline and time.time() > deadline:
+            return product_key, domain, 'skipped', None, 0.0
+        with domain_slots[domain]:
+            if deadline and time.time() > deadline:
+                return product_key, domain, 'skipped', None, 0.0
+            fetch_started = time.perf_counter()
+            try:
+                outcome, payload = fetch_refresh_result(product_key)
+            except Exception as e:
+                print(f"Refresh failed for {product_key}: {e}")
+                outcome, payload = 'failed', None
+            return product_key, domain, outcome, payload, time.perf_counter() - fetch_started
+
+    counts = {}
+    domain_counts = {}
+    fetch_times = []
+    skipped = []
+    pending = []
+    write_seconds = 0.0
+    transactions = 0
+
+    def flush():
+        nonlocal write_seconds, transactions
+        if not pending:
+            return
+        write_started = time.perf_counter()
+        for key, value in write_refresh_results(conn, owner, pending).items():
+            counts[key] = counts.get(key, 0) + value
+        write_seconds += time.perf_counter() - write_started
+        transactions += 1
+        pending.clear()
+
+    fetch_started = time.perf_counter()
+    if order:
+        with LeaseHeartbeat(owner), ThreadPoolExecutor(
+            max_workers=max(1, concurrency), thread_name_prefix='refresh-due'
+        ) as pool:
+            futures = [pool.submit(fetch, product_key, domain) for product_key, domain in order]
+            for future in as_completed(futures):
+                product_key, domain, outcome, payload, elapsed = future.result()
+                if outcome == 'skipped':
+                    skipped.append(product_key)
+                    continue
+                fetch_times.append(elapsed)
+                domain_counts[domain] = domain_counts.get(domain, 0) + 1
+                pending.append((product_key, outcome, payload))
+                if len(pending) >= write_batch:
+                    flush()
+            flush()
+        if skipped:
+            release_refresh_leases(conn, owner, skipped)
+    fetch_seconds = time.perf_counter() - fetch_started
+
+    notify_started = time.perf_counter()
+    notifications = {'sent': 0, 'failed': 0}
+    while send:
+        sent = send_queued_notifications(owner=owner)
+        if not sent:
+            break
+        for key, value in sent.items():
+            notifications[key] += value
+        if not sent['sent']:
+            break
+    notify_seconds = time.perf_counter() - notify_started
+
+    fetch_times.sort()
+    alerts = counts.pop('alerts', 0)
+    if skipped:
+        counts['skipped'] = len(skipped)
+    return {
+        'owner': owner,
+        'claimed': len(claimed),
+        'outcomes': counts,
+        'domains': domain_counts,
+        'alerts_queued': alerts,
+        'notifications': notifications,
+        'transactions': transactions,
+        'timings': {
+            'claim_ms': round(claim_seconds * 1000, 1),
+            'fetch_s': round(fetch_seconds, 2),
+            'fetch_p50_s': round(_percentile(fetch_times, 50), 2),
+            'fetch_p95_s': round(_percentile(fetch_times, 95), 2),
+            'write_ms': round(write_seconds * 1000, 1),
+            'notify_s': round(notify_seconds, 2),
+            'total_s': round(time.perf_counter() - started, 2),
+        },
+    }
+
+
+# Loopback hosts /get-price may still fetch from; load tests point this at bench/fake_retailer.py.
+SCRAPE_ALLOWED_LOCAL_HOSTS = {
+    host.strip().lower() for host in os.environ.get('SCRAPE_ALLOWED_LOCAL_HOSTS', '').split(',') if host.strip()
+}
+
 
 @app.route('/get-price', methods=['POST'])
 def get_price():
@@ -1674,123 +4466,465 @@ def get_price():
     parsed = urlparse(url)
     if not parsed.netloc:
         return jsonify({"error": "Invalid URL"}), 400
-    if parsed.hostname in ['localhost', '127.0.0.1', '0.0.0.0']:
+    if parsed.hostname in ['localhost', '127.0.0.1', '0.0.0.0'] and parsed.hostname not in SCRAPE_ALLOWED_LOCAL_HOSTS:
         return jsonify({"error": "Local URLs are not allowed"}), 400
 
-    try:
-        site, currency, currency_symbol = get_site_info(url)
-        session_client = requests.Session()
-        if site == 'amazon':
-            session_client.cookies.set("i18n-prefs", "INR")
-            session_client.cookies.set("lc-main", "en_IN")
+    payload, status = fetch_price_single_flight(url)
+    return jsonify(payload), status
 
-        fetch_candidates = get_fetch_candidates(url, site)
-        response = None
-        soup = None
-        price = None
-        saw_captcha = False
 
-        # Try multiple candidates + slight header variations before failing.
-        header_variants = [
-            {},
-            {"User-Agent": "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36"},
+# ==================== CURRENCY CONVERSION ====================
+
+FX_RATES_FILE = os.environ.get('FX_RATES_FILE', os.path.join(APP_DIR, 'fx_rates.json'))
+FX_RATES_URL = os.environ.get('FX_RATES_URL', '')
+FX_RATE_PROVIDER = os.environ.get('FX_RATE_PROVIDER', 'url' if FX_RATES_URL else 'file')
+FX_RATES_TTL = int(os.environ.get('FX_RATES_TTL_SECONDS', str(6 * 3600)))
+DEFAULT_HOME_CURRENCY = os.environ.get('DEFAULT_HOME_CURRENCY', 'INR')
+TRACKER_SORT_KEYS = {'price', 'target', 'savings', 'date'}
+
+# Symbol -> code for trackers that only stored a symbol. "$" is ambiguous, so USD wins.
+CURRENCY_CODES_BY_SYMBOL = {symbol: code for code, symbol in reversed(list(CURRENCY_SYMBOLS.items()))}
+
+
+class FxRates:
+    """Rates quoted against one base currency. version changes whenever the table does."""
+
+    def __init__(self, base, rates, loaded_at):
+        self.base = base
+        self.rates = rates
+        self.loaded_at = loaded_at
+        self.version = hashlib.sha256(json.dumps(rates, sort_keys=True).encode('utf-8')).hexdigest()[:8]
+
+    def factors_to(self, target):
+        """Multiplier from every known currency into target, computed once per conversion batch."""
+        target_rate = self.rates[target]
+        return {code: target_rate / rate for code, rate in self.rates.items() if rate}
+
+    def convert_many(self, amounts, currencies, target):
+        """Convert parallel lists of amounts/codes into target; unknown codes become None."""
+        factors = self.factors_to(target)
+        return [
+            amount * factors[code] if amount is not None and code in factors else None
+            for amount, code in zip(amounts, currencies)
         ]
-        for candidate_url in fetch_candidates:
-            for variant in header_variants:
-                headers = get_request_headers(candidate_url, site)
-                headers.update(variant)
-                current_response = session_client.get(candidate_url, headers=headers, timeout=20, allow_redirects=True)
-                current_html = current_response.text or ''
-                if is_captcha_like_response(current_response.status_code, current_html):
-                    saw_captcha = True
-                    time.sleep(0.6)
-                    continue
-                if current_response.status_code != 200:
-                    continue
 
-                current_soup = BeautifulSoup(current_response.content, "html.parser")
-                current_price = scrape_price(current_soup, site, currency_symbol)
 
-                if current_price is None:
-                    json_ld_prices = extract_json_ld_prices(current_soup)
-                    if json_ld_prices:
-                        current_price = min(json_ld_prices)
+def _parse_fx_payload(payload):
+    base = str(payload.get('base', 'USD')).upper()
+    rates = {str(code).upper(): float(rate) for code, rate in (payload.get('rates') or {}).items()}
+    rates.setdefault(base, 1.0)
+    return base, rates
 
-                if current_price is None:
-                    candidates = extract_price_candidates(current_html)
-                    if candidates:
-                        current_price = min(candidates)
 
-                if current_price is not None:
-                    detected_currency, detected_symbol = detect_currency_from_content(
-                        current_soup,
-                        current_html,
-                        fallback=currency
-                    )
-                    currency = detected_currency
-                    currency_symbol = detected_symbol
-                    response = current_response
-                    soup = current_soup
-                    price = current_price
-                    break
-                else:
-                    # Keep the best non-captcha HTML response for name extraction/error diagnosis.
-                    response = current_response
-                    soup = current_soup
-            if price is not None:
-                break
+def load_fx_rates_from_file():
+    with open(FX_RATES_FILE, 'r') as f:
+        return _parse_fx_payload(json.load(f))
 
-        if response is None:
-            # No useful response received.
-            status = 429 if saw_captcha else 502
-            if saw_captcha:
-                normalized = normalize_product_url(url, site)
-                return jsonify({
-                    "error": "Website temporarily blocked automated access (captcha). Please retry in a minute with a direct product URL.",
-                    "suggestedUrl": normalized
-                }), status
-            return jsonify({"error": "Could not fetch product page. Please verify the URL and try again."}), status
-        
-        # Try to get product name from title
-        product_name = "Product"
-        if soup.title and soup.title.get_text():
-            title = soup.title.get_text().strip()
-            product_name = re.sub(r'\s*[-|]\s*(Amazon|Flipkart|Myntra|Ajio|Meesho|Snapdeal)\s*$', '', title, flags=re.IGNORECASE).strip()
-        og_title = soup.find("meta", attrs={"property": "og:title"})
-        if og_title and og_title.get("content"):
-            product_name = og_title.get("content").strip()
-        
-        if price is None:
-            html_text = response.text if response is not None else ""
-            if is_captcha_like_response(response.status_code if response is not None else 0, html_text):
-                normalized = normalize_product_url(url, site)
-                return jsonify({
-                    "error": "Website temporarily blocked automated access (captcha). Please retry in a minute with a direct product URL.",
-                    "suggestedUrl": normalized
-                }), 429
-            return jsonify({"error": "Could not find price on this page. Use a product page URL with visible price."}), 404
-        
-        return jsonify({
-            "price": price, "currency": currency, 
-            "currency_symbol": currency_symbol, "productName": product_name
+
+def load_fx_rates_from_url():
+    import requests
+
+    response = requests.get(FX_RATES_URL, timeout=10)
+    response.raise_for_status()
+    return _parse_fx_payload(response.json())
+
+
+# Pluggable rate sources; each returns (base, {code: rate}).
+FX_RATE_PROVIDERS = {
+    'file': load_fx_rates_from_file,
+    'url': load_fx_rates_from_url,
+}
+
+_fx_rates = None
+_fx_rates_lock = threading.Lock()
+
+
+def get_fx_rates():
+    """Current rate table, reloaded from the provider after FX_RATES_TTL; stale rates beat none."""
+    global _fx_rates
+    rates = _fx_rates
+    if rates is not None and time.time() - rates.loaded_at < FX_RATES_TTL:
+        return rates
+    with _fx_rates_lock:
+        if _fx_rates is not None and time.time() - _fx_rates.loaded_at < FX_RATES_TTL:
+            return _fx_rates
+        try:
+            base, table = FX_RATE_PROVIDERS[FX_RATE_PROVIDER]()
+            _fx_rates = FxRates(base, table, time.time())
+        except Exception as e:
+            print(f"FX rate load failed ({FX_RATE_PROVIDER}): {e}")
+            if _fx_rates is None:
+                _fx_rates = FxRates('USD', {'USD': 1.0}, time.time())
+            else:
+                # Retry after another TTL rather than on every request.
+                _fx_rates.loaded_at = time.time()
+        return _fx_rates
+
+
+def normalize_currency_code(currency, symbol=None):
+    """Map a stored currency code or symbol to an ISO code, or None if unknown."""
+    code = str(currency or '').strip().upper()
+    if len(code) == 3 and code.isalpha():
+        return code
+    if symbol:
+        return CURRENCY_CODES_BY_SYMBOL.get(str(symbol).strip())
+    return None
+
+
+def get_home_currency(user_id):
+    row = get_db_connection().execute("SELECT home_currency FROM users WHERE id = ?", (user_id,)).fetchone()
+    return (row[0] if row and row[0] else DEFAULT_HOME_CURRENCY)
+
+
+def normalize_trackers(rows, home_currency):
+    """
+    Serialize rows with prices converted into home_currency, plus list totals,
+    in a single pass over the rows.
+    """
+    fx = get_fx_rates()
+    codes = [normalize_currency_code(row[5], row[6]) for row in rows]
+    current = fx.convert_many([row[3] for row in rows], codes, home_currency)
+    target = fx.convert_many([row[4] for row in rows], codes, home_currency)
+
+    trackers = []
+    totals = {"trackerCount": len(rows), "currentValue": 0.0, "targetValue": 0.0,
+              "savings": 0.0, "belowTargetCount": 0, "unconvertedCount": 0}
+    for row, current_value, target_value in zip(rows, current, target):
+        tracker = serialize_tracker(row)
+        if current_value is None or target_value is None:
+            totals["unconvertedCount"] += 1
+            tracker["normalized"] = None
+        else:
+            savings = target_value - current_value if current_value <= target_value else 0.0
+            tracker["normalized"] = {
+                "currentPrice": round(current_value, 2),
+                "targetPrice": round(target_value, 2),
+                "savings": round(savings, 2)
+            }
+            totals["currentValue"] += current_value
+            totals["targetValue"] += target_value
+            totals["savings"] += savings
+            if current_value <= target_value:
+                totals["belowTargetCount"] += 1
+        trackers.append(tracker)
+    for key in ("currentValue", "targetValue", "savings"):
+        totals[key] = round(totals[key], 2)
+    return trackers, totals
+
+
+def sort_normalized_trackers(trackers, sort_key):
+    """Sort by a converted amount; trackers that could not be converted go last."""
+    if sort_key == 'date':
+        return trackers
+    field = {'price': 'currentPrice', 'target': 'targetPrice', 'savings': 'savings'}[sort_key]
+    descending = sort_key == 'savings'
+
+    def key(tracker):
+        normalized = tracker["normalized"]
+        if normalized is None:
+            return (1, 0)
+        return (0, -normalized[field] if descending else normalized[field])
+    return sorted(trackers, key=key)
+
+
+def normalized_trackers_response(user_id, currency, sort_key):
+    home_currency = get_home_currency(user_id) if currency == 'home' else normalize_currency_code(currency)
+    fx = get_fx_rates()
+    if not home_currency or home_currency not in fx.rates:
+        response = jsonify({"error": "Unsupported currency"})
+        response.status_code = 400
+        return response
+    sort_key = sort_key or 'date'
+    if sort_key not in TRACKER_SORT_KEYS:
+        response = jsonify({"error": f"sort must be one of {sorted(TRACKER_SORT_KEYS)}"})
+        response.status_code = 400
+        return response
+    rows = get_db_connection().execute(
+        f"SELECT {TRACKER_COLUMNS} FROM trackers WHERE user_id = ? ORDER BY created_at DESC, id DESC",
+        (user_id,)
+    ).fetchall()
+    trackers, totals = normalize_trackers(rows, home_currency)
+    return jsonify({
+        "homeCurrency": home_currency,
+        "homeCurrencySymbol": currency_symbol_for(home_currency),
+        "fxBase": fx.base,
+        "fxVersion": fx.version,
+        "totals": totals,
+        "trackers": sort_normalized_trackers(trackers, sort_key)
+    })
+
+
+# ==================== TRACKER STATISTICS ====================
+
+TRACKER_STATS_CACHE_SIZE = 2048
+
+# user_id -> (cache key, payload); the key changes with the tracker version,
+# home currency or FX table, so entries never need explicit invalidation.
+_tracker_stats_cache = OrderedDict()
+_tracker_stats_cache_lock = threading.Lock()
+
+
+def compute_tracker_stats(user_id, home_currency):
+    """Aggregate a user's trackers in SQLite per currency, then fold the groups into home_currency."""
+    groups = get_db_connection().execute("""
+        SELECT UPPER(COALESCE(currency, '')) AS code,
+               COALESCE(currency_symbol, '') AS symbol,
+               COUNT(*),
+               SUM(current_price),
+               SUM(target_price),
+               SUM(CASE WHEN current_price <= target_price THEN 1 ELSE 0 END),
+               SUM(CASE WHEN current_price <= target_price THEN target_price - current_price ELSE 0 END)
+        FROM trackers
+        WHERE user_id = ?
+        GROUP BY code, symbol
+    """, (user_id,)).fetchall()
+
+    fx = get_fx_rates()
+    factors = fx.factors_to(home_currency)
+    totals = {"trackerCount": 0, "belowTargetCount": 0, "currentValue": 0.0,
+              "savings": 0.0, "unconvertedCount": 0}
+    by_currency = {}
+    for code, symbol, count, current_sum, target_sum, below_count, savings_sum in groups:
+        totals["trackerCount"] += count
+        totals["belowTargetCount"] += below_count
+        resolved = normalize_currency_code(code, symbol) or code or symbol
+        bucket = by_currency.setdefault(resolved, {
+            "currency": resolved, "trackerCount": 0, "belowTargetCount": 0,
+            "currentValue": 0.0, "savings": 0.0
         })
-    except requests.exceptions.Timeout:
-        return jsonify({"error": "Request timed out. Please try again."}), 504
-    except requests.exceptions.ConnectionError:
-        return jsonify({"error": "Could not connect to the website. Please check the URL."}), 502
-    except Exception as e:
-        return jsonify({"error": f"Error: {str(e)}"}), 500
+        bucket["trackerCount"] += count
+        bucket["belowTargetCount"] += below_count
+        bucket["currentValue"] += current_sum or 0.0
+        bucket["savings"] += savings_sum or 0.0
+        factor = factors.get(resolved)
+        if factor is None:
+            totals["unconvertedCount"] += count
+            continue
+        totals["currentValue"] += (current_sum or 0.0) * factor
+        totals["savings"] += (savings_sum or 0.0) * factor
+
+    totals["aboveTargetCount"] = totals["trackerCount"] - totals["belowTargetCount"]
+    totals["averageSavings"] = (
+        round(totals["savings"] / totals["trackerCount"], 2) if totals["trackerCount"] else 0.0
+    )
+    for key in ("currentValue", "savings"):
+        totals[key] = round(totals[key], 2)
+    for bucket in by_currency.values():
+        bucket["currentValue"] = round(bucket["currentValue"], 2)
+        bucket["savings"] = round(bucket["savings"], 2)
+    return {
+        "homeCurrency": home_currency,
+        "homeCurrencySymbol": currency_symbol_for(home_currency),
+        "totals": totals,
+        "byCurrency": sorted(by_currency.values(), key=lambda b: -b["trackerCount"])
+    }
+
+
+@app.route('/api/trackers/stats', methods=['GET'])
+def tracker_stats():
+    """Dashboard widget aggregates, computed in SQL and cached per tracker-set version."""
+    if 'user_id' not in session:
+        return jsonify({"error": "Not logged in"}), 401
+    user_id = session['user_id']
+    currency = request.args.get('currency', 'home')
+    home_currency = get_home_currency(user_id) if currency == 'home' else normalize_currency_code(currency)
+    fx = get_fx_rates()
+    if not home_currency or home_currency not in fx.rates:
+        return jsonify({"error": "Unsupported currency"}), 400
+
+    version = get_tracker_version(user_id)
+    cache_key = (version, home_currency, fx.version)
+    etag = f"stats-{user_id}-{version}-{home_currency}-{fx.version}"
+    if etag_matches(etag):
+        response = app.response_class(status=304, mimetype='application/json')
+    else:
+        with _tracker_stats_cache_lock:
+            cached = _tracker_stats_cache.get(user_id)
+        if cached and cached[0] == cache_key:
+            payload = cached[1]
+        else:
+            payload = compute_tracker_stats(user_id, home_currency)
+            payload["version"] = version
+            with _tracker_stats_cache_lock:
+                _tracker_stats_cache[user_id] = (cache_key, payload)
+                _tracker_stats_cache.move_to_end(user_id)
+                while len(_tracker_stats_cache) > TRACKER_STATS_CACHE_SIZE:
+                    _tracker_stats_cache.popitem(last=False)
+        response = jsonify(payload)
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = TRACKER_LIST_CACHE_CONTROL
+    return response
+
 
 # ==================== STATIC FILES ====================
 
+STATIC_DIR = os.path.join(APP_DIR, 'static')
+STATIC_IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+COMPRESSIBLE_STATIC_EXTENSIONS = {'.js', '.css', '.svg', '.json', '.txt', '.xml', '.html', '.map'}
+
+
+class StaticAsset(CompressedVariants):
+    """A static file with its content hash; compressed variants come from warm_static_assets() or first use."""
+
+    def __init__(self, path, body, mtime):
+        self.path = path
+        self.body = body
+        self.mtime = mtime
+        self.digest = hashlib.sha256(body).hexdigest()[:16]
+        self.mimetype = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+        self.compressible = os.path.splitext(path)[1].lower() in COMPRESSIBLE_STATIC_EXTENSIONS
+
+
+# Runtime manifest: static path -> StaticAsset. Production processes hash each
+# file once; development re-checks mtimes so edits show up without a restart.
+_static_manifest = {}
+_static_manifest_lock = threading.Lock()
+
+
+def get_static_asset(filename):
+    path = safe_join(STATIC_DIR, filename)
+    if path is None:
+        return None
+    asset = _static_manifest.get(filename)
+    if asset is not None and IS_PRODUCTION:
+        return asset
+    try:
+        mtime = os.path.getmtime(path)
+        if asset is not None and asset.mtime == mtime:
+            return asset
+        if not os.path.isfile(path):
+            return None
+        with open(path, 'rb') as f:
+            asset = StaticAsset(path, f.read(), mtime)
+    except OSError:
+        return None
+    with _static_manifest_lock:
+        _static_manifest[filename] = asset
+    return asset
+
+
+def warm_static_assets():
+    """
+    Hash every static file and build its compressed variants now. gunicorn.conf.py
+    calls this in the --preload master, so forked and recycled workers inherit
+    them instead of the first visitor waiting on max-level brotli.
+    """
+    started = time.perf_counter()
+    encodings = ('br', 'gzip') if brotli is not None else ('gzip',)
+    count = 0
+    for root, _, files in os.walk(STATIC_DIR):
+        for name in files:
+            filename = os.path.relpath(os.path.join(root, name), STATIC_DIR).replace(os.sep, '/')
+            asset = get_static_asset(filename)
+            if asset is None or not asset.compressible:
+                continue
+            for encoding in encodings:
+                asset.variant(encoding)
+            count += 1
+    print(f"Precompressed {count} static assets in {time.perf_counter() - started:.1f}s")
+    return count
+
+
+def asset_url(filename):
+    """Versioned URL for a static file; safe to cache for a year because the version is its content hash."""
+    asset = get_static_asset(filename)
+    if asset is None:
+        return f"/static/{filename}"
+    return f"/static/{filename}?v={asset.digest}"
+
+
+app.jinja_env.globals['asset_url'] = asset_url
+
+
 @app.route('/static/<path:filename>')
 def serve_static(filename):
-    return send_from_directory('static', filename, max_age=0)
+    asset = get_static_asset(filename)
+    if asset is None:
+        return "Not Found", 404
 
+    encoding = negotiate_encoding() if asset.compressible else None
+    response = app.response_class(asset.variant(encoding), mimetype=asset.mimetype)
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    if asset.compressible:
+        response.vary.add('Accept-Encoding')
+    response.set_etag(f"{asset.digest}-{encoding}" if encoding else asset.digest)
+    response.last_modified = asset.mtime
+
+    if request.args.get('v') == asset.digest:
+        # Fingerprinted URL: the content behind it can never change.
+        response.headers['Cache-Control'] = STATIC_IMMUTABLE_CACHE_CONTROL
+    else:
+        response.headers['Cache-Control'] = 'no-cache'
+    return response.make_conditional(request)
 
-@app.route('/robots.txt')
-def robots_txt():
+
+CRAWLER_DOCUMENT_CACHE_CONTROL = 'public, max-age=3600'
+# Host is client-controlled, so only remember a handful of them.
+CRAWLER_DOCUMENT_CACHE_HOSTS = 16
+
+
+class CrawlerDocument(CompressedVariants):
+    """A generated robots.txt or sitemap.xml body with its validators."""
+
+    def __init__(self, body, mimetype, last_modified):
+        self.body = body
+        self.mimetype = mimetype
+        self.last_modified = last_modified
+        self.etag = hashlib.sha256(body).hexdigest()[:32]
+
+
+_crawler_documents = {}
+_crawler_documents_lock = threading.Lock()
+
+
+def get_crawler_document(kind, builder):
+    """Build the document for the current host once, then serve it from memory."""
     host = request.host_url.rstrip('/')
+    key = (kind, host)
+    document = _crawler_documents.get(key)
+    if document is None:
+        body, mimetype = builder(host)
+        document = CrawlerDocument(body.encode('utf-8'), mimetype, deploy_timestamp())
+        with _crawler_documents_lock:
+            if len(_crawler_documents) < CRAWLER_DOCUMENT_CACHE_HOSTS * 2:
+                _crawler_documents[key] = document
+    return document
+
+
+def deploy_timestamp():
+    """Last-Modified for generated documents: newest of app.py and the templates."""
+    base_dir = APP_DIR
+    paths = [os.path.join(base_dir, 'app.py')]
+    templates_dir = os.path.join(base_dir, 'templates')
+    if os.path.isdir(templates_dir):
+        paths.extend(os.path.join(templates_dir, name) for name in os.listdir(templates_dir))
+    mtimes = [os.path.getmtime(p) for p in paths if os.path.exists(p)]
+    return int(max(mtimes)) if mtimes else int(time.time())
+
+
+def serve_crawler_document(document):
+    """Serve a cached document, honouring If-None-Match and If-Modified-Since."""
+    encoding = negotiate_encoding() if len(document.body) >= COMPRESSION_MIN_SIZE else None
+    if request.if_none_match:
+        not_modified = etag_matches(document.etag)
+    else:
+        since = request.if_modified_since
+        not_modified = since is not None and since.timestamp() >= document.last_modified
+    if not_modified:
+        response = app.response_class(status=304, mimetype=document.mimetype)
+    else:
+        response = app.response_class(document.variant(encoding), mimetype=document.mimetype)
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+    response.set_etag(f"{document.etag}-{encoding}" if encoding else document.etag)
+    response.last_modified = document.last_modified
+    response.headers['Cache-Control'] = CRAWLER_DOCUMENT_CACHE_CONTROL
+    response.vary.add('Accept-Encoding')
+    return response
+
+
+def build_robots_txt(host):
     content = f"""User-agent: Mediapartners-Google
 Allow: /
 
@@ -1805,9 +4939,24 @@ Allow: /
 
 Sitemap: {host}/sitemap.xml
 """
-    response = make_response(content)
-    response.headers['Content-Type'] = 'text/plain; charset=utf-8'
-    return response
+    return content, 'text/plain'
+
+
+def build_sitemap_xml(host):
+    items = "\n".join([
+        f"<url><loc>{xml_escape(host + path)}</loc><lastmod>{lastmod}</lastmod><changefreq>{freq}</changefreq><priority>{priority}</priority></url>"
+        for path, lastmod, freq, priority in sitemap_entries()
+    ])
+    content = f"""<?xml version="1.0" encoding="UTF-8"?>
+<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
+{items}
+</urlset>"""
+    return content, 'application/xml'
+
+
+@app.route('/robots.txt')
+def robots_txt():
+    return serve_crawler_document(get_crawler_document('robots', build_robots_txt))
 
 
 @app.route('/ads.txt')
@@ -1817,32 +4966,7 @@ def ads_txt():
 
 @app.route('/sitemap.xml')
 def sitemap_xml():
-    host = request.host_url.rstrip('/')
-    entries = [
-        ("/", "2026-02-27", "daily", "1.0"),
-        ("/home", "2026-02-27", "weekly", "0.9"),
-        ("/about", "2026-02-27", "monthly", "0.6"),
-        ("/contact", "2026-02-27", "monthly", "0.6"),
-        ("/privacy", "2026-02-27", "yearly", "0.4"),
-        ("/terms", "2026-02-27", "yearly", "0.4"),
-        ("/blog", "2026-02-27", "weekly", "0.8"),
-        ("/amp/home", "2026-02-27", "weekly", "0.7"),
-        ("/blog/how-to-track-product-prices-online", "2026-02-27", "monthly", "0.7"),
-        ("/blog/best-price-alert-tools-india", "2026-02-27", "monthly", "0.7"),
-        ("/blog/save-money-price-trackers", "2026-02-27", "monthly", "0.7"),
-        ("/blog/amazon-price-history", "2026-02-27", "monthly", "0.7")
-    ]
-    items = "\n".join([
-        f"<url><loc>{host}{path}</loc><lastmod>{lastmod}</lastmod><changefreq>{freq}</changefreq><priority>{priority}</priority></url>"
-        for path, lastmod, freq, priority in entries
-    ])
-    content = f"""<?xml version="1.0" encoding="UTF-8"?>
-<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
-{items}
-</urlset>"""
-    response = make_response(content)
-    response.headers['Content-Type'] = 'application/xml; charset=utf-8'
-    return response
+    return serve_crawler_document(get_crawler_document('sitemap', build_sitemap_xml))
 
 # Catch-all route for SPA-style routing
 # This ensures that any route that doesn't match API or static serves the appropriate page
@@ -1872,7 +4996,7 @@ def catch_all(path):
     }
 
     if path in known_routes:
-        return render_template(known_routes[path])
+        return render_public_page(known_routes[path])
 
     # Unknown route should be a true 404 (avoid soft-404 duplicate content).
     return render_template('error.html', error="Page not found"), 404
@@ -1882,14 +5006,7 @@ def add_no_cache_headers(response):
     path = request.path or '/'
     is_html = bool(response.content_type and response.content_type.startswith('text/html'))
 
-    public_indexable_paths = {
-        '/', '/home', '/about', '/contact', '/privacy', '/terms', '/blog',
-        '/blog/how-to-track-product-prices-online',
-        '/blog/best-price-alert-tools-india',
-        '/blog/save-money-price-trackers',
-        '/blog/amazon-price-history',
-        '/amp', '/amp/home'
-    }
+    public_indexable_paths = public_page_paths()
     explicit_noindex_paths = {
         '/login', '/signup', '/forgot-password', '/reset-password', '/dashboard', '/error'
     }
@@ -1917,33 +5034,97 @@ def add_no_cache_headers(response):
             response.headers['Expires'] = '0'
     return response
 
+# ==================== CLI ====================
+
+@app.cli.command('scrape-worker')
+@click.option('--batch-size', default=REFRESH_BATCH_SIZE, show_default=True, help='Products leased per claim.')
+@click.option('--idle-sleep', default=5.0, show_default=True, help='Seconds to wait when nothing is due.')
+@click.option('--once', is_flag=True, help='Process one batch and exit.')
+def scrape_worker_command(batch_size, idle_sleep, once):
+    """Refresh due products under expiring leases; run one per process or machine sharing the database."""
+    init_db()
+    owner = refresh_worker_id()
+    click.echo(f"Scrape worker {owner} started")
+    try:
+        while True:
+            if PAGE_ARCHIVE_MODE:
+                run_periodically('evict_page_archive', PAGE_ARCHIVE_EVICT_INTERVAL, evict_page_archive)
+            run_periodically('send_queued_notifications', NOTIFICATION_SEND_INTERVAL, send_queued_notifications)
+            counts = refresh_due_products(batch_size, owner)
+            if counts:
+                click.echo(f"[{owner}] {counts}")
+            if once:
+                return
+            if over_memory_budget(force=True):
+                # Leases are released after every batch, so exiting here loses no work; the supervisor restarts us.
+                metrics.inc('worker_recycles_total', reason='rss')
+                click.echo(f"Scrape worker {owner} exceeded {WORKER_MAX_RSS_MB:.0f} MB RSS; exiting for restart")
+                return
+            if not counts:
+                time.sleep(idle_sleep)
+    except KeyboardInterrupt:
+        click.echo(f"Scrape worker {owner} stopped")
+
+
+@app.cli.command('refresh-due')
+@click.option('--limit', default=500, show_default=True, help='Most due products to refresh in this run.')
+@click.option('--concurrency', default=8, show_default=True, help='Concurrent fetches.')
+@click.option('--per-domain', default=2, show_default=True, help='Concurrent fetches per retailer host.')
+@click.option('--write-batch', default=50, show_default=True, help='Refreshed products written per transaction.')
+@click.option('--time-budget', default=0.0, help='Stop starting fetches after this many seconds (0: no limit).')
+@click.option('--no-send', is_flag=True, help='Queue alert emails without sending them.')
+@click.option('--json', 'as_json', is_flag=True, help='Print the summary as JSON.')
+def refresh_due_command(limit, concurrency, per_domain, write_batch, time_budget, no_send, as_json):
+    """Refresh every due product once and exit; for deployments driven by cron."""
+    ensure_schema()
+    summary = run_batch_refresh(limit, concurrency, per_domain, write_batch, time_budget, send=not no_send)
+    outcomes = summary['outcomes']
+    if as_json:
+        click.echo(json.dumps(summary, indent=2))
+    elif not summary['claimed']:
+        click.echo("No products due.")
+    else:
+        timings = summary['timings']
+        click.echo(f"Refreshed {outcomes.get('refreshed', 0)} of {summary['claimed']} due products "
+                   f"in {timings['total_s']}s ({summary['owner']})")
+        click.echo("  outcomes:  " + ', '.join(f"{key} {value}" for key, value in sorted(outcomes.items())))
+        click.echo(f"  alerts:    {summary['alerts_queued']} queued, {summary['notifications']['sent']} sent, "
+                   f"{summary['notifications']['failed']} failed")
+        click.echo(f"  timings:   claim {timings['claim_ms']} ms, fetch {timings['fetch_s']}s "
+                   f"(p50 {timings['fetch_p50_s']}s, p95 {timings['fetch_p95_s']}s), "
+                   f"write {timings['write_ms']} ms in {summary['transactions']} transactions, "
+                   f"notify {timings['notify_s']}s")
+        click.echo("  domains:   " + ', '.join(f"{domain} {count}" for domain, count in sorted(summary['domains'].items())))
+    if outcomes.get('failed') and not outcomes.get('refreshed'):
+        raise SystemExit(1)
+
+
 # ==================== MAIN ====================
 
 def initialize_app():
     """Lazy initialization function - only runs when needed"""
-    print("=" * 50)
-    print("🚀 AI Price Alert - Starting up...")
-    print("=" * 50)
     try:
-        init_db()
-        print("✅ Database initialized successfully")
+        if ensure_schema():
+            print("✅ Database initialized successfully")
     except Exception as e:
         print(f"⚠️  Database initialization warning: {e}")
-    print("✅ App ready to serve requests")
-    print("=" * 50)
+    print(f"✅ App ready to serve requests (pid {os.getpid()})")
     return True
 
 # Initialize lazily - only when first request comes in
 _app_initialized = False
+_app_init_lock = threading.Lock()
 
 @app.before_request
 def ensure_app_initialized():
     """Initialize app on first request to avoid startup delays"""
     global _app_initialized
     if not _app_initialized:
-        print("🔄 First request received - initializing app...")
-        initialize_app()
-        _app_initialized = True
+        # Threaded workers can receive several first requests at once.
+        with _app_init_lock:
+            if not _app_initialized:
+                initialize_app()
+                _app_initialized = True
 
 if __name__ == "__main__":
     # Direct run mode (for local development)
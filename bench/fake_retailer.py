@@ -0,0 +1,169 @@
+"""
+Local stand-in for retailer product pages, for load tests.
+
+Serves the saved pages from bench/fixtures under /<site>/<anything>, e.g.
+http://127.0.0.1:8900/flipkart/p/itm123. The site name in the path is what
+get_site_info() keys on, so the app runs the same selectors it would for the
+real retailer. Amazon is left out on purpose: the app rewrites Amazon URLs to
+amazon.in, which would send load-test traffic to the real site.
+
+    python bench/fake_retailer.py --port 8900 --latency-ms 300 --jitter-ms 150 \
+        --page-kb 400 --captcha-rate 0.02 --rate-limit-rate 0.03
+
+The app only fetches loopback URLs listed in SCRAPE_ALLOWED_LOCAL_HOSTS, so
+start it with SCRAPE_ALLOWED_LOCAL_HOSTS=127.0.0.1 when pointing it at this server.
+"""
+import argparse
+import json
+import os
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+SITE_FIXTURES = {
+    'flipkart': 'flipkart_30jeq3.html',
+    'myntra': 'myntra_pdp.html',
+    'ajio': 'ajio_prod_price.html',
+    'meesho': 'meesho_product.html',
+    'snapdeal': 'snapdeal_product.html',
+    'generic': 'generic_jsonld_usd.html',
+}
+
+CAPTCHA_PAGE = (
+    b"<html><head><title>Robot Check</title></head><body>"
+    b"<p>Enter the characters you see below. Sorry, we just need to make sure you're not a robot.</p>"
+    b"<form action='/errors/validateCaptcha'><input name='field-keywords'></form></body></html>"
+)
+
+FILLER_BLOCK = (
+    '<div class="review"><span class="rating">4 out of 5</span><p>Solid build quality, arrived on time, '
+    'fits as described and the colour matches the photos. Would buy again from this seller.</p></div>\n'
+)
+
+
+def padded_page(html, page_bytes):
+    """Grow a fixture to roughly page_bytes with review markup so parse cost scales with size."""
+    missing = page_bytes - len(html)
+    if missing <= 0:
+        return html
+    filler = (FILLER_BLOCK * (missing // len(FILLER_BLOCK) + 1)).encode('utf-8')[:missing]
+    marker = html.rfind(b'</body>')
+    if marker == -1:
+        return html + filler
+    return html[:marker] + filler + html[marker:]
+
+
+class RetailerStats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counts = {'pages': 0, 'captcha': 0, 'rate_limited': 0, 'not_found': 0}
+
+    def bump(self, key):
+        with self.lock:
+            self.counts[key] += 1
+
+    def snapshot(self):
+        with self.lock:
+            return dict(self.counts)
+
+
+def make_handler(config, pages, stats):
+    class FakeRetailerHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_message(self, format, *args):
+            if getattr(config, 'verbose', False):
+                super().log_message(format, *args)
+
+        def _send(self, status, body, content_type='text/html; charset=utf-8', extra_headers=None):
+            self.send_response(status)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(body)))
+            for key, value in (extra_headers or {}).items():
+                self.send_header(key, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path == '/__stats':
+                self._send(200, json.dumps(stats.snapshot()).encode('utf-8'), 'application/json')
+                return
+
+            delay = max(0.0, random.gauss(config.latency_ms, config.jitter_ms) / 1000.0) if config.jitter_ms else config.latency_ms / 1000.0
+            time.sleep(delay)
+
+            site = self.path.lstrip('/').split('/', 1)[0]
+            page = pages.get(site)
+            if page is None:
+                stats.bump('not_found')
+                self._send(404, b'<html><body>Not found</body></html>')
+                return
+
+            roll = random.random()
+            if roll < config.rate_limit_rate:
+                stats.bump('rate_limited')
+                self._send(429, b'<html><body>Too Many Requests</body></html>', extra_headers={'Retry-After': '30'})
+                return
+            if roll < config.rate_limit_rate + config.captcha_rate:
+                stats.bump('captcha')
+                self._send(200, CAPTCHA_PAGE)
+                return
+
+            stats.bump('pages')
+            self._send(200, page)
+
+    return FakeRetailerHandler
+
+
+def load_pages(page_kb):
+    pages = {}
+    for site, filename in SITE_FIXTURES.items():
+        with open(os.path.join(FIXTURES_DIR, filename), 'rb') as f:
+            pages[site] = padded_page(f.read(), page_kb * 1024)
+    return pages
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Fake retailer server for load tests.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8900)
+    add_retailer_arguments(parser)
+    parser.add_argument('--verbose', action='store_true', help="log every request")
+    return parser
+
+
+def add_retailer_arguments(parser):
+    parser.add_argument('--latency-ms', type=float, default=250.0, help="mean response delay (default 250)")
+    parser.add_argument('--jitter-ms', type=float, default=100.0, help="std deviation of the delay (default 100)")
+    parser.add_argument('--page-kb', type=int, default=300, help="pad pages to about this size (default 300)")
+    parser.add_argument('--captcha-rate', type=float, default=0.0, help="fraction of responses that are captcha pages")
+    parser.add_argument('--rate-limit-rate', type=float, default=0.0, help="fraction of responses that are 429s")
+
+
+def start_server(config, host='127.0.0.1', port=8900):
+    """Start the server on a daemon thread; returns (server, stats)."""
+    stats = RetailerStats()
+    server = ThreadingHTTPServer((host, port), make_handler(config, load_pages(config.page_kb), stats))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name='fake-retailer', daemon=True).start()
+    return server, stats
+
+
+def main():
+    config = build_parser().parse_args()
+    server, stats = start_server(config, config.host, config.port)
+    print(f"Fake retailer listening on http://{config.host}:{server.server_port}/<site>/... "
+          f"(sites: {', '.join(SITE_FIXTURES)})")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+        print(json.dumps(stats.snapshot()))
+
+
+if __name__ == '__main__':
+    main()
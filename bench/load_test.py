@@ -0,0 +1,357 @@
+"""
+Load test for sizing the gunicorn deployment.
+
+For every worker configuration it starts the app under gunicorn against a
+throwaway database, replays a weighted mix of landing-page, login,
+/api/trackers CRUD and /get-price traffic from concurrent virtual users, and
+reports throughput and p50/p95/p99 latency per operation. /get-price fetches
+go to bench/fake_retailer.py, started in-process, so no real retailer is hit.
+
+    python bench/load_test.py --configs 1x4,2x4,4x2 --duration 30 --concurrency 32
+    python bench/load_test.py --configs 2x8 --latency-ms 800 --captcha-rate 0.05 \
+        --mix landing=10,price=60,tracker_list=30
+
+Configurations are WORKERSxTHREADS (gthread worker class). The app runs with
+APP_ENV=production, as it does on Render; the client sends X-Forwarded-Proto
+so secure cookies behave as they do behind the TLS proxy. Use --target to
+drive an already-running server and skip gunicorn (the fake retailer must
+then be reachable from it and allowed via SCRAPE_ALLOWED_LOCAL_HOSTS).
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import requests
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+import fake_retailer  # noqa: E402
+
+LOADTEST_PASSWORD = 'load-test-password'
+DEFAULT_MIX = {
+    'landing': 25,
+    'login': 5,
+    'tracker_list': 30,
+    'tracker_create': 8,
+    'tracker_update': 8,
+    'tracker_delete': 4,
+    'price': 20,
+}
+RETAILER_SITES = [site for site in fake_retailer.SITE_FIXTURES]
+LANDING_PATHS = ['/', '/login', '/signup', '/about', '/static/style.css']
+
+
+class ProxiedSession(requests.Session):
+    """Sends Secure cookies back over plain http, as the TLS-terminating proxy in front of the app would."""
+
+    def __init__(self):
+        super().__init__()
+        self.headers['X-Forwarded-Proto'] = 'https'
+
+    def send(self, request, **kwargs):
+        response = super().send(request, **kwargs)
+        for cookie in self.cookies:
+            cookie.secure = False
+        return response
+
+
+def parse_mix(text):
+    if not text:
+        return dict(DEFAULT_MIX)
+    mix = {}
+    for part in text.split(','):
+        name, _, weight = part.partition('=')
+        name = name.strip()
+        if name not in DEFAULT_MIX:
+            raise SystemExit(f"Unknown operation in --mix: {name} (choose from {', '.join(DEFAULT_MIX)})")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def parse_configs(text):
+    configs = []
+    for part in text.split(','):
+        workers, _, threads = part.strip().lower().partition('x')
+        configs.append((int(workers), int(threads or 1)))
+    return configs
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def seed_database(database_path, users):
+    """Create the schema and the load-test accounts in a fresh database."""
+    script = (
+        "import sys, app\n"
+        "app.init_db()\n"
+        "conn = app.sqlite3.connect(app.DATABASE)\n"
+        "hashed = app.hash_password(sys.argv[2])\n"
+        "conn.executemany('INSERT OR IGNORE INTO users (username, email, password, email_verified) VALUES (?, ?, ?, 1)',\n"
+        "                 [(f'loadtest{i}', f'loadtest{i}@example.com', hashed) for i in range(int(sys.argv[1]))])\n"
+        "conn.commit()\n"
+    )
+    env = dict(os.environ, DATABASE_PATH=database_path)
+    subprocess.run([sys.executable, '-c', script, str(users), LOADTEST_PASSWORD],
+                   cwd=REPO_DIR, env=env, check=True, stdout=subprocess.DEVNULL)
+
+
+def start_gunicorn(workers, threads, port, env):
+    command = [
+        sys.executable, '-m', 'gunicorn', 'app:app',
+        '--bind', f'127.0.0.1:{port}',
+        '--workers', str(workers),
+        '--threads', str(threads),
+        '--worker-class', 'gthread',
+        '--timeout', '120',
+        '--log-level', 'warning',
+    ]
+    process = subprocess.Popen(command, cwd=REPO_DIR, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"gunicorn exited with code {process.returncode}")
+        try:
+            if requests.get(f'http://127.0.0.1:{port}/api/health', timeout=1).status_code == 200:
+                return process
+        except requests.RequestException:
+            pass
+        time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError("gunicorn did not become healthy within 30s")
+
+
+def stop_process(process):
+    process.terminate()
+    try:
+        process.wait(timeout=15)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+
+
+class Recorder:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.samples = {}
+        self.errors = {}
+
+    def record(self, op, seconds, ok):
+        with self.lock:
+            self.samples.setdefault(op, []).append(seconds)
+            if not ok:
+                self.errors[op] = self.errors.get(op, 0) + 1
+
+
+class VirtualUser:
+    """One browser: logged-in session, its own trackers, and the tracker list ETag it last saw."""
+
+    def __init__(self, base_url, index, retailer_url, products, recorder):
+        self.base_url = base_url
+        self.email = f'loadtest{index}@example.com'
+        self.retailer_url = retailer_url
+        self.products = products
+        self.recorder = recorder
+        self.tracker_ids = []
+        self.list_etag = None
+        self.client = ProxiedSession()
+
+    def timed(self, op, method, path, ok_statuses=(200,), client=None, **kwargs):
+        started = time.perf_counter()
+        try:
+            response = (client or self.client).request(method, self.base_url + path, timeout=60,
+                                                       allow_redirects=False, **kwargs)
+        except requests.RequestException:
+            self.recorder.record(op, time.perf_counter() - started, False)
+            return None
+        self.recorder.record(op, time.perf_counter() - started, response.status_code in ok_statuses)
+        return response
+
+    def login(self, client=None):
+        return self.timed('login', 'POST', '/login', client=client,
+                          json={'email': self.email, 'password': LOADTEST_PASSWORD, 'remember': True})
+
+    def product_url(self):
+        site = random.choice(RETAILER_SITES)
+        return f"{self.retailer_url}/{site}/p/item{random.randrange(self.products)}"
+
+    def run(self, op):
+        if op == 'landing':
+            # Signed-in users are redirected from /login and /signup to the dashboard.
+            self.timed(op, 'GET', random.choice(LANDING_PATHS), ok_statuses=(200, 302, 304))
+        elif op == 'login':
+            # A fresh browser signing in, so the password hash cost is part of the measurement.
+            self.login(client=ProxiedSession())
+        elif op == 'price':
+            # 404/429 are legitimate outcomes with captcha/rate-limit injection turned on.
+            self.timed(op, 'POST', '/get-price', ok_statuses=(200, 404, 429),
+                       json={'url': self.product_url()})
+        elif op == 'tracker_list':
+            headers = {'If-None-Match': self.list_etag} if self.list_etag else {}
+            response = self.timed(op, 'GET', '/api/trackers', ok_statuses=(200, 304), headers=headers)
+            if response is not None and response.status_code == 200:
+                self.list_etag = response.headers.get('ETag')
+        elif op == 'tracker_create' or not self.tracker_ids:
+            price = round(random.uniform(200, 5000), 2)
+            response = self.timed('tracker_create', 'POST', '/api/trackers', ok_statuses=(201,), json={
+                'url': self.product_url(), 'productName': 'Load test product',
+                'currentPrice': price, 'targetPrice': round(price * 0.9, 2),
+                'currency': 'INR', 'currencySymbol': '₹',
+            })
+            if response is not None and response.status_code == 201:
+                self.tracker_ids.append(response.json()['id'])
+        elif op == 'tracker_update':
+            self.timed(op, 'PUT', '/api/trackers', json={
+                'id': random.choice(self.tracker_ids), 'currentPrice': round(random.uniform(200, 5000), 2),
+            })
+        elif op == 'tracker_delete':
+            tracker_id = self.tracker_ids.pop(random.randrange(len(self.tracker_ids)))
+            self.timed(op, 'DELETE', '/api/trackers', json={'id': tracker_id})
+
+
+def drive(base_url, retailer_url, args, mix):
+    recorder = Recorder()
+    users = [VirtualUser(base_url, i % args.users, retailer_url, args.products, recorder)
+             for i in range(args.concurrency)]
+    for user in users:
+        user.login()
+    # Sign-in warm-up is not part of the measured window.
+    recorder.samples.clear()
+    recorder.errors.clear()
+
+    ops = list(mix)
+    weights = [mix[op] for op in ops]
+    deadline = time.time() + args.duration
+
+    def loop(user):
+        while time.time() < deadline:
+            user.run(random.choices(ops, weights)[0])
+            if args.think_ms:
+                time.sleep(random.expovariate(1000.0 / args.think_ms))
+
+    threads = [threading.Thread(target=loop, args=(user,)) for user in users]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return recorder, time.perf_counter() - started
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = max(0, min(len(sorted_values) - 1, int(round(pct / 100.0 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+
+def summarize(label, recorder, elapsed):
+    rows = {}
+    all_samples = []
+    for op, samples in sorted(recorder.samples.items()):
+        samples.sort()
+        all_samples.extend(samples)
+        rows[op] = {
+            'requests': len(samples),
+            'rps': round(len(samples) / elapsed, 1),
+            'errors': recorder.errors.get(op, 0),
+            'p50_ms': round(percentile(samples, 50) * 1000, 1),
+            'p95_ms': round(percentile(samples, 95) * 1000, 1),
+            'p99_ms': round(percentile(samples, 99) * 1000, 1),
+        }
+    all_samples.sort()
+    total = {
+        'requests': len(all_samples),
+        'rps': round(len(all_samples) / elapsed, 1) if elapsed else 0.0,
+        'errors': sum(recorder.errors.values()),
+        'p50_ms': round(percentile(all_samples, 50) * 1000, 1),
+        'p95_ms': round(percentile(all_samples, 95) * 1000, 1),
+        'p99_ms': round(percentile(all_samples, 99) * 1000, 1),
+    }
+    print(f"\n=== {label} ({elapsed:.1f}s) ===")
+    print(f"{'operation':<16}{'requests':>10}{'req/s':>9}{'errors':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for op, row in list(rows.items()) + [('TOTAL', total)]:
+        print(f"{op:<16}{row['requests']:>10}{row['rps']:>9}{row['errors']:>8}"
+              f"{row['p50_ms']:>10}{row['p95_ms']:>10}{row['p99_ms']:>10}")
+    return {'operations': rows, 'total': total}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the app across gunicorn worker configurations.")
+    parser.add_argument('--configs', default='1x4,2x4', help="comma-separated WORKERSxTHREADS (default 1x4,2x4)")
+    parser.add_argument('--target', help="base URL of a running server; skips starting gunicorn")
+    parser.add_argument('--duration', type=float, default=20.0, help="seconds of load per configuration (default 20)")
+    parser.add_argument('--concurrency', type=int, default=16, help="concurrent virtual users (default 16)")
+    parser.add_argument('--users', type=int, default=16, help="distinct accounts to seed (default 16)")
+    parser.add_argument('--products', type=int, default=200, help="distinct product URLs for /get-price (default 200)")
+    parser.add_argument('--think-ms', type=float, default=0.0, help="mean pause between a user's requests")
+    parser.add_argument('--mix', help="weights, e.g. landing=25,login=5,tracker_list=30,price=20")
+    parser.add_argument('--retailer-port', type=int, default=0, help="fake retailer port (default: any free port)")
+    parser.add_argument('--json', dest='json_path', help="also write the results to this file")
+    fake_retailer.add_retailer_arguments(parser)
+    args = parser.parse_args()
+    mix = parse_mix(args.mix)
+
+    retailer, retailer_stats = fake_retailer.start_server(args, port=args.retailer_port)
+    retailer_url = f"http://127.0.0.1:{retailer.server_port}"
+    print(f"Fake retailer on {retailer_url} (latency {args.latency_ms}±{args.jitter_ms} ms, "
+          f"{args.page_kb} KB pages, captcha {args.captcha_rate:.0%}, 429 {args.rate_limit_rate:.0%})")
+
+    results = {}
+    if args.target:
+        recorder, elapsed = drive(args.target.rstrip('/'), retailer_url, args, mix)
+        results[args.target] = summarize(args.target, recorder, elapsed)
+    else:
+        workdir = tempfile.mkdtemp(prefix='price-alerter-load-')
+        try:
+            for workers, threads in parse_configs(args.configs):
+                label = f"{workers} workers x {threads} threads"
+                database_path = os.path.join(workdir, f'load-{workers}x{threads}.db')
+                seed_database(database_path, args.users)
+                env = dict(
+                    os.environ,
+                    APP_ENV='production',
+                    DATABASE_PATH=database_path,
+                    METRICS_DIR=os.path.join(workdir, f'metrics-{workers}x{threads}'),
+                    SCRAPE_ALLOWED_LOCAL_HOSTS='127.0.0.1',
+                )
+                port = free_port()
+                process = start_gunicorn(workers, threads, port, env)
+                try:
+                    recorder, elapsed = drive(f'http://127.0.0.1:{port}', retailer_url, args, mix)
+                finally:
+                    stop_process(process)
+                results[label] = summarize(label, recorder, elapsed)
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    retailer.shutdown()
+    print(f"\nFake retailer served: {retailer_stats.snapshot()}")
+    if len(results) > 1:
+        print(f"\n{'configuration':<26}{'req/s':>9}{'errors':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+        for label, summary in results.items():
+            total = summary['total']
+            print(f"{label:<26}{total['rps']:>9}{total['errors']:>8}"
+                  f"{total['p50_ms']:>10}{total['p95_ms']:>10}{total['p99_ms']:>10}")
+    if args.json_path:
+        with open(args.json_path, 'w', encoding='utf-8') as f:
+            json.dump({'mix': mix, 'concurrency': args.concurrency, 'results': results}, f, indent=2)
+            f.write("\n")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
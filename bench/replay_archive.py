@@ -0,0 +1,133 @@
+"""
+Replay archived product pages through the current extractor.
+
+Reads pages captured with PAGE_ARCHIVE=failures or PAGE_ARCHIVE=all from the
+app's database and page archive directory, re-runs parse_product_page on each
+and compares the result with what was extracted when the page was fetched.
+Use it to check a parser fix against real traffic without re-fetching.
+
+    python bench/replay_archive.py                    # every archived page
+    python bench/replay_archive.py --failures         # only pages that had no price
+    python bench/replay_archive.py --site flipkart --limit 50
+    python bench/replay_archive.py --failures --export bench/fixtures/new
+
+DATABASE_PATH and PAGE_ARCHIVE_DIR select the archive, as for the app.
+Exits non-zero when a page that used to yield a price now yields none or a
+different price.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+
+os.environ.setdefault('METRICS_DIR', os.path.join(tempfile.gettempdir(), 'price-alerter-bench-metrics'))
+sys.path.insert(0, REPO_DIR)
+
+import app as price_app  # noqa: E402
+
+
+def load_entries(args):
+    where = []
+    params = []
+    if args.failures:
+        where.append("a.price IS NULL")
+    if args.site:
+        where.append("a.site = ?")
+        params.append(args.site)
+    if args.product:
+        where.append("a.product_key = ?")
+        params.append(args.product)
+    if args.since_days:
+        where.append("a.fetched_at >= ?")
+        params.append(time.time() - args.since_days * 86400)
+    sql = """
+        SELECT a.id, a.product_key, a.url, a.site, a.strategy, a.content_hash, b.codec, a.price, a.price_source, a.fetched_at
+        FROM page_archive a JOIN page_archive_blobs b ON b.content_hash = a.content_hash
+    """
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    sql += " ORDER BY a.fetched_at DESC LIMIT ?"
+    params.append(args.limit)
+    return price_app.get_db_connection().execute(sql, params).fetchall()
+
+
+def replay(entry):
+    _, _, url, site, _, content_hash, codec, _, _, _ = entry
+    content = price_app.load_archived_page(content_hash, codec)
+    _, currency, currency_symbol = price_app.get_site_info(url)
+    _, price, source, confidence, currency, _ = price_app.parse_product_page(
+        content, content.decode('utf-8', errors='replace'), site or 'unknown', currency, currency_symbol
+    )
+    return content, price, source, confidence, currency
+
+
+def classify(old_price, new_price):
+    if old_price is None:
+        return 'fixed' if new_price is not None else 'still missing'
+    if new_price is None:
+        return 'lost'
+    return 'same' if abs(old_price - new_price) < 0.01 else 'changed'
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-run price extraction over archived product pages.")
+    parser.add_argument('--failures', action='store_true', help="only pages where no price was found")
+    parser.add_argument('--site', help="only pages from this site (amazon, flipkart, ... or unknown)")
+    parser.add_argument('--product', help="only pages for this canonical product key")
+    parser.add_argument('--since-days', type=float, help="only pages fetched in the last N days")
+    parser.add_argument('--limit', type=int, default=1000, help="most recent pages to replay (default 1000)")
+    parser.add_argument('--export', help="write replayed pages to this directory as .html files")
+    parser.add_argument('--verbose', action='store_true', help="list unchanged pages too")
+    args = parser.parse_args()
+
+    entries = load_entries(args)
+    if not entries:
+        print("No archived pages matched.")
+        return 0
+    if args.export:
+        os.makedirs(args.export, exist_ok=True)
+
+    counts = {}
+    regressions = []
+    started = time.perf_counter()
+    for entry in entries:
+        entry_id, _, url, site, strategy, content_hash, _, old_price, old_source, _ = entry
+        try:
+            content, price, source, confidence, currency = replay(entry)
+        except (OSError, RuntimeError) as e:
+            counts['unreadable'] = counts.get('unreadable', 0) + 1
+            print(f"#{entry_id} {url}: could not read archived page ({e})")
+            continue
+        outcome = classify(old_price, price)
+        counts[outcome] = counts.get(outcome, 0) + 1
+        if outcome in ('lost', 'changed'):
+            regressions.append(entry_id)
+        if args.verbose or outcome != 'same':
+            old = 'None' if old_price is None else f"{old_price} ({old_source})"
+            new = 'None' if price is None else f"{price} {currency} ({source}, confidence {confidence})"
+            print(f"#{entry_id} [{outcome}] {site} {strategy} {url}\n    was {old}, now {new}")
+        if args.export:
+            name = f"{site or 'unknown'}_{content_hash[:12]}.html"
+            with open(os.path.join(args.export, name), 'wb') as f:
+                f.write(content)
+    elapsed = time.perf_counter() - started
+
+    print()
+    print(f"replayed:      {len(entries)} pages in {elapsed:.2f}s")
+    for outcome in ('same', 'fixed', 'still missing', 'changed', 'lost', 'unreadable'):
+        if counts.get(outcome):
+            print(f"{outcome + ':':<15}{counts[outcome]}")
+    if args.export:
+        print(f"exported to:   {args.export}")
+    if regressions:
+        print(f"\nREGRESSIONS: {len(regressions)} pages extract a different price or none at all")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,222 @@
+"""
+Offline scrape benchmark.
+
+Runs the extraction pipeline /get-price uses (parse_product_page: site and
+universal selectors, JSON-LD, regex candidates, currency detection) over the
+saved retailer pages in bench/fixtures and reports pages/sec, p50/p99 parse
+latency, peak memory and extraction accuracy. No network access is needed.
+
+    python bench/scrape_bench.py                  # compare against bench/scrape_baseline.json
+    python bench/scrape_bench.py --save-baseline  # record the current numbers as the baseline
+    python bench/scrape_bench.py --filter flipkart --iterations 50
+
+Exits non-zero when accuracy drops or latency regresses past --tolerance.
+Latency baselines are machine-specific; re-record them on the machine you compare on.
+"""
+import argparse
+import json
+import os
+import resource
+import sys
+import tempfile
+import time
+import tracemalloc
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+FIXTURES_DIR = os.path.join(BENCH_DIR, 'fixtures')
+DEFAULT_BASELINE = os.path.join(BENCH_DIR, 'scrape_baseline.json')
+
+# Keep the benchmark from writing metrics snapshots next to the real database.
+os.environ.setdefault('METRICS_DIR', os.path.join(tempfile.gettempdir(), 'price-alerter-bench-metrics'))
+sys.path.insert(0, REPO_DIR)
+
+import app as price_app  # noqa: E402
+
+
+def load_fixtures(name_filter=None):
+    with open(os.path.join(FIXTURES_DIR, 'manifest.json'), 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+    fixtures = []
+    for entry in manifest['fixtures']:
+        if name_filter and name_filter not in entry['file']:
+            continue
+        with open(os.path.join(FIXTURES_DIR, entry['file']), 'rb') as f:
+            content = f.read()
+        site, currency, currency_symbol = price_app.get_site_info(entry['url'])
+        fixtures.append({
+            **entry,
+            'content': content,
+            'html_text': content.decode('utf-8', errors='replace'),
+            'site': site,
+            'default_currency': currency,
+            'default_symbol': currency_symbol,
+        })
+    return fixtures
+
+
+def extract(fixture):
+    _, price, source, confidence, currency, _ = price_app.parse_product_page(
+        fixture['content'], fixture['html_text'], fixture['site'],
+        fixture['default_currency'], fixture['default_symbol']
+    )
+    return price, source, confidence, currency
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = max(0, min(len(sorted_values) - 1, int(round(pct / 100.0 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+
+def run_benchmark(fixtures, iterations):
+    # Warm-up pass: imports, regex compilation and selector caches.
+    for fixture in fixtures:
+        extract(fixture)
+
+    latencies = []
+    started = time.perf_counter()
+    for _ in range(iterations):
+        for fixture in fixtures:
+            t0 = time.perf_counter()
+            extract(fixture)
+            latencies.append(time.perf_counter() - t0)
+    elapsed = time.perf_counter() - started
+
+    # Memory is measured in a separate pass because tracemalloc skews timings.
+    results = {}
+    peak_bytes = 0
+    tracemalloc.start()
+    for fixture in fixtures:
+        tracemalloc.reset_peak()
+        price, source, confidence, currency = extract(fixture)
+        peak_bytes = max(peak_bytes, tracemalloc.get_traced_memory()[1])
+        correct = (
+            price is not None
+            and abs(price - fixture['price']) < 0.01
+            and currency == fixture['currency']
+        )
+        results[fixture['file']] = {
+            'site': fixture['site'],
+            'price': price,
+            'currency': currency,
+            'source': source,
+            'confidence': confidence,
+            'expected': [fixture['price'], fixture['currency']],
+            'correct': correct,
+        }
+    tracemalloc.stop()
+
+    latencies.sort()
+    correct_count = sum(1 for r in results.values() if r['correct'])
+    return {
+        'pages': len(latencies),
+        'pages_per_sec': round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        'p50_ms': round(percentile(latencies, 50) * 1000, 3),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 3),
+        'peak_page_memory_kb': round(peak_bytes / 1024, 1),
+        'max_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        'accuracy': round(correct_count / len(results), 4) if results else 0.0,
+        'results': results,
+    }
+
+
+def print_report(summary):
+    print(f"{'fixture':<34} {'site':<9} {'got':>14} {'expected':>14} {'conf':>5}  source")
+    for name, r in sorted(summary['results'].items()):
+        got = f"{r['price']} {r['currency']}" if r['price'] is not None else 'None'
+        expected = f"{r['expected'][0]} {r['expected'][1]}"
+        mark = '' if r['correct'] else '  <-- wrong'
+        confidence = '' if r.get('confidence') is None else r['confidence']
+        print(f"{name:<34} {r['site']:<9} {got:>14} {expected:>14} {confidence:>5}  {r['source']}{mark}")
+    print()
+    print(f"pages:        {summary['pages']}")
+    print(f"pages/sec:    {summary['pages_per_sec']}")
+    print(f"p50 latency:  {summary['p50_ms']} ms")
+    print(f"p99 latency:  {summary['p99_ms']} ms")
+    print(f"peak memory:  {summary['peak_page_memory_kb']} KB per page (max RSS {summary['max_rss_mb']} MB)")
+    print(f"accuracy:     {summary['accuracy'] * 100:.1f}%")
+    # Wrong answers the scorer still trusts are the ones that would send bad alerts.
+    trusted_wrong = [name for name, r in summary['results'].items()
+                     if not r['correct'] and (r.get('confidence') or 0) >= price_app.PRICE_VERIFY_CONFIDENCE]
+    if trusted_wrong:
+        print(f"trusted but wrong (confidence >= {price_app.PRICE_VERIFY_CONFIDENCE}): {', '.join(sorted(trusted_wrong))}")
+
+
+def compare_with_baseline(summary, baseline, tolerance):
+    """Print deltas against the baseline and return a list of regressions."""
+    regressions = []
+    print()
+    print("vs baseline:")
+    for key, higher_is_better in (('pages_per_sec', True), ('p50_ms', False), ('p99_ms', False),
+                                  ('peak_page_memory_kb', False), ('accuracy', True)):
+        old = baseline.get(key)
+        new = summary[key]
+        if not old:
+            continue
+        change = (new - old) / old
+        print(f"  {key:<20} {old:>10} -> {new:<10} ({change * 100:+.1f}%)")
+        worse = -change if higher_is_better else change
+        if key == 'accuracy':
+            if new < old:
+                regressions.append(f"accuracy dropped from {old} to {new}")
+        elif key != 'peak_page_memory_kb' and worse > tolerance:
+            regressions.append(f"{key} regressed {worse * 100:.1f}% (tolerance {tolerance * 100:.0f}%)")
+
+    for name, result in summary['results'].items():
+        previous = baseline.get('results', {}).get(name)
+        if previous and previous.get('correct') and not result['correct']:
+            regressions.append(f"{name} was extracted correctly in the baseline but now returns "
+                               f"{result['price']} {result['currency']}")
+        elif previous and previous.get('source') != result['source']:
+            print(f"  {name}: source changed {previous.get('source')} -> {result['source']}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark price extraction over saved retailer pages.")
+    parser.add_argument('--iterations', type=int, default=20, help="timed passes over the corpus (default 20)")
+    parser.add_argument('--filter', help="only run fixtures whose file name contains this text")
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help="baseline JSON to compare against")
+    parser.add_argument('--save-baseline', action='store_true', help="write the results as the new baseline")
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help="allowed latency/throughput regression as a fraction (default 0.25)")
+    args = parser.parse_args()
+
+    fixtures = load_fixtures(args.filter)
+    if not fixtures:
+        print("No fixtures matched.")
+        return 2
+
+    summary = run_benchmark(fixtures, args.iterations)
+    print_report(summary)
+
+    if args.save_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"\nBaseline written to {os.path.relpath(args.baseline, REPO_DIR)}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print("\nNo baseline found; run with --save-baseline to record one.")
+        return 0
+    if args.filter:
+        print("\nSkipping baseline comparison for a filtered run.")
+        return 0
+
+    with open(args.baseline, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    regressions = compare_with_baseline(summary, baseline, args.tolerance)
+    if regressions:
+        print("\nREGRESSIONS:")
+        for line in regressions:
+            print(f"  - {line}")
+        return 1
+    print("\nNo regressions against baseline.")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
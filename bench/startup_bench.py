@@ -0,0 +1,125 @@
+"""
+Cold-start benchmark.
+
+Starts fresh Python processes and measures how long the app takes to import
+and to answer its first request, the way a restarted or newly autoscaled
+Render instance would. Each run reports:
+
+  import        time to `import app`
+  first page    time from process start until GET / returns
+  first api     time from process start until the JSON route in --api-path
+                (default /api/health) returns
+
+and which heavy modules (bs4, requests, smtplib) were loaded by then.
+
+    python bench/startup_bench.py                 # 10 runs against an initialized scratch database
+    python bench/startup_bench.py --fresh-db      # every run starts from an empty database
+    python bench/startup_bench.py --runs 20 --json
+
+Numbers include interpreter startup, so compare them on the same machine.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+
+HEAVY_MODULES = ('bs4', 'requests', 'smtplib')
+
+# Runs inside the measured process; prints one JSON line.
+PROBE = r"""
+import json, sys, time
+started = time.perf_counter()
+sys.path.insert(0, {repo_dir!r})
+import app
+imported = time.perf_counter()
+client = app.app.test_client()
+page = client.get('/')
+first_page = time.perf_counter()
+api = client.get({api_path!r})
+first_api = time.perf_counter()
+print(json.dumps({{
+    'import_ms': (imported - started) * 1000,
+    'first_page_ms': (first_page - started) * 1000,
+    'first_api_ms': (first_api - started) * 1000,
+    'page_status': page.status_code,
+    'api_status': api.status_code,
+    'loaded': [name for name in {heavy!r} if name in sys.modules],
+}}))
+"""
+
+
+def run_once(database_path, api_path):
+    env = dict(
+        os.environ,
+        DATABASE_PATH=database_path,
+        METRICS_DIR=os.path.join(os.path.dirname(database_path), 'metrics'),
+        REFRESH_SCHEDULER_ENABLED='0',
+    )
+    code = PROBE.format(repo_dir=REPO_DIR, api_path=api_path, heavy=HEAVY_MODULES)
+    completed = subprocess.run([sys.executable, '-c', code], env=env, capture_output=True, text=True, cwd=REPO_DIR)
+    if completed.returncode != 0:
+        raise RuntimeError(completed.stderr.strip() or completed.stdout.strip())
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def summarize(values):
+    values = sorted(values)
+    return {
+        'median': round(statistics.median(values), 1),
+        'min': round(values[0], 1),
+        'max': round(values[-1], 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure app import time and time to first response.")
+    parser.add_argument('--runs', type=int, default=10, help="fresh processes to start (default 10)")
+    parser.add_argument('--fresh-db', action='store_true', help="start every run from an empty database")
+    parser.add_argument('--api-path', default='/api/health', help="JSON route for the first API request")
+    parser.add_argument('--json', action='store_true', help="print the summary as JSON")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix='price-alerter-startup-') as scratch:
+        database_path = os.path.join(scratch, 'database.db')
+        # One untimed run so .pyc files exist and, unless --fresh-db, the schema is in place.
+        run_once(database_path, args.api_path)
+        results = []
+        for _ in range(args.runs):
+            if args.fresh_db:
+                for suffix in ('', '-wal', '-shm'):
+                    if os.path.exists(database_path + suffix):
+                        os.remove(database_path + suffix)
+            results.append(run_once(database_path, args.api_path))
+
+    summary = {
+        'runs': len(results),
+        'fresh_db': args.fresh_db,
+        'import_ms': summarize([r['import_ms'] for r in results]),
+        'first_page_ms': summarize([r['first_page_ms'] for r in results]),
+        'first_api_ms': summarize([r['first_api_ms'] for r in results]),
+        'statuses': sorted({(r['page_status'], r['api_status']) for r in results}),
+        'heavy_modules_loaded': sorted({name for r in results for name in r['loaded']}),
+    }
+    if args.json:
+        print(json.dumps(summary, indent=2))
+        return 0
+
+    print(f"{'':<12} {'median':>8} {'min':>8} {'max':>8}   ({summary['runs']} runs"
+          f"{', fresh database' if args.fresh_db else ''})")
+    for key, label in (('import_ms', 'import'), ('first_page_ms', 'first page'), ('first_api_ms', 'first api')):
+        s = summary[key]
+        print(f"{label:<12} {s['median']:>6} ms {s['min']:>5} ms {s['max']:>5} ms")
+    print(f"statuses (page, api): {summary['statuses']}")
+    loaded = ', '.join(summary['heavy_modules_loaded']) or 'none'
+    print(f"heavy modules loaded before the first scrape: {loaded}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,9 @@
+# Loaded by gunicorn from the working directory (the Procfile passes it explicitly).
+
+
+def when_ready(server):
+    # Runs in the master after --preload imported the app and before any worker
+    # is forked, so every worker starts with the static variants already built.
+    if server.cfg.preload_app:
+        import app
+        app.warm_static_assets()
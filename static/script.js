@@ -7,6 +7,12 @@ let isTrackerActionInProgress = false;
 let appInitialized = false;
 let dashboardUser = { username: 'User' };
 let recentActivity = [];
+// The tracker list is loaded a page at a time; auto-refresh applies deltas from the sync token.
+const TRACKER_PAGE_SIZE = 50;
+let trackersNextCursor = null;
+let trackersSyncToken = null;
+let isLoadingMoreTrackers = false;
+let trackerTotals = null;
 
 // Safe API_BASE_URL - fallback to empty string if window.location is not available
 const getApiBaseUrl = () => {
@@ -69,7 +75,7 @@ const celebrationColors = [
     '#54a0ff', '#5f27cd', '#00d2d3', '#ff9f0a'
 ];
 
-const COMPANY_LOGOS = {
+const COMPANY_LOGOS = window.COMPANY_LOGO_URLS || {
     amazon: '/static/logos/amazon.svg?v=20260228',
     flipkart: '/static/logos/flipkart.svg?v=20260228',
     myntra: '/static/logos/myntra.svg?v=20260228',
@@ -83,6 +89,7 @@ const COMPANY_LOGOS = {
 function initDashboardApp() {
     if (appInitialized) return;
     appInitialized = true;
+    loadTrackerStats();
     loadTrackers();
     setupNavigation();
     loadUserData();
@@ -577,9 +584,10 @@ async function createTracker(url, targetPrice, currentPrice, productName, curren
 
 // ==================== TRACKERS DISPLAY ====================
 
+// Loads the first page only; the stat widgets come from loadTrackerStats().
 async function loadTrackers() {
     try {
-        const { response, data } = await fetchJsonWithTimeout(API_BASE_URL + '/api/trackers', {
+        const { response, data } = await fetchJsonWithTimeout(API_BASE_URL + '/api/trackers?limit=' + TRACKER_PAGE_SIZE, {
             method: 'GET'
         });
         if (!response.ok) {
@@ -589,16 +597,97 @@ async function loadTrackers() {
             }
             throw new Error(data.error || 'Failed to load trackers');
         }
-        trackers = Array.isArray(data) ? data : [];
+        trackers = Array.isArray(data.trackers) ? data.trackers : [];
+        trackersNextCursor = data.nextCursor || null;
+        trackersSyncToken = data.syncToken || null;
     } catch (error) {
         trackers = [];
+        trackersNextCursor = null;
+        trackersSyncToken = null;
         showToast('error', 'Could not load your trackers');
     } finally {
         renderTrackers();
-        updateStats();
     }
 }
 
+async function loadMoreTrackers() {
+    if (!trackersNextCursor || isLoadingMoreTrackers) return false;
+    isLoadingMoreTrackers = true;
+    try {
+        const { response, data } = await fetchJsonWithTimeout(
+            API_BASE_URL + '/api/trackers?limit=' + TRACKER_PAGE_SIZE + '&cursor=' + encodeURIComponent(trackersNextCursor),
+            { method: 'GET' }
+        );
+        if (!response.ok) {
+            throw new Error(data.error || 'Failed to load trackers');
+        }
+        // Trackers created since the first page may already be in the list.
+        const loadedIds = new Set(trackers.map(t => t.id));
+        trackers = trackers.concat((data.trackers || []).filter(t => !loadedIds.has(t.id)));
+        trackersNextCursor = data.nextCursor || null;
+        renderTrackers();
+        return true;
+    } catch (error) {
+        showToast('error', 'Could not load more trackers');
+        return false;
+    } finally {
+        isLoadingMoreTrackers = false;
+    }
+}
+
+// Export and clear-all act on every tracker, so they fetch the remaining pages first.
+async function loadAllTrackers() {
+    while (trackersNextCursor) {
+        if (!(await loadMoreTrackers())) return false;
+    }
+    return true;
+}
+
+// Apply changes made since trackersSyncToken to the loaded trackers. Returns true when anything changed.
+async function syncTrackerChanges() {
+    if (!trackersSyncToken) {
+        await loadTrackers();
+        return true;
+    }
+    let changed = false;
+    let hasMore = true;
+    while (hasMore) {
+        const { response, data } = await fetchJsonWithTimeout(
+            API_BASE_URL + '/api/trackers?limit=' + TRACKER_PAGE_SIZE + '&since=' + encodeURIComponent(trackersSyncToken),
+            { method: 'GET' }
+        );
+        if (!response.ok) {
+            if (response.status === 401) {
+                window.location.href = '/login';
+            }
+            return changed;
+        }
+        if (data.fullResync) {
+            await loadTrackers();
+            return true;
+        }
+        const deletedIds = new Set(data.deleted || []);
+        const countBefore = trackers.length;
+        trackers = trackers.filter(t => !deletedIds.has(t.id));
+        changed = changed || trackers.length !== countBefore;
+        const oldestLoaded = trackers.length > 0 ? trackers[trackers.length - 1].createdAt : null;
+        (data.trackers || []).forEach((update) => {
+            const index = trackers.findIndex(t => t.id === update.id);
+            if (index >= 0) {
+                trackers[index] = update;
+                changed = true;
+            } else if (!trackersNextCursor || !oldestLoaded || update.createdAt >= oldestLoaded) {
+                // Older trackers arrive with their page when "Load more" reaches them.
+                trackers.unshift(update);
+                changed = true;
+            }
+        });
+        trackersSyncToken = data.syncToken || trackersSyncToken;
+        hasMore = Boolean(data.hasMore);
+    }
+    return changed;
+}
+
 function escapeHtml(value) {
     return String(value || '')
         .replace(/&/g, '&amp;')
@@ -643,7 +732,7 @@ function attachTrackerCardClickHandlers() {
 
 function renderTrackers() {
     const container = document.getElementById('trackers-list');
-    if (trackers.length === 0) {
+    if (trackers.length === 0 && !trackersNextCursor) {
         container.innerHTML = '<div class="empty-state"><div class="empty-icon"><i class="fa fa-rocket"></i></div><h3>No trackers yet!</h3><p>Create your first price alert to start saving money</p><button class="action-btn" onclick="switchView(\'new-alert\')"><span class="btn-text">Create Tracker</span><span class="btn-icon"><i class="fa fa-plus"></i></span></button></div>';
         return;
     }
@@ -673,6 +762,10 @@ function renderTrackers() {
         return '<i class="fa fa-shopping-bag"></i>';
     }
     
+    const loadMoreButton = trackersNextCursor
+        ? '<div class="load-more-trackers"><button class="action-btn" onclick="loadMoreTrackers()"><span class="btn-text">Load more</span><span class="btn-icon"><i class="fa fa-chevron-down"></i></span></button></div>'
+        : '';
+
     container.innerHTML = filteredTrackers.map(tracker => {
         const status = tracker.currentPrice <= tracker.targetPrice ? 'reached' : 'active';
         const statusClass = status === 'reached' ? 'status-reached' : 'status-active';
@@ -683,7 +776,7 @@ function renderTrackers() {
         const safeUrlText = escapeHtml(trackerUrl);
         
         return '<div class="tracker-card tilt-3d" data-id="' + tracker.id + '" data-url="' + safeUrlAttr + '" tabindex="0" role="button" aria-label="Open tracker link"><div class="tracker-header"><div class="tracker-info"><div class="tracker-logo">' + getCompanyLogo(tracker.url) + '</div><h4 class="tracker-name">' + safeName + '</h4></div><div class="tracker-checkbox" onclick="event.stopPropagation(); toggleSelect(' + tracker.id + ')"><i class="fa fa-check" style="display: none;"></i></div></div><button type="button" class="tracker-url tracker-url-link" onclick="event.stopPropagation(); openTrackerUrlFromElement(this)">' + safeUrlText + '</button><div class="tracker-prices"><div class="price-info current"><span class="price-label">Current</span><span class="price-amount">' + (tracker.currencySymbol || '$') + tracker.currentPrice + '</span></div><div class="price-info target"><span class="price-label">Target</span><span class="price-amount">' + (tracker.currencySymbol || '$') + tracker.targetPrice + '</span></div><div class="price-status ' + statusClass + '">' + statusText + '</div></div><div class="tracker-actions"><button class="tracker-action" onclick="viewTrends(' + tracker.id + ')"><i class="fa fa-chart-line"></i> Trends</button><button class="tracker-action" onclick="refreshPrice(' + tracker.id + ')"><i class="fa fa-refresh"></i> Refresh</button><button class="tracker-action delete" onclick="deleteTracker(' + tracker.id + ')"><i class="fa fa-trash"></i></button></div>';
-    }).join('');
+    }).join('') + loadMoreButton;
     
     attachTrackerCardClickHandlers();
     initTracker3D();
@@ -692,26 +785,38 @@ function renderTrackers() {
     renderActivityFeed();
 }
 
+// Only some pages of trackers may be loaded, so the widgets always use the server aggregates.
 function updateStats() {
-    document.getElementById('sidebar-active-trackers').textContent = trackers.length;
-    document.getElementById('sidebar-deals').textContent = trackers.filter(t => t.currentPrice <= t.targetPrice).length;
-    document.getElementById('total-trackers').textContent = trackers.length;
-    document.getElementById('active-deals').textContent = trackers.filter(t => t.currentPrice <= t.targetPrice).length;
-    
-    if (trackers.length > 0) {
-        const totalSavings = trackers
-            .filter(t => t.currentPrice <= t.targetPrice)
-            .reduce((sum, t) => sum + (t.targetPrice - t.currentPrice), 0);
-        const avgSavings = trackers.length > 0 ? Math.round((totalSavings / trackers.length) * 10) / 10 : 0;
-        document.getElementById('avg-savings').textContent = avgSavings + '%';
-    }
+    loadTrackerStats();
     refreshAIInsights();
 }
 
+async function loadTrackerStats() {
+    try {
+        const { response, data } = await fetchJsonWithTimeout(API_BASE_URL + '/api/trackers/stats', {
+            method: 'GET'
+        });
+        if (!response.ok || !data || !data.totals) return;
+        const totals = data.totals;
+        trackerTotals = totals;
+        document.getElementById('sidebar-active-trackers').textContent = totals.trackerCount;
+        document.getElementById('sidebar-deals').textContent = totals.belowTargetCount;
+        document.getElementById('total-trackers').textContent = totals.trackerCount;
+        document.getElementById('active-deals').textContent = totals.belowTargetCount;
+        if (totals.trackerCount > 0) {
+            document.getElementById('avg-savings').textContent = (Math.round(totals.averageSavings * 10) / 10) + '%';
+        }
+        updateCounts();
+    } catch (error) {
+        // The widgets keep their previous values until the next update.
+    }
+}
+
 function updateCounts() {
-    document.getElementById('count-all').textContent = trackers.length;
-    document.getElementById('count-active').textContent = trackers.filter(t => t.currentPrice > t.targetPrice).length;
-    document.getElementById('count-reached').textContent = trackers.filter(t => t.currentPrice <= t.targetPrice).length;
+    if (!trackerTotals) return;
+    document.getElementById('count-all').textContent = trackerTotals.trackerCount;
+    document.getElementById('count-active').textContent = trackerTotals.aboveTargetCount;
+    document.getElementById('count-reached').textContent = trackerTotals.belowTargetCount;
 }
 
 function setFilter(filter) {
@@ -1034,7 +1139,8 @@ function loadSettings() {
 
 // ==================== DATA IMPORT/EXPORT ====================
 
-function exportData() {
+async function exportData() {
+    if (!(await loadAllTrackers())) return;
     const data = JSON.stringify(trackers, null, 2);
     const blob = new Blob([data], { type: 'application/json' });
     const url = URL.createObjectURL(blob);
@@ -1067,6 +1173,7 @@ function importData(input) {
                     })
                 }))).then(() => {
                     loadTrackers();
+                    updateStats();
                     showToast('success', 'Data imported successfully');
                 }).catch(() => {
                     showToast('error', 'Import failed');
@@ -1081,6 +1188,7 @@ function importData(input) {
 
 async function clearAllData() {
     if (!confirm('Are you sure you want to delete all trackers? This cannot be undone.')) return;
+    if (!(await loadAllTrackers())) return;
     await Promise.all(trackers.map((tracker) => fetchJsonWithTimeout(API_BASE_URL + '/api/trackers', {
         method: 'DELETE',
         headers: { 'Content-Type': 'application/json' },
@@ -1227,38 +1335,26 @@ async function autoRefreshAllPrices() {
     console.log('Auto-refreshing all prices...');
     lastRefreshTime = new Date();
     
+    // The server refreshes each product on its own schedule, so auto-refresh only
+    // asks for trackers changed since the last sync token instead of scraping.
+    const previousPrices = new Map(trackers.map(t => [t.id, t.currentPrice]));
     let updatedCount = 0;
     try {
+        if (await syncTrackerChanges()) {
+            renderTrackers();
+            updateStats();
+        }
         for (const tracker of trackers) {
-            try {
-                const response = await fetch(API_BASE_URL + '/get-price', {
-                    method: 'POST',
-                    headers: { 'Content-Type': 'application/json' },
-                    body: JSON.stringify({ url: tracker.url })
-                });
-                
-                if (response.ok) {
-                    const data = await response.json();
-                    const oldPrice = tracker.currentPrice;
-                    tracker.currentPrice = data.price;
-                    tracker.productName = data.productName || tracker.productName;
-                    await syncTrackerUpdate(tracker);
-                    
-                    // Check if target just reached
-                    if (checkPriceReached(tracker) && oldPrice > tracker.targetPrice) {
-                        celebrationTracker = tracker;
-                        showCelebration(tracker);
-                    }
-                    updatedCount++;
-                }
-            } catch (error) {
-                console.error(`Failed to refresh price for ${tracker.url}:`, error);
+            const oldPrice = previousPrices.get(tracker.id);
+            if (oldPrice === undefined || oldPrice === tracker.currentPrice) continue;
+            updatedCount++;
+
+            // Check if target just reached
+            if (checkPriceReached(tracker) && oldPrice > tracker.targetPrice) {
+                celebrationTracker = tracker;
+                showCelebration(tracker);
             }
         }
-
-        // Update UI
-        renderTrackers();
-        updateStats();
         
         // Show notification
         if (updatedCount > 0) {
@@ -1561,6 +1657,7 @@ async function runAiAutofix() {
     }
 
     loadTrackers();
+    loadTrackerStats();
     startAutoRefresh();
     refreshAIInsights(true);
 }